@@ -1,54 +1,35 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import functools
+import importlib.util
 import time
-import random
-import boto3
-import json
 import os
-import io
 import urllib.parse
 import urllib.request
 import base64
-import re
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Try importing speech_recognition for real Voice-to-Text
-try:
-    import speech_recognition as sr
-    SR_AVAILABLE = True
-except ImportError:
-    SR_AVAILABLE = False
+from studio import ratelimit, resilience
+from studio.blobstore import get_blob_store
+from studio.cache import get_response_cache
+from studio.engine import LLMResult, get_llm_response, get_llm_responses, stream_llm_response, ttft_summary
+from studio.metrics import metrics, start_http_exporter
+from studio.images import IMAGE_STYLES, TITAN_SOURCE, regenerate_job, variants_job
+from studio.jobs import QueueFull, get_job_queue
+from studio.profiler import profiler
+from studio.prompts import PIPELINE_LANGUAGES, PIPELINE_REGIONS
+from studio.shared import get_shared_backend
+from studio.trends import get_trend_radar, trend_key
+from studio.tts import IncrementalSpeech, default_backend
 
-# Try importing gTTS for real Text-to-Speech
-try:
-    from gtts import gTTS
-    GTTS_AVAILABLE = True
-except ImportError:
-    GTTS_AVAILABLE = False
+# Heavy libraries (pandas, plotly, boto3, Gemini, gTTS, PIL) are imported inside the
+# page or provider that needs them, so a cold worker paints the first page fast.
+# Run `python benchmarks/import_time.py --check` to keep cold start within budget.
 
-# Try importing Google Gemini
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+# Check for speech_recognition (real Voice-to-Text) without importing it
+SR_AVAILABLE = importlib.util.find_spec("speech_recognition") is not None
 
 # --- 🛡️ SECURE KEY LOADING FROM .env FILE 🛡️ ---
-load_dotenv() # This reads the .env file secretly
-
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-
-AWS_CONFIGURED = bool(AWS_ACCESS_KEY and AWS_SECRET_KEY)
-
-if GEMINI_KEY and GEMINI_AVAILABLE:
-    genai.configure(api_key=GEMINI_KEY)
+# Keys, pooled Bedrock/Gemini clients and timeouts live in studio/providers.py
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -60,7 +41,7 @@ st.set_page_config(
 
 # --- 2. ADVANCED CSS ---
 # Included custom styling for centered text and original square logo
-st.markdown("""
+APP_CSS = """
     <style>
     /* Main App Background */
     .stApp { background: linear-gradient(135deg, #0f172a 0%, #1e1b4b 100%); color: #f8fafc; }
@@ -117,85 +98,248 @@ st.markdown("""
         margin-bottom: 15px;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Every full rerun is timed section by section (see System Controls -> Rerun Profiler)
+profiler.start_run("full")
+
+with profiler.section("css"):
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # --- 3. SESSION STATE INITIALIZATION ---
-if 'genius_script' not in st.session_state: st.session_state['genius_script'] = ""
-if 'radar_active' not in st.session_state: st.session_state['radar_active'] = False
-if 'radar_result' not in st.session_state: st.session_state['radar_result'] = ""
-if 'thumbnail_hooks' not in st.session_state: st.session_state['thumbnail_hooks'] = []
-if 'brand_kit_generated' not in st.session_state: st.session_state['brand_kit_generated'] = False
-if 'brand_colors' not in st.session_state: st.session_state['brand_colors'] = []
-if 'brand_text' not in st.session_state: st.session_state['brand_text'] = ""
-if 'planner_result' not in st.session_state: st.session_state['planner_result'] = ""
-if 'calendar_data' not in st.session_state: st.session_state['calendar_data'] = pd.DataFrame(columns=["Content Title", "Platform", "Target Audience", "Optimal Time"])
-
-# Voice Assistant & Pipeline State
-if 'jarvis_query' not in st.session_state: st.session_state['jarvis_query'] = ""
-if 'jarvis_answer' not in st.session_state: st.session_state['jarvis_answer'] = ""
-if 'pipe_base_script' not in st.session_state: st.session_state['pipe_base_script'] = None
-if 'pipe_localized_script' not in st.session_state: st.session_state['pipe_localized_script'] = None
-if 'pipe_wa_summary' not in st.session_state: st.session_state['pipe_wa_summary'] = None
-if 'generated_thumbnail' not in st.session_state: st.session_state['generated_thumbnail'] = None
-if 'thumbnail_source' not in st.session_state: st.session_state['thumbnail_source'] = ""
+# Defaults are applied once per session instead of re-checked on every rerun
+SESSION_DEFAULTS = {
+    'genius_script': "",
+    'radar_active': False,
+    'radar_result': "",
+    'radar_key': None,
+    'thumbnail_hooks': [],
+    'brand_kit_generated': False,
+    'brand_colors': [],
+    'brand_palette': None,
+    'brand_text': "",
+    'planner_result': "",
+    'sentiment_report': None,
+    'sentiment_summary': "",
+
+    # Voice Assistant & Pipeline State
+    'jarvis_query': "",
+    'jarvis_answer': "",
+    'pipe_topic': None,
+    'pipe_base_script': None,
+    'pipe_localized': None,   # region -> rewritten script
+    'pipe_whatsapp': None,    # region -> WhatsApp message
+    'pipe_force': None,       # region queued for a forced rewrite
+    'generated_thumbnail': None,
+    'thumbnail_source': "",
+    'thumbnail_variants': [],
+    'selected_variant': 0,
+
+    # Background jobs (ids into studio.jobs) this session is waiting on
+    'thumbnail_job': None,
+    'saarthi_job': None,
+}
+
+with profiler.section("session_state"):
+    if not st.session_state.get('_defaults_applied'):
+        for state_key, default in SESSION_DEFAULTS.items():
+            st.session_state.setdefault(state_key, default)
+        st.session_state['_defaults_applied'] = True
 
 # --- 4. MULTI-CLOUD LIVE AI ENGINE ---
-def get_llm_response(prompt, max_tokens=800):
-    """Central engine routing to Amazon Nova Micro, with fallback to Google Gemini."""
-    aws_error_msg = ""
-    
-    if AWS_CONFIGURED:
-        try:
-            # Securely inject keys from .env
-            bedrock = boto3.client(
-                service_name='bedrock-runtime', 
-                region_name=AWS_REGION,
-                aws_access_key_id=AWS_ACCESS_KEY,
-                aws_secret_access_key=AWS_SECRET_KEY
-            )
-            response = bedrock.converse(
-                modelId='amazon.nova-micro-v1:0',
-                messages=[{"role": "user", "content": [{"text": prompt}]}]
-            )
-            return response['output']['message']['content'][0]['text']
-        except Exception as e:
-            aws_error_msg = str(e)
-            print(f"AWS Nova Failed: {aws_error_msg}")
+# get_llm_response (Nova Micro -> Gemini fallback) lives in studio/engine.py and
+# shares one pooled client per provider across every session.
 
-    if GEMINI_KEY and GEMINI_AVAILABLE:
-        try:
-            model = genai.GenerativeModel('gemini-pro')
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"⚠️ Gemini Error: {e}"
+def select_variant(i):
+    """Make thumbnail variant ``i`` the current thumbnail."""
+    variant = st.session_state['thumbnail_variants'][i]
+    st.session_state['selected_variant'] = i
+    st.session_state['generated_thumbnail'] = variant.image
+    st.session_state['thumbnail_source'] = variant.source
+    st.session_state['enhanced_image_prompt'] = variant.prompt
+
+def drop_evicted_thumbnails():
+    """Forget Titan variants whose images the blob store has evicted; returns how many were dropped."""
+    variants = st.session_state['thumbnail_variants']
+    store = get_blob_store()
+    kept = [v for v in variants if v.source != TITAN_SOURCE or store.exists(v.image)]
+    if len(kept) == len(variants):
+        return 0
+    current = st.session_state['generated_thumbnail']
+    st.session_state['thumbnail_variants'] = kept
+    positions = [i for i, v in enumerate(kept) if v.image == current]
+    if positions:
+        st.session_state['selected_variant'] = positions[0]
+    elif kept:
+        select_variant(0)
+    else:
+        st.session_state['generated_thumbnail'] = None
+        st.session_state['selected_variant'] = 0
+    return len(variants) - len(kept)
+
+def blob_download(key, variant=None):
+    """Bytes for a download button; empty if the image was evicted after the page rendered."""
+    try:
+        return get_blob_store().get(key, variant)
+    except KeyError:
+        return b""
+
+def blob_preview(key):
+    """WebP preview bytes, or None if the image was evicted since drop_evicted_thumbnails ran."""
+    try:
+        return get_blob_store().get(key, "preview")
+    except KeyError:
+        return None
+
+def use_cache():
+    """False when the creator asked to regenerate instead of reusing cached answers."""
+    return not st.session_state.get('bypass_cache', False)
+
+def show_llm_stream(stream, on_chunk=None):
+    """Draw an LLMStream chunk by chunk, then swap it for a latency caption; returns the finished stream."""
+    def chunks():
+        for chunk in stream:
+            if on_chunk:
+                on_chunk(chunk)
+            yield chunk
+
+    live = st.empty()
+    with live.container():
+        st.write_stream(chunks())
+    live.empty()
+    if stream.ttft is not None:
+        st.caption(f"⚡ First token in {stream.ttft * 1000:.0f} ms via {stream.provider} · done in {stream.total_time:.1f}s")
+    return stream
+
+JOB_POLL_SECONDS = 0.5
+
+def submit_job(state_key, kind, fn, *args, lane="interactive", **kwargs):
+    """Queue background work for this session (replacing any job it already has under ``state_key``)."""
+    queue = get_job_queue()
+    if st.session_state.get(state_key):
+        queue.cancel(st.session_state[state_key])
+    try:
+        job = queue.submit(kind, fn, *args, lane=lane, **kwargs)
+    except QueueFull:
+        st.error("⏳ The studio is at capacity right now. Please try again in a moment.")
+        return None
+    st.session_state[state_key] = job.id
+    return job
 
-    return f"⚠️ AI Engine Offline. AWS Error: {aws_error_msg}."
+def follow_job(state_key, on_done, show_partial=None):
+    """Poll the session's job under ``state_key``, or hand it to ``on_done`` once finished. True while it runs."""
+    job = get_job_queue().get(st.session_state.get(state_key))
+    if job is None:
+        st.session_state[state_key] = None
+        return False
+    if job.finished or job.cancelled:  # a cancelled job's late result is dropped
+        st.session_state[state_key] = None
+        on_done(job)
+        return False
+    st.fragment(job_progress, run_every=JOB_POLL_SECONDS)(job.id, show_partial)
+    return True
+
+def job_progress(job_id, show_partial):
+    """Progress bar, partial output and a cancel button; reruns the app once the job lands."""
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None or job.finished or job.cancelled:
+        st.rerun()
+    place = queue.position(job)
+    st.progress(job.progress, text=f"⏳ Queued · #{place} in the {job.lane} lane" if place else job.message or "Working...")
+    if show_partial and job.partial:
+        show_partial(job.partial)
+    if st.button("✖️ Cancel", key=f"cancel_{job_id}"):
+        queue.cancel(job_id)
+        st.rerun()
+
+def page_fragment(page):
+    """Run a page as a Streamlit fragment: its widgets rerun only the page, not CSS/sidebar/state init."""
+    @functools.wraps(page)
+    def timed_page():
+        with profiler.section(f"page:{page.__name__}"), metrics.timer("page_render_seconds", page=page.__name__):
+            page()
+    return st.fragment(timed_page)
 
 # --- 5. DASHBOARDS ---
 
+def queue_pipeline_rerun(region):
+    """Button callback: re-run one region's rewrite (and its WhatsApp format) on the next pass."""
+    st.session_state['pipe_force'] = region
+
+GENIUS_DEADLINE = 90
+
+def genius_stream_llm(prompt, max_tokens):
+    """``stream_first`` for the Script Genius batch: streams the script into the page."""
+    stream = show_llm_stream(stream_llm_response(prompt, max_tokens, feature="script_genius", use_cache=use_cache()))
+    return LLMResult(stream.text, None if stream.ok else stream.text)
+
+def pipeline_stream_llm(prompt, cached):
+    """Pipeline ``llm`` that streams into the page; used for step 1, which runs on the script thread."""
+    stream = show_llm_stream(stream_llm_response(prompt, feature="content_pipeline", use_cache=cached))
+    return LLMResult(stream.text, None if stream.ok else stream.text)
+
+def run_pipeline_regions(regions, force=()):
+    """Fan the base script out to ``regions`` (rewrite + WhatsApp each, concurrently); only changed stages run."""
+    from studio import pipeline
+
+    topic, language = st.session_state['pipe_topic']
+    with st.status(f"🧬 Localizing for {len(regions)} region(s)...", expanded=True) as status:
+        def on_stage(name, result):
+            if name != pipeline.BASE:
+                icon = {"ran": "✅", "reused": "♻️"}.get(result.status, "⚠️")
+                st.write(f"{icon} {name.replace('_', ' ')} · {result.status} ({result.seconds:.1f}s)")
+
+        result = pipeline.run_content_pipeline(topic, language, regions, base_script=st.session_state['pipe_base_script'],
+                                               force=force if use_cache() else True, use_cache=use_cache(), on_stage=on_stage)
+        statuses = [stage.status for name, stage in result.stages.items() if name != pipeline.BASE]
+        status.update(label=f"🧬 {statuses.count('ran')} stages ran · {statuses.count('reused')} reused unchanged",
+                      state="error" if pipeline.first_error(result) else "complete", expanded=False)
+
+    def outputs(kind):
+        stages = result.stages
+        return {r: stages[pipeline.stage_name(kind, r)].error or stages[pipeline.stage_name(kind, r)].text
+                for r in regions if stages[pipeline.stage_name(kind, r)].status != "skipped"}
+
+    st.session_state['pipe_localized'] = outputs(pipeline.LOCALIZED)
+    st.session_state['pipe_whatsapp'] = {r: text for r, text in outputs(pipeline.WHATSAPP).items()
+                                         if not text.startswith("⚠️")}
+
+@page_fragment
 def content_pipeline_page():
+    from studio import pipeline
+
     st.title("🚀 AI Content Pipeline")
-    st.markdown("A 3-step live AI workflow to transform any topic into a regional viral broadcast.")
+    st.markdown("A 3-step live AI workflow to transform any topic into regional viral broadcasts. "
+                "Only the steps whose inputs changed are re-run.")
 
     with st.container(border=True):
         st.subheader("Step 1: AI Knowledge Simplifier")
         col1, col2 = st.columns([1, 1.2])
         with col1:
             doc_type = st.text_input("Enter Topic/Document:", placeholder="e.g. Free Fire OB43 Update, or PM-Kisan Scheme")
-            target_lang = st.selectbox("Target Base Language", ["Hindi", "Marathi", "Hinglish", "English"])
+            target_lang = st.selectbox("Target Base Language", PIPELINE_LANGUAGES)
+            generate = False
             if st.button("🔄 Generate Base Script"):
                 if doc_type:
-                    with st.spinner("AI is analyzing and simplifying..."): 
-                        prompt = f"Act as an expert scriptwriter. Summarize the topic '{doc_type}' into a 4-line engaging video script in {target_lang}."
-                        st.session_state['pipe_base_script'] = get_llm_response(prompt)
-                        st.session_state['pipe_localized_script'] = None 
-                        st.session_state['pipe_wa_summary'] = None 
+                    generate = True
                 else:
                     st.warning("Please enter a topic.")
         with col2:
+            if generate:
+                result = pipeline.run_content_pipeline(doc_type, target_lang, [], targets=[pipeline.BASE],
+                                                       force=() if use_cache() else True, use_cache=use_cache(),
+                                                       llm=pipeline_stream_llm)
+                base = result.base_script or result.stages[pipeline.BASE].error
+                if base != st.session_state['pipe_base_script']:
+                    st.session_state['pipe_localized'] = None
+                    st.session_state['pipe_whatsapp'] = None
+                st.session_state['pipe_topic'] = (doc_type, target_lang)
+                st.session_state['pipe_base_script'] = base
             if st.session_state['pipe_base_script']:
-                st.text_area("Base AI Output:", value=st.session_state['pipe_base_script'], height=180)
+                # Edits here feed Step 2: only the regions below an edited script are re-run
+                st.session_state['pipe_base_script'] = st.text_area("Base AI Output:", value=st.session_state['pipe_base_script'],
+                                                                    height=180)
             else:
                 st.info("👈 Enter a topic and click 'Generate' to start.")
 
@@ -205,35 +349,35 @@ def content_pipeline_page():
             st.subheader("Step 2: Inject Cultural Nuance / Slang")
             col3, col4 = st.columns([1, 1.2])
             with col3:
-                target_region = st.selectbox("Target Audience Vibe", ["Pune (Puneri pure)", "Mumbai (Tapori/Bindaas)", "Delhi (Gamer/Swag)", "UP/Bihar (Desi)"])
-                if st.button("✨ Apply Cultural Nuance"):
-                    with st.spinner(f"Injecting {target_region} style..."): 
-                        prompt = f"Rewrite the following script in {target_region} local slang and vibe to make it extremely relatable to that region. Keep the core meaning intact:\n\n'{st.session_state['pipe_base_script']}'"
-                        st.session_state['pipe_localized_script'] = get_llm_response(prompt)
-                        st.session_state['pipe_wa_summary'] = None 
+                target_regions = st.multiselect("Target Audience Vibes", PIPELINE_REGIONS, default=PIPELINE_REGIONS[:1])
+                fan_out = st.button("✨ Localize & Format for WhatsApp", disabled=not target_regions)
 
             with col4:
-                if st.session_state['pipe_localized_script']:
-                    st.markdown("**🟢 Culturally Localized Script**")
-                    st.markdown(f'<div class="compare-box" style="font-size:0.9em;">{st.session_state["pipe_localized_script"]}</div>', unsafe_allow_html=True)
+                forced = st.session_state['pipe_force']
+                st.session_state['pipe_force'] = None
+                if fan_out:
+                    run_pipeline_regions(target_regions)
+                elif forced:
+                    run_pipeline_regions(list(st.session_state['pipe_localized'] or [forced]),
+                                         force=[pipeline.stage_name(pipeline.LOCALIZED, forced)])
+                for region, localized in (st.session_state['pipe_localized'] or {}).items():
+                    st.markdown(f"**🟢 {region}**")
+                    st.markdown(f'<div class="compare-box" style="font-size:0.9em;">{localized}</div>', unsafe_allow_html=True)
 
-    if st.session_state['pipe_localized_script']:
+    if st.session_state['pipe_whatsapp']:
         st.markdown("<br>", unsafe_allow_html=True)
         with st.container(border=True):
             st.subheader("Step 3: Format for WhatsApp Distribution")
-            col5, col6 = st.columns([1, 1.2])
-            with col5:
-                if st.button("📲 Auto-Format for WhatsApp"):
-                    with st.spinner("Adding emojis and formatting..."):
-                        prompt = f"Format this script into a highly engaging, viral WhatsApp broadcast message. Add relevant emojis, short bullet points, and a strong Call to Action at the end:\n\n'{st.session_state['pipe_localized_script']}'"
-                        st.session_state['pipe_wa_summary'] = get_llm_response(prompt)
-            with col6:
-                if st.session_state['pipe_wa_summary']:
-                    edited_wa = st.text_area("Review & Edit (Ready to Send)", value=st.session_state['pipe_wa_summary'], height=200)
+            messages = st.session_state['pipe_whatsapp']
+            for tab, (region, message) in zip(st.tabs(list(messages)), messages.items()):
+                with tab:
+                    edited_wa = st.text_area(f"Review & Edit for {region} (Ready to Send)", value=message, height=200)
                     encoded_text = urllib.parse.quote(edited_wa)
                     whatsapp_url = f"https://api.whatsapp.com/send?text={encoded_text}"
                     st.markdown(f'<a href="{whatsapp_url}" target="_blank" class="whatsapp-btn">🚀 1-Click Broadcast to WhatsApp</a>', unsafe_allow_html=True)
+                    st.button("♻️ Rewrite this region again", key=f"pipe_rerun_{region}", on_click=queue_pipeline_rerun, args=(region,))
 
+@page_fragment
 def script_genius_page():
     st.title("✍️ AI Script Genius")
     st.markdown("Multilingual AI content and script generation with smart hooks and tone control.")
@@ -246,23 +390,32 @@ def script_genius_page():
             language = st.selectbox("Choose Language", ["Hindi", "Marathi", "Hinglish", "English"])
             vibe = st.select_slider("Vibe / Tone", ["Educational", "Professional", "Casual", "Funny", "Urgent"])
             
+            genius_prompts = None
             if st.button("✨ Generate Script & Hooks"):
                 if topic:
-                    with st.spinner("Writing script and generating hooks via AI..."):
-                        script_prompt = f"Write a highly engaging, {vibe} YouTube Shorts/Reels script in {language} about '{topic}'. Include a 3-second hook, a short body, and a CTA."
-                        st.session_state['genius_script'] = get_llm_response(script_prompt)
-                        
-                        hook_prompt = f"Give me exactly 3 short, clickbaity, viral YouTube thumbnail titles (3-5 words max each) for a video about '{topic}' in {language}. Use emojis. Output them separated by commas."
-                        hooks_response = get_llm_response(hook_prompt, max_tokens=100)
-                        st.session_state['thumbnail_hooks'] = [h.strip() for h in hooks_response.split(",") if h.strip()][:3]
-                        
-                    st.success("Generation successful!")
+                    script_prompt = f"Write a highly engaging, {vibe} YouTube Shorts/Reels script in {language} about '{topic}'. Include a 3-second hook, a short body, and a CTA."
+                    hook_prompt = f"Give me exactly 3 short, clickbaity, viral YouTube thumbnail titles (3-5 words max each) for a video about '{topic}' in {language}. Use emojis. Output them separated by commas."
+                    genius_prompts = (script_prompt, hook_prompt)
                 else:
                     st.warning("Please enter a topic.")
                     
     with col2:
         with st.container(border=True):
             st.subheader("📝 Script Storyboard Editor")
+            if genius_prompts:
+                # One batch: the script streams in on this thread while the hooks run in the background
+                script_prompt, hook_prompt = genius_prompts
+                with st.spinner("Writing script and generating hooks via AI..."):
+                    script_result, hooks_result = get_llm_responses(
+                        [script_prompt, (hook_prompt, 100)], feature="script_genius", use_cache=use_cache(),
+                        deadline=GENIUS_DEADLINE, stream_first=genius_stream_llm,
+                    )
+                st.session_state['genius_script'] = script_result.text or script_result.error
+                if hooks_result.error:
+                    st.session_state['thumbnail_hooks'] = []
+                else:
+                    st.session_state['thumbnail_hooks'] = [h.strip() for h in hooks_result.text.split(",") if h.strip()][:3]
+                st.success("Generation successful!")
             st.text_area("Live Editor", value=st.session_state.get('genius_script', ""), height=250)
 
         if st.session_state.get('thumbnail_hooks'):
@@ -274,6 +427,13 @@ def script_genius_page():
                     if i < 3:
                         with hook_cols[i]: st.markdown(f'<div class="hook-card" style="font-size:1.1em; padding:10px; text-align:center;">{hook}</div>', unsafe_allow_html=True)
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def brand_palette_from(image_bytes):
+    """Palette of an image, computed once per distinct upload."""
+    from studio import palette
+    return palette.extract_palette(image_bytes)
+
+@page_fragment
 def brand_kit_page():
     st.title("🎨 Brand Identity Kit")
     st.markdown("Live AI generation of custom brand identities for Gaming, Tech, Finance, or Agriculture channels.")
@@ -285,18 +445,31 @@ def brand_kit_page():
             channel_name = st.text_input("Channel Name:", placeholder="e.g. Headshot Gamer, Kisaan Mitra")
             niche = st.text_input("Content Niche:", placeholder="e.g. Mobile Gaming, Stock Market")
             target_demo = st.text_input("Target Audience:", placeholder="e.g. Teenagers, Farmers")
-            
+            reference = st.file_uploader("Logo or reference image (colors are taken from it)", type=["png", "jpg", "jpeg", "webp"])
+
             if st.button("✨ Generate Custom Brand Kit"):
                 if channel_name and niche:
-                    with st.spinner("AI is analyzing psychology and creating your brand..."):
-                        prompt = f"Act as a professional Brand Designer. I am starting a channel named '{channel_name}' in the '{niche}' niche, targeting '{target_demo}'. Provide EXACTLY 3 hex color codes (e.g. #FF0000) that psychologically match this niche. Then provide 2 recommended Google Font names, and a 2-sentence description of the brand's 'Tone of Voice'."
-                        response = get_llm_response(prompt)
-                        
-                        colors = re.findall(r'#[0-9A-Fa-f]{6}', response)
-                        st.session_state['brand_colors'] = colors[:3] if len(colors) >= 3 else ["#3b82f6", "#10b981", "#f59e0b"]
-                        st.session_state['brand_text'] = response
-                        st.session_state['brand_kit_generated'] = True
-                    st.success("Brand Identity generated!")
+                    from studio import palette
+                    try:
+                        if reference:
+                            image_bytes = reference.getvalue()
+                        else:
+                            with open(LOGOPATH, "rb") as image_file:
+                                image_bytes = image_file.read()
+                        brand_palette = brand_palette_from(image_bytes)
+                    except (OSError, ValueError) as e:
+                        st.error(f"⚠️ Could not read colors from the image: {e}")
+                        brand_palette = None
+                    if brand_palette:
+                        with st.spinner("AI is analyzing psychology and writing your brand voice..."):
+                            prompt = f"Act as a professional Brand Designer. I am starting a channel named '{channel_name}' in the '{niche}' niche, targeting '{target_demo}'. The brand colors are already fixed: primary {brand_palette.primary.hex}, accent {brand_palette.accent.hex}, background {brand_palette.background.hex}. Recommend 2 Google Font names that suit this palette, and write a 2-sentence description of the brand's 'Tone of Voice'. Do not suggest other colors."
+                            response = get_llm_response(prompt, feature="brand_kit", use_cache=use_cache())
+
+                            st.session_state['brand_palette'] = brand_palette
+                            st.session_state['brand_colors'] = [brand_palette.primary.hex, brand_palette.accent.hex, brand_palette.background.hex]
+                            st.session_state['brand_text'] = response
+                            st.session_state['brand_kit_generated'] = True
+                        st.success("Brand Identity generated!")
                 else:
                     st.warning("Enter Channel Name and Niche.")
                     
@@ -304,18 +477,46 @@ def brand_kit_page():
         with st.container(border=True):
             st.subheader("2. Your Digital Identity")
             if st.session_state.get('brand_kit_generated', False):
+                from studio import palette
+                brand_palette = st.session_state['brand_palette']
                 colors = st.session_state['brand_colors']
-                st.markdown("**🎨 AI Selected Brand Colors:**")
+                st.markdown("**🎨 Brand Colors (from your logo):**")
                 cols_html = "".join([f"<div style='background-color:{c}; width:60px; height:60px; display:inline-block; margin-right:15px; border-radius:8px; border:2px solid #334155; box-shadow: 0 4px 6px rgba(0,0,0,0.3);'></div>" for c in colors])
-                labels_html = "".join([f"<div style='width:60px; display:inline-block; margin-right:15px; text-align:center; color:#a1a1aa; font-size:0.8em;'>{c}</div>" for c in colors])
+                labels_html = "".join([f"<div style='width:60px; display:inline-block; margin-right:15px; text-align:center; color:#a1a1aa; font-size:0.8em;'>{role}<br>{c}</div>" for role, c in zip(["Primary", "Accent", "Background"], colors)])
                 st.markdown(cols_html + "<br>" + labels_html, unsafe_allow_html=True)
-                st.write("")
-                
+                st.caption("Dominant colors: " + " · ".join(f"{c.hex} ({c.share:.0%})" for c in brand_palette.colors))
+
+                st.markdown("**♿ Contrast & Accessibility (WCAG 2.1):**")
+                st.dataframe(palette.contrast_report(brand_palette), hide_index=True, use_container_width=True)
+
                 st.markdown("**🖋️ AI Branding Guidelines:**")
                 st.info(st.session_state['brand_text'])
             else:
                 st.info("Fill out details to let AI generate your colors and vibe.")
 
+INTERACTIVE_IMAGE_LIMIT = 6
+
+def thumbnails_landed(job):
+    """Apply a finished Titan job (new grid or a repainted variant) to the session."""
+    if job.cancelled:
+        st.info("Generation cancelled.")
+    elif job.status == "failed":
+        st.error(f"Generation failed: {job.error}")
+    elif job.kind == "titan_regenerate":
+        position, variant = job.result
+        st.session_state['thumbnail_variants'][position] = variant
+        select_variant(position)
+    else:
+        variants, errors, elapsed = job.result
+        st.session_state['thumbnail_variants'] = variants
+        st.session_state['variant_stats'] = (len(variants), len({(v.style, v.seed) for v in variants}), elapsed)
+        select_variant(0)
+        if errors:
+            st.warning(f"AWS Network Blocked for {len(errors)} request(s). Engaged Fallback Engine.")
+        else:
+            st.success("Successfully generated using AWS Credits!")
+
+@page_fragment
 def visual_studio_page():
     st.title("🖼️ AI Visual Studio")
     st.markdown("Generating high-conversion thumbnails using **Amazon Titan Image Generator v2:0**.")
@@ -324,116 +525,230 @@ def visual_studio_page():
     with col1:
         with st.container(border=True):
             scene = st.text_area("Scene Description", placeholder="e.g. A cyberpunk hacker sitting in a neon room, OR A pro gamer playing Free Fire on mobile")
-            emotion = st.selectbox("Style/Emotion", ["Cinematic 🎬", "Anime/Gaming 🎮", "Hyper-Realistic 📸", "Neon/Tech ⚡"])
+            styles = st.multiselect("Style/Emotion", IMAGE_STYLES, default=IMAGE_STYLES[:1])
+            v1, v2 = st.columns(2)
+            images_per_call = v1.slider("Images per seed", 1, 4, 1, help="Titan paints these in a single request.")
+            seeds_per_style = v2.slider("Seeds per style", 1, 3, 1, help="Each (style, seed) pair runs in parallel.")
             
             if st.button("🎨 Generate via AWS Credits"):
                 if not scene:
                     st.warning("Please describe the scene first.")
+                elif not styles:
+                    st.warning("Pick at least one style.")
                 else:
-                    with st.spinner("AWS Bedrock (Titan v2:0) is painting..."):
-                        base_prompt = f"{scene}, {emotion} style, 8k resolution, highly detailed, vibrant colors."
-                        st.session_state['enhanced_image_prompt'] = base_prompt
-                        
-                        try:
-                            # 1. ATTEMPT AWS TITAN V2:0 GENERATION
-                            bedrock = boto3.client(
-                                service_name='bedrock-runtime',
-                                region_name=AWS_REGION,
-                                aws_access_key_id=AWS_ACCESS_KEY,
-                                aws_secret_access_key=AWS_SECRET_KEY
-                            )
-                            
-                            body = json.dumps({
-                                "taskType": "TEXT_IMAGE",
-                                "textToImageParams": {"text": base_prompt},
-                                "imageGenerationConfig": {
-                                    "cfgScale": 8,
-                                    "seed": random.randint(0, 2147483647), # Randomize seed for fresh images
-                                    "width": 1024,
-                                    "height": 1024,
-                                    "numberOfImages": 1
-                                }
-                            })
-                            
-                            response = bedrock.invoke_model(
-                                modelId="amazon.titan-image-generator-v2:0", 
-                                body=body
-                            )
-                            
-                            response_body = json.loads(response.get("body").read())
-                            base64_image = response_body.get("images")[0]
-                            st.session_state['generated_thumbnail'] = base64.b64decode(base64_image)
-                            st.session_state['thumbnail_source'] = "AWS Titan v2:0"
-                            st.success("Successfully generated using AWS Credits!")
-
-                        except Exception as e:
-                            # 2. FAIL-SAFE FALLBACK TO POLLINATIONS
-                            st.warning(f"AWS Network Blocked. Engaging Fallback Engine...")
-                            encoded_prompt = urllib.parse.quote(base_prompt)
-                            image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1024&height=1024&seed={random.randint(1,10000)}&nologo=true"
-                            st.session_state['generated_thumbnail'] = image_url
-                            st.session_state['thumbnail_source'] = "Open Source Fallback"
-                            st.success("Generated via Fallback Engine.")
+                    # Big grids go to the bulk lane so they never hold up someone's single thumbnail
+                    images = len(styles) * seeds_per_style * images_per_call
+                    submit_job('thumbnail_job', "titan_grid", variants_job, scene, styles, seeds_per_style, images_per_call,
+                               lane="bulk" if images > INTERACTIVE_IMAGE_LIMIT else "interactive")
+            # 1. AWS TITAN V2:0 runs on a background worker, 2. FAIL-SAFE FALLBACK TO POLLINATIONS per variant
+            thumbnail_running = follow_job('thumbnail_job', thumbnails_landed)
 
     with col2:
         with st.container(border=True):
             st.subheader("2. AI Generated Thumbnail")
+            evicted = drop_evicted_thumbnails()
+            if evicted:
+                st.warning(f"{evicted} older thumbnail(s) were cleared from the image store to free space. Generate them again if you still need them.")
             if st.session_state.get('generated_thumbnail'):
+                variant = st.session_state['thumbnail_variants'][st.session_state['selected_variant']]
                 
                 # Rendering logic based on source
-                if st.session_state['thumbnail_source'] == "AWS Titan v2:0":
-                    st.image(st.session_state['generated_thumbnail'], caption="AWS Titan v2 Output")
-                    st.download_button("📥 Download Thumbnail", st.session_state['generated_thumbnail'], "aws_thumb.png", "image/png")
+                if st.session_state['thumbnail_source'] == TITAN_SOURCE:
+                    # Session state only holds the blob key; the browser gets the small WebP preview
+                    store = get_blob_store()
+                    key = st.session_state['generated_thumbnail']
+                    preview = blob_preview(key)
+                    if preview is None:
+                        st.warning("This image was just cleared from the image store. Use 'Regenerate this exact image' below to get it back.")
+                    else:
+                        st.image(preview, caption="AWS Titan v2 Output")
+                    d1, d2, d3 = st.columns(3)
+                    for col, label, size in ((d1, "📥 Original", None), (d2, "▶️ YouTube 1280×720", "youtube"), (d3, "📱 Shorts 1080×1920", "shorts")):
+                        col.download_button(label, lambda size=size: blob_download(key, size), store.filename(key, size, "aws_thumb"),
+                                            store.mime(size), key=f"download_{size or 'original'}", on_click="ignore")
                 else:
                     img_url = st.session_state['generated_thumbnail']
                     st.markdown(f'<img src="{img_url}" style="width:100%; border-radius:10px; border:1px solid #334155;">', unsafe_allow_html=True)
                     st.markdown(f"**[📥 Click here to open/download Image directly]({img_url})**")
+
+                st.caption(f"🎲 Seed {variant.seed} · image {variant.index + 1} of {variant.batch_size} · {variant.style}")
+                if st.button("🔁 Regenerate this exact image", disabled=thumbnail_running):
+                    submit_job('thumbnail_job', "titan_regenerate", regenerate_job, variant, st.session_state['selected_variant'])
+                    st.rerun()
                 
                 st.markdown("<br>**🤖 AI Image Prompt Used:**", unsafe_allow_html=True)
                 st.code(st.session_state.get('enhanced_image_prompt', ''), language="text")
             else:
                 st.info("Describe your scene and click 'Generate via AWS Credits'.")
 
+        variants = st.session_state.get('thumbnail_variants', [])
+        if len(variants) > 1:
+            st.markdown("<br>", unsafe_allow_html=True)
+            with st.container(border=True):
+                count, round_trips, elapsed = st.session_state['variant_stats']
+                st.subheader("🎲 Variant Grid")
+                st.caption(f"{count} images from {round_trips} request(s) in {elapsed:.1f}s ({count / max(elapsed, 1e-6):.2f} images/s)")
+                grid = st.columns(3)
+                for i, v in enumerate(variants):
+                    with grid[i % 3]:
+                        if v.source == TITAN_SOURCE:
+                            preview = blob_preview(v.image)
+                            if preview is None:
+                                st.caption(f"🗑️ {v.style} · seed {v.seed} #{v.index + 1} was cleared from the image store")
+                            else:
+                                st.image(preview, caption=f"{v.style} · seed {v.seed} #{v.index + 1}")
+                        else:
+                            st.markdown(f'<img src="{v.image}" style="width:100%; border-radius:6px;">', unsafe_allow_html=True)
+                            st.caption(f"{v.style} · seed {v.seed} #{v.index + 1}")
+                        if st.button("✅ Use this", key=f"use_variant_{i}", disabled=i == st.session_state['selected_variant']):
+                            select_variant(i)
+                            st.rerun()
+
+CALENDAR_PAGE_SIZE = 20
+
+@page_fragment
 def content_planner_page():
+    import pandas as pd
+    from studio import scheduler
+    from studio.calendar_store import get_calendar_store
+
+    store = get_calendar_store()
     st.title("📅 Smart Content Planner")
     st.markdown("AI-powered scheduling and content calendar management system.")
     col1, col2 = st.columns([1, 2], gap="large")
     with col1:
         with st.container(border=True):
-            title = st.text_input("Content Topic", placeholder="e.g. Free Fire Tips, or Option Trading")
-            platform = st.selectbox("Platform", ["YouTube Shorts", "Instagram Reels", "WhatsApp", "Twitter"])
-            audience = st.text_input("Target Audience", placeholder="e.g. Gamers, Farmers, Programmers")
-            
-            if st.button("🤖 Let AI Predict Best Time"):
-                if title and audience:
+            workspace = st.text_input("Calendar Workspace", value="default", help="Calendars are saved and shared by workspace name.")
+            st.caption("Plan a batch of posts — the scheduler picks non-colliding slots for all of them at once.")
+            planned = st.data_editor(
+                pd.DataFrame([{"Content Title": "", "Platform": "YouTube Shorts", "Target Audience": ""}]),
+                column_config={"Platform": st.column_config.SelectboxColumn("Platform", options=list(scheduler.PLATFORM_CURVES), required=True)},
+                num_rows="dynamic", use_container_width=True, key="planner_batch",
+            )
+
+            if st.button("🤖 Let AI Schedule Batch"):
+                posts = [
+                    {"title": row["Content Title"].strip(), "platform": row["Platform"], "audience": row["Target Audience"].strip()}
+                    for row in planned.fillna("").to_dict("records")
+                    if str(row["Content Title"]).strip() and str(row["Target Audience"]).strip()
+                ]
+                if posts:
                     with st.spinner("AI analyzing audience behavior..."):
-                        prompt = f"Act as a social media algorithm expert. I am posting a {platform} video about '{title}' to a target audience of '{audience}' in India. Suggest a specific optimal posting time (e.g. Today, 6:30 PM) and write a 1-sentence insight explaining why."
-                        response = get_llm_response(prompt, max_tokens=150)
-                        
+                        now = datetime.now()
+                        taken = store.taken_slots(workspace, now, now + timedelta(days=scheduler.HORIZON_DAYS + 1))
+                        scheduled = [p for p in scheduler.schedule_batch(posts, taken=taken, start=now) if p.get("scheduled_at")]
+                    if scheduled:
+                        with st.spinner("AI explaining the chosen slots..."):
+                            response = get_llm_response(scheduler.explanation_prompt(scheduled), max_tokens=60 * len(scheduled) + 50,
+                                                        feature="planner", use_cache=use_cache())
+                        insights = {} if response.startswith("⚠️") else scheduler.parse_explanations(response, len(scheduled))
+                        for i, post in enumerate(scheduled, 1):
+                            post["insight"] = insights.get(i)
+                        store.add_posts(workspace, scheduled)
+
                         st.session_state['planner_result'] = response
-                        new_entry = pd.DataFrame([{"Content Title": title, "Platform": platform, "Target Audience": audience, "Optimal Time": "AI Decided"}])
-                        st.session_state['calendar_data'] = pd.concat([st.session_state['calendar_data'], new_entry], ignore_index=True)
-                        st.success("Scheduled successfully!")
+                        st.success(f"Scheduled {len(scheduled)} of {len(posts)} posts successfully!")
+                    else:
+                        st.warning(f"No free slot in the next {scheduler.HORIZON_DAYS} days for any of these {len(posts)} posts.")
                 else:
                     st.warning("Enter Topic and Audience.")
 
     with col2:
         with st.container(border=True):
             st.subheader("Your Live AI Content Calendar")
-            st.table(st.session_state['calendar_data'])
+            f1, f2, f3 = st.columns(3)
+            platform_filter = f1.selectbox("Platform", ["All"] + store.distinct(workspace, "platform"))
+            audience_filter = f2.selectbox("Audience", ["All"] + store.distinct(workspace, "audience"))
+            filters = {
+                "platform": None if platform_filter == "All" else platform_filter,
+                "audience": None if audience_filter == "All" else audience_filter,
+            }
+            total = store.count(workspace, **filters)
+            pages = max(1, -(-total // CALENDAR_PAGE_SIZE))
+            page_no = f3.number_input("Page", min_value=1, max_value=pages, value=1)
+            rows = store.page(workspace, offset=(page_no - 1) * CALENDAR_PAGE_SIZE, limit=CALENDAR_PAGE_SIZE, **filters)
+            st.table(pd.DataFrame(
+                [{"Content Title": r["title"], "Platform": r["platform"], "Target Audience": r["audience"],
+                  "Optimal Time": datetime.fromisoformat(r["scheduled_at"]).strftime("%a %d %b, %I:%M %p"),
+                  "AI Insight": r["insight"] or ""} for r in rows],
+                columns=["Content Title", "Platform", "Target Audience", "Optimal Time", "AI Insight"],
+            ))
+            st.caption(f"{total} posts · page {page_no} of {pages}")
             if st.session_state.get('planner_result'):
                 st.info(f"🧠 **Latest AI Insight:** {st.session_state['planner_result']}")
 
+def compact_number(n):
+    """1234567 -> "1.2M" (Indian dashboards still read M/K)."""
+    for size, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(n) >= size:
+            return f"{n / size:.1f}{suffix}"
+    return str(int(n))
+
+@st.cache_resource(show_spinner=False)
+def demo_analytics_rollup():
+    from studio import analytics
+    return analytics.rollup_frame(analytics.synthetic_export(200_000), "YouTube")
+
+@page_fragment
 def analytics_hub_page():
+    import pandas as pd
+    import plotly.express as px
+    from studio import analytics
+
     st.title("📊 Bharat Analytics Hub")
     st.markdown("Intelligent dashboards for performance, sentiment, and regional engagement insights.")
-    
+
+    with st.expander("📥 Channel Analytics Exports", expanded='analytics_rollups' not in st.session_state):
+        uploads = st.file_uploader("YouTube Studio / Instagram exports (CSV or Parquet)", type=["csv", "parquet"], accept_multiple_files=True)
+        server_files = analytics.export_dir_files()
+        if server_files:
+            st.caption(f"Also loading {len(server_files)} exports from `{analytics.EXPORT_DIR}`.")
+        demo = st.toggle("Use demo channel data", value=not uploads and not server_files)
+
+    # Rollups are kept per upload so a rerun never re-hashes or re-parses the raw file
+    rollups = st.session_state.setdefault('analytics_rollups', {})
+    sources = [(f"upload:{f.file_id}", f, f.name) for f in uploads or []] + [(f"file:{p}", p, p) for p in server_files]
+    if demo:
+        sources.append(("demo", None, "youtube_demo.csv"))
+    for key, source, name in sources:
+        if key not in rollups:
+            with st.spinner(f"Ingesting {os.path.basename(name)}..."):
+                try:
+                    if key == "demo":
+                        rollups[key] = demo_analytics_rollup()
+                    else:
+                        rollups[key] = analytics.load_export(source, name)
+                except Exception as e:
+                    st.error(f"⚠️ Could not read {os.path.basename(name)}: {e}")
+                    rollups[key] = analytics.empty_rollup()
+    rollup = analytics.combine([rollups[key] for key, _, _ in sources])
+    summary = analytics.kpis(rollup)
+
     m1, m2, m3, m4 = st.columns(4)
-    m1.metric("Lifetime Reach", "1.2M", "+15%")
-    m2.metric("Avg CTR", "8.4%", "+1.2%")
-    m3.metric("Top Platform", "YouTube", "60% Traffic")
-    m4.metric("Audience", "Tier-2/3", "Growing")
-    
+    if summary:
+        m1.metric("Lifetime Reach", compact_number(summary['reach']),
+                  None if summary['reach_change'] is None else f"{summary['reach_change']:+.0f}%")
+        m2.metric("Avg CTR", f"{summary['ctr']:.1f}%", None if summary['ctr_change'] is None else f"{summary['ctr_change']:+.1f}%")
+        m3.metric("Top Platform", summary['top_platform'], f"{summary['top_platform_share']:.0f}% Traffic")
+        m4.metric("Top Region", summary['top_region'], f"{compact_number(summary['rows'])} rows · {summary['days']} days", delta_color="off")
+
+        g1, g2 = st.columns([2, 1], gap="large")
+        with g1.container(border=True):
+            st.subheader("📈 Views Over Time")
+            fig = px.line(analytics.timeseries(rollup), labels={"value": "Views", "day": "", "platform": "Platform"})
+            fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", margin=dict(t=10, b=0, l=0, r=0), height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        with g2.container(border=True):
+            st.subheader("🗺️ Top Regions")
+            fig = px.bar(analytics.top_n(rollup, "region"), x="Views", y="Region", orientation="h", color_discrete_sequence=["#f97316"])
+            fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", margin=dict(t=10, b=0, l=0, r=0), height=300,
+                              yaxis=dict(autorange="reversed", title=None))
+            st.plotly_chart(fig, use_container_width=True)
+    else:
+        for m in (m1, m2, m3, m4):
+            m.metric("—", "—")
+        st.info("Upload an analytics export to see your channel's numbers.")
+
     st.divider()
     
     c1, c2 = st.columns([2, 1], gap="large")
@@ -441,22 +756,61 @@ def analytics_hub_page():
         with st.container(border=True):
             st.subheader("🧠 Live AI Sentiment Analyzer")
             niche_analysis = st.text_input("Enter a video topic you recently posted:", placeholder="e.g. Buying stocks on Groww app")
+            comment_file = st.file_uploader("Comment export (CSV / JSONL / TXT) — scored offline", type=["csv", "jsonl", "json", "txt"])
             if st.button("Analyze Audience Sentiment"):
-                if niche_analysis:
+                if comment_file:
+                    from studio import sentiment
+                    with st.spinner("Scoring comments locally..."):
+                        try:
+                            started = time.perf_counter()
+                            report = sentiment.analyze(sentiment.load_comments(comment_file, comment_file.name))
+                            elapsed = time.perf_counter() - started
+                        except ValueError as e:
+                            report = None
+                            st.error(f"⚠️ Could not read comments: {e}")
+                    if report is not None:
+                        st.session_state['sentiment_report'] = report
+                        st.caption(f"Scored {len(report.scores):,} comments in {elapsed:.2f}s · AI summary from {len(report.sample)} sampled comments")
+                        with st.spinner("AI summarizing a sample of comments..."):
+                            st.session_state['sentiment_summary'] = get_llm_response(sentiment.summary_prompt(report, niche_analysis),
+                                                                                     feature="analytics", use_cache=use_cache())
+                elif niche_analysis:
                     with st.spinner("AI analyzing predicted comments..."):
                         prompt = f"Predict the audience sentiment and common comments for an Indian creator's video about '{niche_analysis}'. Give a percentage of Positive vs Negative, and a 1 sentence tip to improve the next video."
-                        st.info(get_llm_response(prompt))
+                        st.session_state['sentiment_report'] = None
+                        st.session_state['sentiment_summary'] = get_llm_response(prompt, feature="analytics", use_cache=use_cache())
                 else:
-                    st.warning("Enter a topic to analyze.")
-            
+                    st.warning("Enter a topic or upload comments to analyze.")
+
+            report = st.session_state['sentiment_report']
+            if report is not None:
+                total = int(report.split.sum()) or 1
+                s1, s2, s3 = st.columns(3)
+                s1.metric("Positive", f"{report.split['Positive'] / total * 100:.0f}%")
+                s2.metric("Neutral", f"{report.split['Neutral'] / total * 100:.0f}%")
+                s3.metric("Negative", f"{report.split['Negative'] / total * 100:.0f}%")
+                st.dataframe(report.by_script, use_container_width=True)
+            if st.session_state['sentiment_summary']:
+                st.info(st.session_state['sentiment_summary'])
+
     with c2:
         with st.container(border=True):
             st.subheader("Audience Split")
-            sent_df = pd.DataFrame({"Platform": ["YouTube", "Insta", "WhatsApp"], "Traffic": [60, 25, 15]})
-            fig2 = px.pie(sent_df, names="Platform", values="Traffic", hole=0.4, color_discrete_sequence=["#ef4444", "#eab308", "#22c55e"])
+            sent_df = analytics.top_n(rollup, "platform", n=5) if summary else pd.DataFrame({"Platform": [], "Views": []})
+            fig2 = px.pie(sent_df, names="Platform", values="Views", hole=0.4, color_discrete_sequence=["#ef4444", "#eab308", "#22c55e", "#3b82f6", "#a855f7", "#64748b"])
             fig2.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", showlegend=False, margin=dict(t=0, b=0, l=0, r=0))
             st.plotly_chart(fig2, use_container_width=True)
 
+        if st.session_state['sentiment_report'] is not None:
+            with st.container(border=True):
+                st.subheader("Sentiment Split")
+                split = st.session_state['sentiment_report'].split
+                fig3 = px.pie(names=split.index, values=split.values, hole=0.4, color=split.index,
+                              color_discrete_map={"Positive": "#22c55e", "Neutral": "#94a3b8", "Negative": "#ef4444"})
+                fig3.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", showlegend=False, margin=dict(t=0, b=0, l=0, r=0))
+                st.plotly_chart(fig3, use_container_width=True)
+
+@page_fragment
 def trend_radar_page():
     st.title("📡 Trend Radar")
     st.markdown("Real-time AI detection of trending topics and digital momentum.")
@@ -465,14 +819,20 @@ def trend_radar_page():
         with st.container(border=True):
             state = st.text_input("State / Location", placeholder="e.g. Maharashtra, or All India")
             niche = st.text_input("Niche (Optional)", placeholder="e.g. Gaming, Finance, Agriculture")
-            
+            language = st.selectbox("Language", PIPELINE_LANGUAGES, index=PIPELINE_LANGUAGES.index("English"))
+
             if st.button("📡 Scan Live AI Trends"):
+                key = trend_key(state, niche, language)
                 with st.spinner("AI is scanning internet patterns..."):
-                    prompt = f"Act as a trending topics analyst. Suggest 2 highly engaging, plausible trending video ideas right now for a creator in '{state}' focusing on the '{niche}' niche. Keep it under 3 sentences total."
-                    st.session_state['radar_result'] = get_llm_response(prompt, max_tokens=200)
-                    st.session_state['radar_active'] = True
+                    # Shared across sessions: fresh/stale scans return instantly, a stale one refreshes in the background
+                    get_trend_radar().get(key, force=not use_cache())
+                st.session_state['radar_key'] = key
+                st.session_state['radar_active'] = True
     with col2:
-        if st.session_state.get('radar_active'):
+        view = get_trend_radar().peek(st.session_state['radar_key']) if st.session_state.get('radar_active') else None
+        if view:
+            st.session_state['radar_result'] = view.scan.text
+            age_min = (time.time() - view.scan.fetched_at) / 60
             st.success("Live Radar Scan Complete!")
             st.markdown(f"""
             <div class="alert-card">
@@ -480,9 +840,85 @@ def trend_radar_page():
                 <p style="margin:5px 0 0 0;">{st.session_state['radar_result']}</p>
             </div>
             """, unsafe_allow_html=True)
+            status = "🔄 refreshing in the background" if view.refreshing else ("stale" if view.stale else "fresh")
+            st.caption(f"{' · '.join(st.session_state['radar_key'])} — scanned {age_min:.0f} min ago, {status}")
         else:
             st.info("👈 Enter your location/niche and click 'Scan Live AI Trends'.")
 
+def build_saarthi_prompt(query, lang_name):
+    # Strict prompt to force Devanagari Script for clear pronunciation
+    return f"""You are Saarthi, an expert AI creator assistant. 
+                    Answer this query in {lang_name} briefly and energetically. 
+                    CRITICAL RULE: If the language is Hindi or Marathi, you MUST write the answer strictly in the native Devanagari script (e.g., नमस्ते). Do NOT use English letters to write Hindi/Marathi. 
+                    Query: {query}"""
+
+def saarthi_answer_job(job, query, voice_clip, lang_name, lang_code, cached):
+    """Voice question -> transcript -> streamed answer -> speech, run on a job worker (no Streamlit calls here)."""
+    notes = []
+    if query is None:
+        from studio import voice
+        recognizer = voice.default_recognizer()
+        if recognizer is None:
+            raise RuntimeError("No speech recognizer is installed (pip install faster-whisper for offline Hindi/Marathi).")
+        job.report(0.05, "🎙️ Listening...")
+        samples, _ = voice.read_wav(voice_clip)
+        # Chunks are transcribed as the VAD finds pauses; the answer starts the moment the last one lands
+        transcript = voice.stream_transcript(samples, recognizer, lang_code,
+                                             on_partial=lambda text: job.report(partial={"query": f"{text}…", "answer": ""}))
+        if not transcript.text:
+            return {"query": "", "answer": "", "notes": ["Couldn't hear a question in that recording."]}
+        query = transcript.text
+        notes.append(f"🎙️ {recognizer.name}{'' if recognizer.offline else ' (online)'} · {len(transcript.chunks)} chunks · "
+                     f"{transcript.audio_seconds:.1f}s audio transcribed in {transcript.processing_seconds:.2f}s")
+
+    job.report(0.2, "🤖 Saarthi is answering...", partial={"query": query, "answer": ""})
+    # Voice is synthesized sentence by sentence (correct language code & accent) while the answer streams
+    speech = IncrementalSpeech(lang_code, tld="co.in" if lang_code == "en" else None) if default_backend() else None
+    stream = stream_llm_response(build_saarthi_prompt(query, lang_name), feature="saarthi", use_cache=cached)
+    for chunk in stream:
+        if speech:
+            speech.feed(chunk)
+        job.report(partial={"query": query, "answer": stream.text})
+    if stream.ttft is not None:
+        notes.append(f"⚡ First token in {stream.ttft * 1000:.0f} ms via {stream.provider} · done in {stream.total_time:.1f}s")
+
+    job.report(0.8, "🔊 Generating Voice Output...")
+    result = {"query": query, "answer": stream.text, "notes": notes, "audio": None, "mime": None, "tts_error": None}
+    if speech:
+        try:
+            result["audio"], result["mime"] = speech.finish(), speech.mime
+        except Exception as e:
+            result["tts_error"] = str(e)
+    return result
+
+def show_saarthi_partial(partial):
+    st.markdown(f"**🗣️ You:** \n*{partial['query']}*")
+    if partial["answer"]:
+        st.markdown(partial["answer"])
+
+def saarthi_landed(job):
+    """Apply a finished Saarthi job to the session."""
+    if job.cancelled:
+        st.info("Saarthi request cancelled.")
+        return
+    if job.status == "failed":
+        st.error(f"Saarthi Error: {job.error}")
+        return
+    result = job.result
+    for note in result["notes"]:
+        st.caption(note)
+    if not result["query"]:
+        return
+    st.session_state['jarvis_query'] = result["query"]
+    st.session_state['jarvis_answer'] = result["answer"]
+    st.session_state['jarvis_audio'] = result["audio"]
+    st.session_state['jarvis_audio_mime'] = result["mime"]
+    if result["tts_error"]:
+        st.error(f"TTS Error: {result['tts_error']}")
+    elif not default_backend():
+        st.warning("Audio library (gTTS) is missing.")
+
+@page_fragment
 def ai_saarthi_page():
     st.title("🤖 AI Saarthi")
     st.markdown("Your fully connected multi-lingual AI Co-Pilot. Ask anything.")
@@ -499,57 +935,46 @@ def ai_saarthi_page():
         with st.container(border=True):
             target_lang_name = st.selectbox("Select Your Language", list(langs.keys()))
             text_val = st.text_input("💬 Ask Saarthi anything (Gaming, Code, Scripts...):", placeholder="e.g. Write a viral hook for my Free Fire video...")
-            
+            recorded = st.audio_input("🎙️ Or ask by voice")
+            uploaded = st.file_uploader("...or upload a WAV question", type=["wav"])
+            voice_clip = recorded or uploaded
+
+            question = None
             if st.button("✨ Ask Saarthi"):
                 if text_val:
                     st.session_state['jarvis_query'] = text_val
-                    with st.spinner("Saarthi is thinking via AI..."):
-                        
-                        # Strict prompt to force Devanagari Script for clear pronunciation
-                        prompt = f"""You are Saarthi, an expert AI creator assistant. 
-                        Answer this query in {target_lang_name} briefly and energetically. 
-                        CRITICAL RULE: If the language is Hindi or Marathi, you MUST write the answer strictly in the native Devanagari script (e.g., नमस्ते). Do NOT use English letters to write Hindi/Marathi. 
-                        Query: {text_val}"""
-                        
-                        answer = get_llm_response(prompt, max_tokens=300)
-                        st.session_state['jarvis_answer'] = answer
-                        
-                        # Generate Audio using correct gTTS language code & accent
-                        with st.spinner("Generating Voice Output..."):
-                            if GTTS_AVAILABLE:
-                                try:
-                                    lang_code = langs[target_lang_name]
-                                    if lang_code == "en":
-                                        tts = gTTS(text=answer, lang=lang_code, tld="co.in")
-                                    else:
-                                        tts = gTTS(text=answer, lang=lang_code)
-                                    
-                                    fp = io.BytesIO()
-                                    tts.write_to_fp(fp)
-                                    st.session_state['jarvis_audio'] = fp.getvalue()
-                                except Exception as e:
-                                    st.error(f"TTS Error: {e}")
-                                    st.session_state['jarvis_audio'] = None
-                            else:
-                                st.warning("Audio library (gTTS) is missing.")
+                    question = (text_val, None)
+                elif voice_clip:
+                    question = (None, voice_clip.getvalue())
                 else:
                     st.warning("Please type a question.")
+            if question:
+                # Transcription, the answer and its voice all run on a background worker; this page only polls
+                submit_job('saarthi_job', "saarthi", saarthi_answer_job, *question,
+                           target_lang_name, langs[target_lang_name], use_cache())
+            if not SR_AVAILABLE:
+                st.caption("🎙️ Install SpeechRecognition (or faster-whisper / vosk for offline use) to ask by voice.")
                 
     with col2:
         with st.container(border=True):
             st.subheader("2. Saarthi Response")
-            if st.session_state.get('jarvis_answer'):
+            saarthi_running = follow_job('saarthi_job', saarthi_landed, show_partial=show_saarthi_partial)
+
+            if st.session_state.get('jarvis_answer') and not saarthi_running:
                 st.markdown(f"**🗣️ You:** \n*{st.session_state['jarvis_query']}*")
                 st.markdown("---")
                 st.markdown(f"""<div class="jarvis-box"><h3 style="margin-top:0; color: #7c3aed;">🤖 Saarthi Says:</h3><p style="font-size:1.1em; line-height:1.5;">{st.session_state['jarvis_answer']}</p></div>""", unsafe_allow_html=True)
                 
                 # Show Audio Player
                 if st.session_state.get('jarvis_audio'):
-                    st.audio(st.session_state['jarvis_audio'], format='audio/mp3', autoplay=True)
-            else:
+                    st.audio(st.session_state['jarvis_audio'], format=st.session_state.get('jarvis_audio_mime', 'audio/mp3'), autoplay=True)
+            elif not saarthi_running:
                 st.info("Ask a question to initiate the Live AI loop.")
 
+@page_fragment
 def system_controls_page():
+    import pandas as pd
+
     st.title("⚙️ AI System Controls")
     st.markdown("Custom AI preferences, automation, and personalization settings.")
     col1, col2 = st.columns(2, gap="large")
@@ -559,60 +984,256 @@ def system_controls_page():
             st.success("🥇 Primary Engine: AWS Bedrock (Amazon Nova & Titan V2)")
             st.info("🥈 Fallback Engine: Google Gemini Pro & Pollinations")
             st.markdown("If AWS API limits or errors occur, the system automatically redirects to Fallbacks without crashing.")
+            coalesced = {}
+            for _, labels, value in metrics.counters("coalesced_requests_total"):
+                coalesced[labels["scope"]] = coalesced.get(labels["scope"], 0) + value
+            st.caption(f"🔗 Shared state: {get_shared_backend().describe()} · duplicate requests coalesced: "
+                       f"{coalesced.get('process', 0):.0f} in this worker, {coalesced.get('fleet', 0):.0f} across workers")
     with col2:
         with st.container(border=True):
             st.subheader("2. Real-Time Status")
-            st.progress(100, text="Multi-Cloud Engine Connected & Secure")
-            st.progress(45, text="API Quota Used")
+            calls = {}
+            for _, labels, value in metrics.counters("upstream_calls_total"):
+                ok, total = calls.get(labels["provider"], (0, 0))
+                calls[labels["provider"]] = (ok + (value if labels["outcome"] == "ok" else 0), total + value)
+            for provider, (ok, total) in calls.items():
+                st.progress(ok / total, text=f"{provider}: {ok / total:.0%} of {total:.0f} calls succeeded")
+            if not calls:
+                st.progress(0, text="No upstream calls yet")
+            used = ratelimit.usage.total_tokens()
+            quota = ratelimit.DAILY_TOKEN_QUOTA
+            st.progress(min(1.0, used / quota), text=f"API Quota Used: {used:,} / {quota:,} tokens today")
 
-# --- 6. NAVIGATION LOGIC (RECONSTRUCTED FOR CUSTOM SIDEBAR) ---
+    with st.container(border=True):
+        st.subheader("Token Usage & Rate Limits")
+        usage = ratelimit.usage.snapshot()
+        if usage:
+            st.table(pd.DataFrame([
+                {"Model": model, "Requests": row["requests"], "Input Tokens": row["input_tokens"],
+                 "Output Tokens": row["output_tokens"], "Avg Queue Wait (s)": round(row["queued_seconds"] / row["requests"], 2)}
+                for model, row in usage.items()
+            ]))
+        buckets = ratelimit.limiter_snapshots()
+        if buckets:
+            st.table(pd.DataFrame([
+                {"Model": b["model"], "Bucket": b["bucket"], "Available": f"{b['available']:.0f} / {b['capacity']:.0f}", "Waiting": b["waiting"]}
+                for b in buckets
+            ]))
+        if not usage and not buckets:
+            st.info("No provider calls yet today.")
+
+    with st.container(border=True):
+        st.subheader("3. Response Cache")
+        cache = get_response_cache()
+        if cache is None:
+            st.info("Response cache is disabled (LLM_CACHE_DISABLED=1).")
+        else:
+            stats = cache.snapshot()
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+            c2.metric("Memory Hits", stats['memory_hits'])
+            c3.metric("Disk Hits", stats['disk_hits'])
+            c4.metric("Misses", stats['misses'])
+            st.caption(f"{stats['memory_entries']} answers in memory ({stats['memory_bytes'] / 1024:.1f} KB). "
+                       "Toggle '♻️ Regenerate' in the sidebar to skip cached answers.")
+        radar = get_trend_radar().snapshot()
+        st.caption(f"📡 Trend Radar store: {radar['keys']} niches cached, {radar['watched']} kept warm, "
+                   f"{radar['upstream_calls']} upstream scans, {radar['coalesced']} requests coalesced.")
 
-# Spacer to take everything slightly upward
-st.sidebar.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
+    with st.container(border=True):
+        st.subheader("4. Streaming Time-to-First-Token")
+        ttft = ttft_summary()
+        if ttft:
+            st.table(pd.DataFrame([
+                {"Provider": provider, "Streams": row["count"], "p50 TTFT (ms)": round(row["p50"] * 1000), "p95 TTFT (ms)": round(row["p95"] * 1000)}
+                for provider, row in ttft.items()
+            ]))
+        else:
+            st.info("No streamed answers yet.")
+
+    with st.container(border=True):
+        st.subheader("5. Circuit Breakers & Hedging")
+        breakers = resilience.breaker_snapshots()
+        if breakers:
+            icons = {"closed": "🟢", "half-open": "🟡", "open": "🔴"}
+            st.table(pd.DataFrame([
+                {"Provider": b["provider"], "State": f"{icons[b['state']]} {b['state']}", "Consecutive Failures": b["failures"],
+                 "Trips": b["trips"], "Retry In (s)": round(b["retry_in"]), "Last Error": b["last_error"]}
+                for b in breakers
+            ]))
+        else:
+            st.info("No provider calls yet. All breakers closed.")
+        hedges = resilience.hedge_stats
+        st.caption(f"🏁 Hedging is {'on' if resilience.HEDGING_ENABLED else 'off (set LLM_HEDGING=1 to enable)'}. "
+                   f"Hedge fires after Nova p95 ({resilience.hedge_delay('nova'):.1f}s). "
+                   f"Fired {hedges['fired']}× · won by Gemini {hedges['won_by_hedge']}× · won by Nova {hedges['won_by_primary']}×")
+
+    with st.container(border=True):
+        st.subheader("6. Rerun Profiler")
+        runs = profiler.recent_runs(limit=50)
+        if runs:
+            st.caption("Wall time of the last reruns across all sessions. 'fragment' runs re-execute only one page.")
+            st.bar_chart(pd.DataFrame([{"Rerun": i, "ms": run["total_ms"], "Kind": run["kind"]} for i, run in enumerate(runs)]),
+                         x="Rerun", y="ms", color="Kind")
+            st.table(pd.DataFrame([
+                {"Run": row["run"], "Section": row["section"], "Count": row["count"], "Mean (ms)": round(row["mean_ms"], 1),
+                 "p95 (ms)": round(row["p95_ms"], 1), "Max (ms)": round(row["max_ms"], 1)}
+                for row in profiler.summary()
+            ]))
+        else:
+            st.info("No reruns recorded yet.")
+
+    with st.container(border=True):
+        st.subheader("7. Live Metrics")
+        live = st.toggle("🔴 Live (refresh every 5s)", value=False)
+        st.fragment(live_metrics_panel, run_every=5 if live else None)()
+        e1, e2 = st.columns(2)
+        e1.download_button("⬇️ Prometheus text", metrics.prometheus_text, "digitalbharat_metrics.prom", "text/plain", on_click="ignore")
+        e2.download_button("⬇️ JSON snapshot", metrics.to_json, "digitalbharat_metrics.json", "application/json", on_click="ignore")
+        st.caption("Set METRICS_PORT to serve /metrics (Prometheus) and /metrics.json for scraping.")
+
+    with st.container(border=True):
+        st.subheader("8. Background Jobs")
+        queue = get_job_queue()
+        jobs = queue.stats()
+        j1, j2, j3, j4 = st.columns(4)
+        j1.metric("Workers Busy", f"{jobs['busy']} / {jobs['workers']}", help=f"Bulk jobs may hold at most {jobs['bulk_workers']}.")
+        j2.metric("Queued (Interactive)", jobs['queued']['interactive'])
+        j3.metric("Queued (Bulk)", jobs['queued']['bulk'])
+        j4.metric("Worker Utilization", f"{jobs['utilization']:.0%}")
+        st.caption(f"{jobs['done']} done · {jobs['failed']} failed · {jobs['cancelled']} cancelled since start.")
+        recent = queue.jobs()[:10]
+        if recent:
+            st.dataframe(pd.DataFrame([{"Job": j.id, "Kind": j.kind, "Lane": j.lane, "Status": j.status,
+                                        "Progress": f"{j.progress:.0%}",
+                                        "Waited (s)": round((j.started or time.time()) - j.created, 2),
+                                        "Ran (s)": round(j.elapsed, 2) if j.started else None} for j in recent]),
+                         hide_index=True, use_container_width=True)
+
+    with st.container(border=True):
+        st.subheader("9. Token Budgets")
+        from studio import budget
+
+        savings = budget.savings_report()
+        if savings:
+            st.caption(f"Output caps per page and how often answers hit them. Chained context is trimmed "
+                       f"({budget.TRIM_MODE} mode) to its budget before it is sent. Time saved assumes each page's "
+                       f"observed seconds per token.")
+            st.dataframe(pd.DataFrame(savings), hide_index=True, use_container_width=True)
+        else:
+            st.info("No LLM calls recorded yet.")
+        st.caption("Tune with TOKEN_BUDGET_<PAGE>, CONTEXT_BUDGET_<PAGE> and CONTEXT_TRIM_MODE (extract/summarize).")
+
+
+def live_metrics_panel():
+    """Section 7 of System Controls: latency percentiles, errors, fallbacks, tokens and cache hit rates."""
+    import pandas as pd
+
+    latency = metrics.histograms("upstream_call_seconds")
+    if not latency:
+        st.info("No upstream calls recorded yet.")
+        return
+    ms = lambda seconds: round(seconds * 1000) if seconds is not None else None
+    calls = {(l["provider"], l["model"], l["page"], l["outcome"]): v for _, l, v in metrics.counters("upstream_calls_total")}
+    tokens = {}
+    for _, l, v in metrics.counters("llm_tokens_total"):
+        tokens[(l["provider"], l["model"], l["page"])] = tokens.get((l["provider"], l["model"], l["page"]), 0) + v
+    rows = [{"Provider": l["provider"], "Model": l["model"], "Page": l["page"], "Calls": s["count"],
+             "Errors": int(calls.get((l["provider"], l["model"], l["page"], "error"), 0)),
+             "p50 (ms)": ms(s["p50"]), "p95 (ms)": ms(s["p95"]), "p99 (ms)": ms(s["p99"]), "Max (ms)": ms(s["max"]),
+             "Tokens": int(tokens.get((l["provider"], l["model"], l["page"]), 0))}
+            for _, l, s in latency]
+    frame = pd.DataFrame(rows)
+    st.bar_chart(frame.assign(Series=frame["Provider"] + " · " + frame["Page"]), x="Series", y=["p50 (ms)", "p95 (ms)", "p99 (ms)"],
+                 stack=False, height=260)
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+
+    m1, m2 = st.columns(2)
+    with m1:
+        fallbacks = metrics.counters("fallbacks_total")
+        st.markdown("**Fallbacks**")
+        if fallbacks:
+            st.dataframe(pd.DataFrame([{"Page": l["page"], "Reason": l["reason"], "Count": int(v)} for _, l, v in fallbacks]),
+                         hide_index=True, use_container_width=True)
+        else:
+            st.caption("No fallbacks — primary providers answered everything.")
+    with m2:
+        lookups = {}
+        for _, l, v in metrics.counters("cache_lookups_total"):
+            hits, total = lookups.get((l["cache"], l["page"]), (0, 0))
+            lookups[(l["cache"], l["page"])] = (hits + (v if l["result"] == "hit" else 0), total + v)
+        st.markdown("**Cache Hit Rate**")
+        if lookups:
+            st.dataframe(pd.DataFrame([{"Cache": c, "Page": p, "Lookups": int(t), "Hit Rate": f"{h / t:.0%}"}
+                                       for (c, p), (h, t) in lookups.items()]), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No cache lookups yet.")
+
+
+# --- 6. NAVIGATION LOGIC (RECONSTRUCTED FOR CUSTOM SIDEBAR) ---
 
-# 🖼️ SECURE IMAGE ENCODING FOR HTML
 LOGOPATH = "logo.jpg"
-if os.path.exists(LOGOPATH):
-    with open(LOGOPATH, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode()
-    # Original Size and Square Logo using Custom CSS classes defined at top
-    LOGO_HTML = f'<div class="sidebar-logo-container"><img src="data:image/jpg;base64,{encoded_string}" class="sidebar-logo"></div>'
-else:
-    LOGO_HTML = '<div class="stAlert" style="text-align:center; padding: 10px; border-radius:5px; background-color:rgba(255,255,255,0.1);"><p style="margin:0;">💡 Tip: Save your logo as \'logo.jpg\' in this folder.</p></div>'
-
-# Inject Custom HTML for Logo and Titles
-st.sidebar.markdown(f"""
-    {LOGO_HTML}
-    <div class="sidebar-title">DigitalBharat Studio</div>
-    <div class="sidebar-team">Tech Force</div>
-    """, unsafe_allow_html=True)
-
-st.sidebar.markdown("---")
-st.sidebar.markdown("**🏆 PLATFORM TOOLS**")
-
-# Names match the PPT exactly
-nav_choice = st.sidebar.radio("Navigation", [
-    "🚀 Content Pipeline",
-    "✍️ AI Script Genius",
-    "🎨 Brand Identity Kit",
-    "🖼️ AI Visual Studio",
-    "📅 Smart Content Planner",
-    "📊 Bharat Analytics Hub",
-    "📡 Trend Radar",
-    "🤖 AI Saarthi",
-    "⚙️ AI System Controls"
-], label_visibility="collapsed")
-
-st.sidebar.markdown("---")
-
-# Page Routing
-if nav_choice == "🚀 Content Pipeline": content_pipeline_page()
-elif nav_choice == "✍️ AI Script Genius": script_genius_page()
-elif nav_choice == "🎨 Brand Identity Kit": brand_kit_page()
-elif nav_choice == "🖼️ AI Visual Studio": visual_studio_page()
-elif nav_choice == "📅 Smart Content Planner": content_planner_page()
-elif nav_choice == "📊 Bharat Analytics Hub": analytics_hub_page()
-elif nav_choice == "📡 Trend Radar": trend_radar_page()
-elif nav_choice == "🤖 AI Saarthi": ai_saarthi_page()
-elif nav_choice == "⚙️ AI System Controls": system_controls_page()
-else: content_pipeline_page()
\ No newline at end of file
+
+@st.cache_resource
+def sidebar_logo_html():
+    """Logo read and base64-encoded once per process, not on every rerun."""
+    # 🖼️ SECURE IMAGE ENCODING FOR HTML
+    if os.path.exists(LOGOPATH):
+        with open(LOGOPATH, "rb") as image_file:
+            encoded_string = base64.b64encode(image_file.read()).decode()
+        # Original Size and Square Logo using Custom CSS classes defined at top
+        return f'<div class="sidebar-logo-container"><img src="data:image/jpg;base64,{encoded_string}" class="sidebar-logo"></div>'
+    return '<div class="stAlert" style="text-align:center; padding: 10px; border-radius:5px; background-color:rgba(255,255,255,0.1);"><p style="margin:0;">💡 Tip: Save your logo as \'logo.jpg\' in this folder.</p></div>'
+
+@st.cache_resource
+def metrics_exporter():
+    """/metrics HTTP endpoint, started once per process when METRICS_PORT is set."""
+    return start_http_exporter()
+
+metrics_exporter()
+
+with profiler.section("sidebar"):
+    # Spacer to take everything slightly upward
+    st.sidebar.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
+
+    # Inject Custom HTML for Logo and Titles
+    st.sidebar.markdown(f"""
+        {sidebar_logo_html()}
+        <div class="sidebar-title">DigitalBharat Studio</div>
+        <div class="sidebar-team">Tech Force</div>
+        """, unsafe_allow_html=True)
+
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("**🏆 PLATFORM TOOLS**")
+
+    # Names match the PPT exactly
+    nav_choice = st.sidebar.radio("Navigation", [
+        "🚀 Content Pipeline",
+        "✍️ AI Script Genius",
+        "🎨 Brand Identity Kit",
+        "🖼️ AI Visual Studio",
+        "📅 Smart Content Planner",
+        "📊 Bharat Analytics Hub",
+        "📡 Trend Radar",
+        "🤖 AI Saarthi",
+        "⚙️ AI System Controls"
+    ], label_visibility="collapsed")
+
+    st.sidebar.toggle("♻️ Regenerate (bypass cache)", key="bypass_cache", help="Skip cached AI answers and ask the model again.")
+
+    st.sidebar.markdown("---")
+
+# Page Routing (each page is a fragment, timed as part of this full run)
+try:
+    if nav_choice == "🚀 Content Pipeline": content_pipeline_page()
+    elif nav_choice == "✍️ AI Script Genius": script_genius_page()
+    elif nav_choice == "🎨 Brand Identity Kit": brand_kit_page()
+    elif nav_choice == "🖼️ AI Visual Studio": visual_studio_page()
+    elif nav_choice == "📅 Smart Content Planner": content_planner_page()
+    elif nav_choice == "📊 Bharat Analytics Hub": analytics_hub_page()
+    elif nav_choice == "📡 Trend Radar": trend_radar_page()
+    elif nav_choice == "🤖 AI Saarthi": ai_saarthi_page()
+    elif nav_choice == "⚙️ AI System Controls": system_controls_page()
+    else: content_pipeline_page()
+finally:
+    profiler.finish_run()
@@ -0,0 +1,95 @@
+"""Analytics Hub ingestion and dashboard timings on a synthetic export.
+
+Writes a YouTube-Studio-shaped export of ``--rows`` rows, then times the cold
+chunked ingest, the cached (Parquet) reload and the dashboard aggregates the
+page draws. It also scores a batch of comments with the offline sentiment
+lexicon. ``--check`` exits 1 if the dashboard path goes over ``--budget-ms``
+or a labelled sentiment case (negation in both word orders, mixed clauses)
+comes out wrong.
+
+    python benchmarks/analytics_ingest.py --rows 2000000 --format csv
+    python benchmarks/analytics_ingest.py --check
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (comment, expected label) for the negator and intensifier rules
+SENTIMENT_CASES = [
+    ("This video is good, not bad at all", "Positive"),
+    ("nice, no scam here", "Positive"),
+    ("not good", "Negative"),
+    ("never boring, very helpful", "Positive"),
+    ("accha nahi tha", "Negative"),
+    ("bakwas nahi, ekdum mast", "Positive"),
+    ("बकवास नहीं, बढ़िया है", "Positive"),
+    ("छान नाही", "Negative"),
+    ("\u092c\u095d\u093f\u092f\u093e video", "Positive"),  # बढ़िया with the precomposed ढ़ (U+095D)
+    ("video was good but audio accha nahi, bekar", "Negative"),
+]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ANALYTICS_CACHE_DIR"] = os.path.join(tmp, "cache")
+        sys.path.insert(0, ROOT)
+        from studio import analytics
+
+        path = os.path.join(tmp, f"youtube_export.{args.format}")
+        frame = analytics.synthetic_export(args.rows)
+        frame.to_csv(path, index=False) if args.format == "csv" else frame.to_parquet(path, index=False)
+        size_mb = os.path.getsize(path) / 1e6
+        del frame
+
+        rollup, cold_ms = timed(analytics.load_export, path)
+        rollup, warm_ms = timed(analytics.load_export, path)
+
+        def dashboard():
+            return analytics.kpis(rollup), analytics.timeseries(rollup), analytics.top_n(rollup, "region"), analytics.top_n(rollup, "platform", n=5)
+
+        (summary, series, regions, platforms), dash_ms = timed(dashboard)
+
+    from studio import sentiment
+
+    comments = [comment for comment, _ in SENTIMENT_CASES]
+    labels = [sentiment.LABELS[i] for i in sentiment.label_scores(sentiment.score_comments(comments))]
+    wrong = [(c, want, got) for (c, want), got in zip(SENTIMENT_CASES, labels) if got != want]
+    batch = comments * (100_000 // len(comments))
+    _, sentiment_ms = timed(sentiment.score_comments, batch)
+
+    print(f"export          {args.rows:,} rows ({size_mb:.0f} MB {args.format})")
+    print(f"cold ingest     {cold_ms:8.0f} ms  ({args.rows / cold_ms * 1000:,.0f} rows/s) -> {len(rollup):,} rollup rows")
+    print(f"cached reload   {warm_ms:8.1f} ms")
+    print(f"dashboard       {dash_ms:8.1f} ms  ({sum(series.count())} plotted points, budget {args.budget_ms:.0f} ms)")
+    print(f"sentiment       {sentiment_ms:8.0f} ms  ({len(batch) / sentiment_ms * 1000:,.0f} comments/s), "
+          f"{len(SENTIMENT_CASES) - len(wrong)}/{len(SENTIMENT_CASES)} labelled cases right")
+    for comment, want, got in wrong:
+        print(f"  {comment!r}: {got}, expected {want}")
+    if args.check and warm_ms + dash_ms > args.budget_ms:
+        print("FAIL: dashboard over budget")
+        return 1
+    if args.check and wrong:
+        print("FAIL: sentiment cases mislabelled")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Local stand-ins for Bedrock (Nova, Titan) and Gemini used by the load test.
+
+They answer with the same response shapes as the real SDKs (``converse``,
+``converse_stream``, ``invoke_model``, ``generate_content``), so the engine,
+images and TTS code under test run unmodified. Every call first sleeps for a
+simulated latency, which is lognormal around ``latency`` (``jitter`` is the
+sigma), plus ``per_token`` seconds for every output token. Each call then
+fails with probability ``failure_rate``. Streams pay ``ttft`` before the
+first chunk and fail halfway through with ``stream_failure_rate``.
+Randomness is seeded, so two runs with the same settings see the same
+latencies and failures. Output caps (``inferenceConfig.maxTokens``,
+``max_output_tokens``) are honored: answers are cut at the cap and reported as
+stopped by ``max_tokens``/``MAX_TOKENS``, like the real services.
+"""
+import base64
+import io
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class InjectedFailure(RuntimeError):
+    """Raised by a fake provider to simulate a throttle, timeout or 5xx."""
+
+
+class LatencyModel:
+    def __init__(self, latency=0.3, jitter=0.25, per_token=0.002, ttft=0.15, failure_rate=0.0,
+                 stream_failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_token = per_token
+        self.ttft = ttft
+        self.failure_rate = failure_rate
+        self.stream_failure_rate = stream_failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self, mean):
+        with self._lock:
+            return mean * self._rng.lognormvariate(0, self.jitter) if mean > 0 else 0.0
+
+    def _roll(self, rate):
+        with self._lock:
+            return self._rng.random() < rate
+
+    def wait(self, output_tokens=0):
+        time.sleep(self._draw(self.latency) + output_tokens * self.per_token)
+        if self._roll(self.failure_rate):
+            raise InjectedFailure("ThrottlingException: injected by fake provider")
+
+    def first_chunk(self):
+        time.sleep(self._draw(self.ttft))
+        if self._roll(self.failure_rate):
+            raise InjectedFailure("ServiceUnavailableException: injected by fake provider")
+
+    def chunk(self):
+        time.sleep(self.per_token * 8)
+
+    def breaks_stream(self):
+        return self._roll(self.stream_failure_rate)
+
+
+def _answer(prompt, words=60):
+    """Deterministic filler that still looks like an answer (three lines, so hook parsers find hooks)."""
+    seed = prompt[:40].replace("\n", " ")
+    body = " ".join(f"w{i}" for i in range(words))
+    return f"Answer for: {seed}\nHook one about {seed[:20]}\nHook two: {body}"
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _capped(text, limit):
+    """(text cut to about ``limit`` tokens, True if it was cut)."""
+    if not limit or _tokens(text) <= limit:
+        return text, False
+    return text[:limit * 4], True
+
+
+def _gemini_limit(generation_config):
+    config = generation_config or {}
+    return config.get("max_output_tokens") if isinstance(config, dict) else getattr(config, "max_output_tokens", None)
+
+
+class FakeBedrock:
+    """``bedrock-runtime`` stand-in: Nova ``converse``/``converse_stream`` and Titan ``invoke_model``."""
+
+    def __init__(self, model=None, image_model=None, answer_words=60):
+        self.model = model or LatencyModel()
+        self.image_model = image_model or LatencyModel(latency=1.5, per_token=0, seed=1)
+        self.answer_words = answer_words
+        self.calls = {"converse": 0, "converse_stream": 0, "invoke_model": 0}
+        self._lock = threading.Lock()
+        self._png = None
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def converse(self, modelId, messages, inferenceConfig=None, **kwargs):
+        self._count("converse")
+        prompt = messages[-1]["content"][0]["text"]
+        text, cut = _capped(_answer(prompt, self.answer_words), (inferenceConfig or {}).get("maxTokens"))
+        self.model.wait(_tokens(text))
+        return {"output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+                "usage": {"inputTokens": _tokens(prompt), "outputTokens": _tokens(text),
+                          "totalTokens": _tokens(prompt) + _tokens(text)},
+                "stopReason": "max_tokens" if cut else "end_turn"}
+
+    def converse_stream(self, modelId, messages, inferenceConfig=None, **kwargs):
+        self._count("converse_stream")
+        prompt = messages[-1]["content"][0]["text"]
+        self.model.first_chunk()
+        text, cut = _capped(_answer(prompt, self.answer_words), (inferenceConfig or {}).get("maxTokens"))
+        words = text.split(" ")
+        breaks = self.model.breaks_stream()
+
+        def events():
+            yield {"messageStart": {"role": "assistant"}}
+            for i in range(0, len(words), 8):
+                if i:
+                    self.model.chunk()
+                if breaks and i >= len(words) // 2:
+                    raise InjectedFailure("ModelStreamErrorException: injected by fake provider")
+                yield {"contentBlockDelta": {"delta": {"text": " ".join(words[i:i + 8]) + " "}, "contentBlockIndex": 0}}
+            yield {"messageStop": {"stopReason": "max_tokens" if cut else "end_turn"}}
+            yield {"metadata": {"usage": {"inputTokens": _tokens(prompt), "outputTokens": _tokens(text),
+                                          "totalTokens": _tokens(prompt) + _tokens(text)}}}
+        return {"stream": events()}
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self._count("invoke_model")
+        config = json.loads(body).get("imageGenerationConfig", {})
+        count = config.get("numberOfImages", 1)
+        self.image_model.wait()
+        image = base64.b64encode(self._image()).decode()
+        return {"body": io.BytesIO(json.dumps({"images": [image] * count}).encode()),
+                "contentType": "application/json"}
+
+    def _image(self):
+        if self._png is None:
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.new("RGB", (512, 512), (255, 128, 0)).save(buffer, "PNG")
+            self._png = buffer.getvalue()
+        return self._png
+
+
+class FakeGemini:
+    """``GenerativeModel`` stand-in: ``generate_content(prompt, stream=False, generation_config=None)``."""
+
+    def __init__(self, model=None, answer_words=60):
+        self.model = model or LatencyModel(latency=0.5, seed=2)
+        self.answer_words = answer_words
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        text, cut = _capped(_answer(prompt, self.answer_words), _gemini_limit(generation_config))
+        usage = SimpleNamespace(prompt_token_count=_tokens(prompt), candidates_token_count=_tokens(text))
+        candidates = [SimpleNamespace(finish_reason=SimpleNamespace(name="MAX_TOKENS" if cut else "STOP"))]
+        if not stream:
+            self.model.wait(_tokens(text))
+            return SimpleNamespace(text=text, usage_metadata=usage, candidates=candidates)
+        self.model.first_chunk()
+        words = text.split(" ")
+
+        def chunks():
+            for i in range(0, len(words), 8):
+                if i:
+                    self.model.chunk()
+                last = i + 8 >= len(words)
+                yield SimpleNamespace(text=" ".join(words[i:i + 8]) + ("" if last else " "),
+                                      usage_metadata=usage if last else None, candidates=candidates if last else [])
+        return chunks()
+
+
+def install(latency=0.3, jitter=0.25, failure_rate=0.0, stream_failure_rate=0.0, gemini=True, seed=0):
+    """Point ``studio.providers`` at fresh fakes; returns (bedrock, gemini or None)."""
+    from studio import providers
+
+    bedrock = FakeBedrock(LatencyModel(latency, jitter, failure_rate=failure_rate,
+                                       stream_failure_rate=stream_failure_rate, seed=seed),
+                          LatencyModel(latency * 5, jitter, per_token=0, failure_rate=failure_rate, seed=seed + 1))
+    fallback = FakeGemini(LatencyModel(latency * 1.5, jitter, seed=seed + 2)) if gemini else None
+    providers.install_clients(bedrock=bedrock, gemini=fallback)
+    return bedrock, fallback
@@ -0,0 +1,117 @@
+"""Cold-start import budget for DigitalBharat Studio.
+
+Imports each entry module in a fresh interpreter under ``python -X importtime``
+and reports the median cumulative time plus the heaviest top-level packages
+behind it. ``app`` is imported in Streamlit's bare mode, which is what a new
+worker pays before its first paint.
+
+    python benchmarks/import_time.py             # report
+    python benchmarks/import_time.py --check     # exit 1 on a regression
+    python benchmarks/import_time.py --update    # store current medians x HEADROOM as the budget
+
+``--update`` records each median times ``--headroom`` (default 1.3), so a
+budget sits well above run-to-run noise rather than on top of one sample.
+``--check`` fails if a target is slower than its budget by more than
+``--tolerance`` and by more than ``--slack-ms`` (so scheduler jitter on the
+small modules is not a regression), or if ``app`` pulls in any of
+``LAZY_MODULES`` at start-up.
+Budgets are machine-relative. Re-record them (``--update``) in the same
+change that adds a module to one of these import chains.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT, "benchmarks", "import_budget.json")
+TARGETS = ["app", "studio.engine", "studio.images", "studio.tts", "studio.bulk"]
+
+# Must only be imported by the page/provider that needs them, never at start-up
+# (streamlit itself loads a thin plotly.graph_objects, so only plotly.express is listed)
+LAZY_MODULES = ["pandas", "numpy", "plotly.express", "boto3", "botocore", "google.generativeai",
+                "gtts", "PIL", "speech_recognition"]
+
+
+def measure(module):
+    """One cold import of ``module``; returns (total ms, {top-level package: self ms}, modules)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    per_package, imported, total_us = {}, set(), 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        imported.add(name)
+        top = name.split(".")[0]
+        per_package[top] = per_package.get(top, 0) + int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+    return total_us / 1000, per_package, imported
+
+
+def run(targets, runs):
+    report = {}
+    for module in targets:
+        samples = [measure(module) for _ in range(runs)]
+        totals = [s[0] for s in samples]
+        packages = {}
+        for _, per_package, _ in samples:
+            for name, ms in per_package.items():
+                packages.setdefault(name, []).append(ms)
+        report[module] = {
+            "median_ms": round(statistics.median(totals), 1),
+            "top_packages": sorted(((name, round(statistics.median(v), 1)) for name, v in packages.items()),
+                                   key=lambda item: -item[1])[:8],
+            "imported": samples[-1][2],
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs budget (0.2 = +20%%)")
+    parser.add_argument("--slack-ms", type=float, default=20, help="growth below this is never a regression")
+    parser.add_argument("--headroom", type=float, default=1.3, help="--update stores median x headroom")
+    args = parser.parse_args(argv)
+
+    report = run(TARGETS, args.runs)
+    budget = {}
+    if os.path.exists(BUDGET_PATH):
+        with open(BUDGET_PATH) as f:
+            budget = json.load(f)
+
+    failures = []
+    for module, row in report.items():
+        limit = budget.get(module)
+        status = "" if limit is None else f"(budget {limit:.0f} ms)"
+        print(f"{module:<16} {row['median_ms']:>8.1f} ms {status}")
+        print("    " + ", ".join(f"{name} {ms:.0f}" for name, ms in row["top_packages"]))
+        if limit is not None and row["median_ms"] > limit * (1 + args.tolerance) and row["median_ms"] - limit > args.slack_ms:
+            failures.append(f"{module}: {row['median_ms']:.0f} ms > budget {limit:.0f} ms (+{args.tolerance:.0%})")
+
+    eager = sorted(m for m in LAZY_MODULES if m in report["app"]["imported"])
+    if eager:
+        failures.append(f"app imports heavy modules at start-up: {', '.join(eager)}")
+
+    if args.update:
+        with open(BUDGET_PATH, "w") as f:
+            json.dump({module: round(row["median_ms"] * args.headroom, 1) for module, row in report.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Budget written to {os.path.relpath(BUDGET_PATH, ROOT)}")
+
+    if args.check and failures:
+        print("\n❌ Cold-start budget exceeded:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""Offline load test: N concurrent Streamlit sessions against fake providers.
+
+Bedrock (Nova, Titan) and Gemini are swapped for the local fakes in
+``fake_providers.py``. You can set their latency, jitter and failure
+injection. Each session is a Streamlit ``AppTest`` running in its own thread
+in this process, so sessions share the process-wide caches, rate limiters and
+breakers just as they do in a real server. Every session walks the selected
+pages like a creator would: open the page, fill the form, press the button.
+Each interaction (one script run) is timed.
+
+The report gives p50/p95/p99 per page and step, failed interactions,
+interactions per second, upstream calls and the peak RSS of the process.
+``--check`` compares each p95, failure rate, throughput and peak RSS against
+the stored baseline and exits 1 on a regression beyond ``--tolerance``.
+Before the sessions start, a fixed pure-Python loop is timed and stored with
+the baseline. If this machine runs it slower than the baseline's machine did,
+the p95 and throughput limits are scaled by that ratio, so a busy CI host is
+not reported as a regression.
+
+Running sessions in parallel threads needs ``share_apptest_globals``, which
+patches private ``AppTest`` internals. It is only applied on the Streamlit
+versions in ``APPTEST_TESTED_VERSIONS``. On any other version the test refuses
+to run more than one session until the patch is checked against it.
+
+    python benchmarks/load_test.py                                 # 4 sessions, all pages
+    python benchmarks/load_test.py --sessions 16 --pages pipeline,saarthi --latency 0.8
+    python benchmarks/load_test.py --failure-rate 0.2              # Nova failing -> Gemini fallback
+    python benchmarks/load_test.py --check                         # exit 1 on a regression
+    python benchmarks/load_test.py --update                        # store this run as the baseline
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "load_baseline.json")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Page scenarios: (step, action) pairs, where action(at, tag) fills widgets and returns the widget to click ---
+def _widget(at, kind, label):
+    return next(w for w in getattr(at, kind) if w.label == label)
+
+
+def _click(label, **inputs):
+    """Fill ``inputs`` ({"text_input:Label": value}) then press the button ``label``."""
+    def action(at, tag):
+        for target, value in inputs.items():
+            kind, widget_label = target.split(":", 1)
+            widget = _widget(at, kind, widget_label)
+            widget.input(value.format(tag=tag)) if hasattr(widget, "input") else widget.set_value(value)
+        return _widget(at, "button", label)
+    return action
+
+
+SCENARIOS = {
+    "pipeline": ("🚀 Content Pipeline", [
+        ("generate", _click("🔄 Generate Base Script", **{"text_input:Enter Topic/Document:": "PM Kisan {tag}"}), "pipe_base_script"),
+        ("fanout", _click("✨ Localize & Format for WhatsApp", **{"multiselect:Target Audience Vibes":
+                                                                 ["Pune (Puneri pure)", "Delhi (Gamer/Swag)"]}), "pipe_whatsapp"),
+    ]),
+    "genius": ("✍️ AI Script Genius", [
+        ("generate", _click("✨ Generate Script & Hooks", **{"text_input:Content Topic": "Headshot trick {tag}"}), "genius_script"),
+    ]),
+    "brand": ("🎨 Brand Identity Kit", [
+        ("generate", _click("✨ Generate Custom Brand Kit", **{"text_input:Channel Name:": "Kisaan Mitra {tag}",
+                                                             "text_input:Content Niche:": "Agriculture"}), "brand_text"),
+    ]),
+    "visual": ("🖼️ AI Visual Studio", [
+        ("generate", _click("🎨 Generate via AWS Credits", **{"text_area:Scene Description": "Farmer at sunrise {tag}"}),
+         "thumbnail_variants"),
+    ]),
+    "planner": ("📅 Smart Content Planner", []),
+    "analytics": ("📊 Bharat Analytics Hub", [
+        ("sentiment", _click("Analyze Audience Sentiment",
+                             **{"text_input:Enter a video topic you recently posted:": "Groww stocks {tag}"}), "sentiment_summary"),
+    ]),
+    "trends": ("📡 Trend Radar", [
+        ("scan", _click("📡 Scan Live AI Trends", **{"text_input:State / Location": "Maharashtra",
+                                                     "text_input:Niche (Optional)": "Gaming {tag}"}), "radar_result"),
+    ]),
+    "saarthi": ("🤖 AI Saarthi", [
+        ("ask", _click("✨ Ask Saarthi", **{"text_input:💬 Ask Saarthi anything (Gaming, Code, Scripts...):": "Viral hook {tag}"}),
+         "jarvis_answer"),
+    ]),
+    "system": ("⚙️ AI System Controls", []),
+}
+
+
+def produced(value):
+    """True if a step left a real answer in session state (offline/error banners count as failures)."""
+    if isinstance(value, str):
+        return bool(value.strip()) and not value.lstrip().startswith("⚠️")
+    return bool(value)
+
+
+JOB_KEYS = ("thumbnail_job", "saarthi_job")
+JOB_POLL_SECONDS = 0.1
+
+
+def percentile(samples, q):
+    """Linear-interpolated quantile of a non-empty list."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # "page/step" -> [seconds]
+        self.failures = {}  # "page/step" -> count
+
+    def add(self, key, seconds, ok):
+        with self.lock:
+            self.samples.setdefault(key, []).append(seconds)
+            if not ok:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+
+def calibrate(rounds=5, loops=300_000):
+    """Median ms of a fixed pure-Python loop: how fast this machine runs CPU-bound script code right now."""
+    samples = []
+    for _ in range(rounds):
+        began = time.perf_counter()
+        total = 0
+        for i in range(loops):
+            total += i * i % 7
+        samples.append((time.perf_counter() - began) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+# Streamlit minor versions whose AppTest internals share_apptest_globals was checked against
+APPTEST_TESTED_VERSIONS = ("1.65",)
+
+
+def apptest_patch_supported():
+    import streamlit
+
+    return ".".join(streamlit.__version__.split(".")[:2]) in APPTEST_TESTED_VERSIONS
+
+
+def share_apptest_globals():
+    """Let AppTest sessions run in parallel threads.
+
+    ``AppTest.run`` installs a mock ``Runtime`` singleton and patches
+    ``config.get_option`` for the length of each run, then puts them back. With
+    overlapping runs, one session's teardown pulls them out from under another
+    session mid-script. Each run also recompiles app.py with a fresh
+    ``ScriptCache``, and ``ast.parse`` is not thread-safe on CPython 3.11. Both
+    show up as empty element trees. Here the globals are installed once for the
+    whole load test, the per-run swap is ignored, and all runs share one
+    bytecode cache, as sessions do in a real server.
+    """
+    from contextlib import nullcontext
+    from unittest import mock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    class SharedRuntimeSlot(type):
+        def __setattr__(cls, name, value):
+            if name != "_instance":
+                return super().__setattr__(name, value)
+            if value is not None and Runtime._instance is None:
+                Runtime._instance = value
+
+    mock.patch.object(config, "get_option", new=build_mock_config_get_option({"global.appTest": True})).start()
+    app_test.patch_config_options = lambda overrides: nullcontext()
+    app_test.Runtime = SharedRuntimeSlot("Runtime", (Runtime,), {})
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+
+def run_session(index, pages, iterations, shared_prompts, recorder, start, errors):
+    from streamlit.testing.v1 import AppTest
+
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+        start.wait()
+        began = time.perf_counter()
+        at.run()
+        recorder.add("app/first_paint", time.perf_counter() - began, not at.exception)
+        for iteration in range(iterations):
+            tag = "" if shared_prompts else f"s{index}i{iteration}"
+            for page in pages:
+                title, steps = SCENARIOS[page]
+                began = time.perf_counter()
+                at.sidebar.radio[0].set_value(title).run()
+                recorder.add(f"{page}/render", time.perf_counter() - began, not at.exception)
+                for step, action, produces in steps:
+                    button = action(at, tag)
+                    began = time.perf_counter()
+                    button.click().run()
+                    # Slow generations run as background jobs; poll like the page's run_every fragment does
+                    while any(at.session_state[key] for key in JOB_KEYS if key in at.session_state) and not at.exception:
+                        time.sleep(JOB_POLL_SECONDS)
+                        at.run()
+                    ok = not at.exception and produced(at.session_state[produces])
+                    recorder.add(f"{page}/{step}", time.perf_counter() - began, ok)
+    except Exception as e:  # a broken scenario must not hang the other sessions
+        errors.append(f"session {index}: {type(e).__name__}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=2, help="passes over the pages per session")
+    parser.add_argument("--pages", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.3, help="mean Nova latency in seconds (Titan x5, Gemini x1.5)")
+    parser.add_argument("--jitter", type=float, default=0.25, help="lognormal sigma of provider latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of Nova/Titan calls that fail")
+    parser.add_argument("--stream-failure-rate", type=float, default=0.0, help="share of Nova streams cut mid-answer")
+    parser.add_argument("--no-gemini", action="store_true", help="run without the Gemini fallback")
+    parser.add_argument("--shared-prompts", action="store_true", help="every session sends the same prompts (cache/coalescing)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed regression vs baseline (0.5 = 50%%)")
+    parser.add_argument("--slack-ms", type=float, default=100, help="p95 growth below this is never a regression")
+    args = parser.parse_args(argv)
+    pages = [p.strip() for p in args.pages.split(",") if p.strip()]
+    unknown = [p for p in pages if p not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown pages: {', '.join(unknown)}")
+    if args.sessions > 1 and not apptest_patch_supported():
+        import streamlit
+
+        print(f"Parallel sessions patch private AppTest internals, checked only on Streamlit "
+              f"{', '.join(APPTEST_TESTED_VERSIONS)}.x (installed: {streamlit.__version__}). Check "
+              f"share_apptest_globals against this version and add it to APPTEST_TESTED_VERSIONS, or use --sessions 1.")
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Isolated caches and stores; real keys from .env must never be used
+        for name, sub in [("LLM_CACHE_DIR", "llm"), ("TTS_CACHE_DIR", "tts"), ("ANALYTICS_CACHE_DIR", "analytics"),
+                          ("BLOB_STORE_DIR", "blobs")]:
+            os.environ[name] = os.path.join(tmp, sub)
+        os.environ["CALENDAR_DB"] = os.path.join(tmp, "calendar.sqlite3")
+        os.environ["TTS_BACKEND"] = "tone"
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "GEMINI_API_KEY"):
+            os.environ[name] = ""
+
+        import fake_providers
+        if args.sessions > 1:
+            share_apptest_globals()
+        from studio.metrics import metrics
+
+        calibration_ms = calibrate()
+
+        bedrock, gemini = fake_providers.install(args.latency, args.jitter, args.failure_rate, args.stream_failure_rate,
+                                                 gemini=not args.no_gemini, seed=args.seed)
+        recorder, errors = Recorder(), []
+        start = threading.Barrier(args.sessions + 1)
+        threads = [threading.Thread(target=run_session, name=f"session-{i}",
+                                    args=(i, pages, args.iterations, args.shared_prompts, recorder, start, errors))
+                   for i in range(args.sessions)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - began
+
+    rows = {}
+    for key, samples in sorted(recorder.samples.items()):
+        rows[key] = {"n": len(samples), "failed": recorder.failures.get(key, 0),
+                     **{f"p{int(q * 100)}_ms": round(percentile(samples, q) * 1000, 1) for q in (0.5, 0.95, 0.99)}}
+    interactions = sum(row["n"] for row in rows.values())
+    fallbacks = sum(value for _, _, value in metrics.counters("fallbacks_total"))
+    report = {
+        "config": {k: getattr(args, k) for k in ("sessions", "iterations", "latency", "jitter", "failure_rate",
+                                                 "stream_failure_rate", "no_gemini", "shared_prompts")} | {"pages": pages},
+        "steps": rows,
+        "wall_seconds": round(wall, 2),
+        "throughput_per_s": round(interactions / wall, 2) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "calibration_ms": calibration_ms,
+        "upstream_calls": {**bedrock.calls, "gemini": gemini.calls if gemini else 0},
+        "fallbacks": int(fallbacks),
+        "errors": errors,
+    }
+
+    print(f"{args.sessions} sessions x {args.iterations} pass(es) over {len(pages)} pages, "
+          f"Nova {args.latency * 1000:.0f} ms ±{args.jitter}, failure rate {args.failure_rate:.0%}")
+    print(f"{'page/step':24} {'n':>4} {'fail':>4} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for key, row in rows.items():
+        print(f"{key:24} {row['n']:4d} {row['failed']:4d} {row['p50_ms']:7.0f}ms {row['p95_ms']:7.0f}ms {row['p99_ms']:7.0f}ms")
+    print(f"\n{interactions} interactions in {wall:.1f} s -> {report['throughput_per_s']:.2f}/s, "
+          f"peak RSS {report['peak_rss_mb']:.0f} MB, calibration loop {calibration_ms:.0f} ms")
+    print("upstream calls: " + ", ".join(f"{k} {v}" for k, v in report["upstream_calls"].items())
+          + f"; fallbacks {report['fallbacks']}")
+    for error in errors:
+        print(f"⚠️ {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = list(errors)
+    if os.path.exists(BASELINE_PATH) and not args.update:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("\nNote: baseline was recorded with different settings; comparison is approximate.")
+        limit = 1 + args.tolerance
+        # Only ever loosen: provider latency is simulated and does not get faster on a faster machine
+        slowdown = max(1.0, calibration_ms / baseline["calibration_ms"]) if baseline.get("calibration_ms") else 1.0
+        if slowdown > 1.05:
+            print(f"\nNote: this machine is {slowdown:.2f}x slower than when the baseline was recorded; "
+                  "p95 and throughput limits are scaled to match.")
+        for key, row in rows.items():
+            old = baseline.get("steps", {}).get(key)
+            if not old:
+                continue
+            if row["p95_ms"] > old["p95_ms"] * limit * slowdown and row["p95_ms"] - old["p95_ms"] > args.slack_ms:
+                failures.append(f"{key}: p95 {row['p95_ms']:.0f} ms > baseline {old['p95_ms']:.0f} ms (+{args.tolerance:.0%})")
+            if row["failed"] / row["n"] > old["failed"] / old["n"] + 0.05:
+                failures.append(f"{key}: {row['failed']}/{row['n']} failed (baseline {old['failed']}/{old['n']})")
+        if report["throughput_per_s"] < baseline["throughput_per_s"] / (limit * slowdown):
+            failures.append(f"throughput {report['throughput_per_s']:.2f}/s < baseline {baseline['throughput_per_s']:.2f}/s")
+        if report["peak_rss_mb"] > baseline["peak_rss_mb"] * limit:
+            failures.append(f"peak RSS {report['peak_rss_mb']:.0f} MB > baseline {baseline['peak_rss_mb']:.0f} MB")
+
+    if args.update:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({k: v for k, v in report.items() if k != "errors"}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+
+    if args.check and failures:
+        print("\n❌ Load test regressed:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
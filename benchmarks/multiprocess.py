@@ -0,0 +1,153 @@
+"""Horizontal scaling: 1, 2, 4 ... worker processes on one shared backend.
+
+Each worker is a separate Python process, as a Streamlit server behind a
+load balancer would be. It installs the fake providers from
+``fake_providers.py`` and serves its share of a request stream. Each request
+is a ``get_llm_result`` call plus ``--render-ms`` of pure-Python CPU, which
+stands in for the script rerun. That CPU holds the GIL, so one process
+cannot go faster by adding threads. The stream repeats ``--unique`` prompts,
+and copies of one prompt land on different workers at the same time.
+
+For every worker count the report gives requests per second, the speed-up
+over one worker, and upstream calls against unique prompts. With a shared
+backend the calls should equal the unique prompts however many workers run;
+with ``--backend local`` every worker pays for its own copy.
+``--check`` exits 1 on duplicate upstream calls, or when the scaling
+efficiency at the largest worker count (relative to the CPUs available)
+falls below ``--min-efficiency``.
+
+    python benchmarks/multiprocess.py                               # kv stand-in, 1/2/4 workers
+    python benchmarks/multiprocess.py --backend sqlite --workers 1,2,4,8
+    python benchmarks/multiprocess.py --backend local               # no sharing, for comparison
+    python benchmarks/multiprocess.py --check
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def burn(ms):
+    """Pure-Python busy loop that holds the GIL for ``ms`` milliseconds."""
+    deadline = time.perf_counter() + ms / 1000
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def worker(index, count, env, args, start, results):
+    os.environ.update(env)
+    os.environ["LLM_CACHE_DIR"] = os.path.join(env["MP_TMP"], f"llm-{index}")
+    import fake_providers
+    from studio.engine import get_llm_result
+
+    bedrock, _ = fake_providers.install(args.latency, args.jitter, seed=args.seed + index)
+    mine = [i for i in range(args.requests) if i % count == index]
+
+    def serve(i):
+        # Neighbouring requests share a prompt and go to different workers, at about the same time
+        result = get_llm_result(f"Viral hook for creator topic #{i * args.unique // args.requests}", feature="saarthi")
+        burn(args.render_ms)
+        return result.error is None
+
+    start.wait()
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        ok = sum(pool.map(serve, mine))
+    results.put({"worker": index, "seconds": time.perf_counter() - began, "ok": ok, "served": len(mine),
+                 "upstream": bedrock.calls["converse"]})
+
+
+def run_round(count, backend_url, tmp, args):
+    context = multiprocessing.get_context("spawn")
+    env = {"SHARED_BACKEND": backend_url, "MP_TMP": tmp, "NOVA_RPM": "100000", "NOVA_TPM": "100000000",
+           "AWS_ACCESS_KEY_ID": "", "AWS_SECRET_ACCESS_KEY": "", "GEMINI_API_KEY": ""}
+    start, results = context.Barrier(count + 1), context.Queue()
+    processes = [context.Process(target=worker, args=(i, count, env, args, start, results)) for i in range(count)]
+    for process in processes:
+        process.start()
+    start.wait()
+    began = time.perf_counter()
+    rows = [results.get() for _ in processes]
+    wall = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    return {"workers": count, "wall_seconds": wall, "ok": sum(r["ok"] for r in rows),
+            "upstream": sum(r["upstream"] for r in rows), "per_s": args.requests / wall}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--backend", choices=["kv", "sqlite", "local"], default="kv")
+    parser.add_argument("--requests", type=int, default=160, help="requests per round, across all workers")
+    parser.add_argument("--unique", type=int, default=40, help="distinct prompts among them")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent sessions per worker")
+    parser.add_argument("--render-ms", type=float, default=20, help="CPU per request, holding the GIL")
+    parser.add_argument("--latency", type=float, default=0.3, help="mean Nova latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--min-efficiency", type=float, default=0.6,
+                        help="required speed-up / min(workers, CPUs) at the largest worker count")
+    args = parser.parse_args(argv)
+    counts = [int(n) for n in args.workers.split(",")]
+
+    from studio.shared import start_kv_server
+
+    cpus = os.cpu_count() or 1
+    rounds = []
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp:  # every round starts cold
+            server = None
+            if args.backend == "kv":
+                server = start_kv_server()
+                url = f"kv://127.0.0.1:{server.server_address[1]}"
+            elif args.backend == "sqlite":
+                url = f"sqlite:///{os.path.join(tmp, 'shared.sqlite3')}"
+            else:
+                url = "local"
+            try:
+                rounds.append(run_round(count, url, tmp, args))
+            finally:
+                if server is not None:
+                    server.shutdown()
+                    server.server_close()
+
+    single = rounds[0]["per_s"] / counts[0]
+    print(f"{args.requests} requests ({args.unique} unique prompts), {args.threads} threads/worker, "
+          f"{args.render_ms:.0f} ms CPU each, Nova {args.latency * 1000:.0f} ms, backend {args.backend}, {cpus} CPU(s)")
+    print(f"{'workers':>7} {'req/s':>8} {'speed-up':>9} {'upstream':>9} {'failed':>7}")
+    for row in rounds:
+        row["speedup"] = row["per_s"] / single
+        print(f"{row['workers']:7d} {row['per_s']:8.1f} {row['speedup']:8.2f}x {row['upstream']:9d} "
+              f"{args.requests - row['ok']:7d}")
+
+    failures = []
+    for row in rounds:
+        if args.requests - row["ok"]:
+            failures.append(f"{row['workers']} workers: {args.requests - row['ok']} requests failed")
+        if args.backend != "local" and row["upstream"] > args.unique:
+            failures.append(f"{row['workers']} workers: {row['upstream']} upstream calls for {args.unique} unique prompts")
+    last = rounds[-1]
+    efficiency = last["speedup"] / min(last["workers"], cpus)
+    if efficiency < args.min_efficiency:
+        failures.append(f"{last['workers']} workers: {last['speedup']:.2f}x speed-up is {efficiency:.0%} of "
+                        f"{min(last['workers'], cpus)} CPU(s) (< {args.min_efficiency:.0%})")
+
+    if args.check and failures:
+        print("\n❌ Scaling check failed:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Saarthi voice-query latency on WAV fixtures.
+
+For every fixture this reports:
+
+* the number of VAD chunks;
+* the real-time factor (processing time / audio length) with the clip pushed
+  through as fast as possible;
+* end-of-speech -> final transcript, with the clip paced at 1x as if it were
+  being spoken into the mic;
+* optionally (``--llm``), end-of-speech -> first answer token. This streams
+  the Saarthi prompt through the configured providers.
+
+Fixtures are WAV files passed on the command line. Without any, synthetic
+speech-like clips (voiced bursts separated by pauses) are generated. The
+default ``simulated`` recognizer costs ``--sim-rtf`` seconds per second of
+audio. It measures the pipeline overhead without a model download. Pass
+``--backend faster-whisper`` (etc.) to measure a real recognizer.
+
+    python benchmarks/voice_latency.py
+    python benchmarks/voice_latency.py clip1.wav clip2.wav --backend faster-whisper --lang hi
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from studio import voice  # noqa: E402
+
+
+class SimulatedRecognizer:
+    """Stand-in recognizer: sleeps ``rtf`` x chunk length and returns a word count."""
+    name = "simulated"
+    offline = True
+
+    def __init__(self, rtf):
+        self.rtf = rtf
+
+    def transcribe(self, pcm16, rate, lang):
+        seconds = len(pcm16) / 2 / rate
+        time.sleep(seconds * self.rtf)
+        return f"<{seconds:.1f}s>"
+
+
+def synthetic_clip(phrases, seed=0):
+    """Voiced bursts (harmonic tone with syllable-rate amplitude modulation) between pauses, plus noise."""
+    rng = np.random.default_rng(seed)
+    rate = voice.SAMPLE_RATE
+    parts = [np.zeros(int(0.3 * rate))]
+    for seconds, pause in phrases:
+        t = np.arange(int(seconds * rate)) / rate
+        pitch = rng.uniform(110, 220)
+        tone = sum(np.sin(2 * np.pi * pitch * h * t) / h for h in (1, 2, 3))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+        parts += [0.25 * tone * envelope, np.zeros(int(pause * rate))]
+    clip = np.concatenate(parts).astype(np.float32)
+    return clip + rng.normal(0, 0.003, len(clip)).astype(np.float32)
+
+
+FIXTURES = {
+    "short_query": [(1.6, 0.5), (1.2, 0.4)],
+    "medium_query": [(2.0, 0.5), (1.5, 0.6), (2.5, 0.4)],
+    "long_monologue": [(3.0, 0.5), (2.0, 0.45), (4.0, 0.6), (1.5, 0.5), (3.5, 0.4), (11.0, 0.4)],
+}
+
+
+def load_fixtures(paths):
+    if not paths:
+        return {name: synthetic_clip(phrases, seed=i) for i, (name, phrases) in enumerate(FIXTURES.items())}
+    fixtures = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            fixtures[os.path.basename(path)] = voice.read_wav(f.read())[0]
+    return fixtures
+
+
+def first_token_latency(query, lang):
+    from studio.engine import stream_llm_response
+    start = time.perf_counter()
+    stream = stream_llm_response(f"You are Saarthi, an expert AI creator assistant. Answer this query briefly in {lang}. Query: {query}",
+                                 max_tokens=300, feature="saarthi", use_cache=False)
+    for _ in stream:
+        return time.perf_counter() - start
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Saarthi voice-query latency benchmark")
+    parser.add_argument("wavs", nargs="*")
+    parser.add_argument("--backend", default="simulated", help="simulated or a studio.voice backend name")
+    parser.add_argument("--sim-rtf", type=float, default=0.15)
+    parser.add_argument("--lang", default="hi")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--llm", action="store_true", help="also time end-of-speech -> first answer token")
+    args = parser.parse_args(argv)
+
+    if args.backend == "simulated":
+        recognizer = SimulatedRecognizer(args.sim_rtf)
+    else:
+        cls = voice.BACKENDS.get(args.backend)
+        if cls is None or not cls.available():
+            parser.error(f"recognizer backend '{args.backend}' is not installed")
+        recognizer = cls()
+
+    print(f"recognizer: {recognizer.name}  workers: {voice.ASR_WORKERS}  min silence: {voice.MIN_SILENCE_MS} ms")
+    print(f"{'fixture':16} {'audio':>7} {'chunks':>6} {'RTF':>6} {'eos->final':>11} {'eos->answer':>12}")
+    for name, samples in load_fixtures(args.wavs).items():
+        rtfs, finals, answers = [], [], []
+        for _ in range(args.runs):
+            batch = voice.stream_transcript(samples, recognizer, args.lang)
+            rtfs.append(batch.processing_seconds / batch.audio_seconds)
+            live = voice.stream_transcript(samples, recognizer, args.lang, realtime=True)
+            finals.append(live.speech_end_to_final)
+            if args.llm:
+                ttft = first_token_latency(live.text, args.lang)
+                answers.append(None if ttft is None else live.speech_end_to_final + ttft)
+        answer = f"{statistics.median(answers) * 1000:9.0f} ms" if answers and None not in answers else f"{'-':>12}"
+        print(f"{name:16} {batch.audio_seconds:6.1f}s {len(batch.chunks):6d} {statistics.median(rtfs):6.3f} "
+              f"{statistics.median(finals) * 1000:8.0f} ms {answer}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
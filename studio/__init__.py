@@ -0,0 +1 @@
+"""Backend services for DigitalBharat Studio (AI router, providers, caches)."""
@@ -0,0 +1,282 @@
+"""Analytics ingestion for the Bharat Analytics Hub.
+
+Creator exports (YouTube Studio / Instagram CSVs, or Parquet) can run to
+millions of rows per channel, so they are never held in full. Exports are read
+in chunks (or Parquet record batches), and only the columns we know are read.
+Each chunk is cast to compact dtypes and folded straight into a rollup by day,
+platform and region. The rollup is a few thousand rows however big the export
+was. It is cached as Parquet, keyed by the export's fingerprint, so a
+re-upload or a rerun never re-parses the raw file. Everything the dashboard
+draws is computed from rollups and downsampled before it reaches plotly.
+
+Environment knobs: ``ANALYTICS_CACHE_DIR`` (default ``.cache/analytics``),
+``ANALYTICS_EXPORT_DIR`` (server-side folder of exports to load) and
+``ANALYTICS_CHUNK_ROWS`` (default 500k).
+"""
+import hashlib
+import importlib.util
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+CHUNK_ROWS = int(os.getenv("ANALYTICS_CHUNK_ROWS", "500000"))
+CACHE_DIR = os.getenv("ANALYTICS_CACHE_DIR", os.path.join(".cache", "analytics"))
+EXPORT_DIR = os.getenv("ANALYTICS_EXPORT_DIR", "")
+
+KEYS = ["day", "platform", "region"]
+METRICS = ["views", "impressions", "clicks", "watch_minutes", "likes", "comments", "shares", "rows"]
+METRIC_DTYPES = {"views": "int64", "impressions": "int64", "clicks": "float64", "watch_minutes": "float64",
+                 "likes": "int64", "comments": "int64", "shares": "int64", "rows": "int64"}
+
+# Lower-cased export header -> (canonical column, multiplier); first match wins
+ALIASES = {
+    "date": ("day", None), "day": ("day", None), "date (utc)": ("day", None),
+    "platform": ("platform", None), "source": ("platform", None),
+    "region": ("region", None), "state": ("region", None), "geography": ("region", None),
+    "viewer state": ("region", None), "location": ("region", None), "city": ("region", None),
+    "views": ("views", 1), "video views": ("views", 1), "plays": ("views", 1), "reach": ("views", 1),
+    "impressions": ("impressions", 1),
+    "clicks": ("clicks", 1),
+    "impressions click-through rate (%)": ("ctr_pct", 1), "ctr (%)": ("ctr_pct", 1), "ctr": ("ctr_pct", 1),
+    "watch time (minutes)": ("watch_minutes", 1), "watch_minutes": ("watch_minutes", 1),
+    "watch time (hours)": ("watch_minutes", 60),
+    "likes": ("likes", 1), "comments": ("comments", 1), "shares": ("shares", 1),
+}
+PLATFORM_HINTS = {"youtube": "YouTube", "yt": "YouTube", "insta": "Instagram", "ig": "Instagram",
+                  "whatsapp": "WhatsApp", "twitter": "Twitter"}
+
+
+def _column_map(header):
+    """{raw header: (canonical, multiplier)} for the columns we understand."""
+    mapping, seen = {}, set()
+    for raw in header:
+        alias = ALIASES.get(str(raw).strip().lower())
+        if alias and alias[0] not in seen:
+            mapping[raw] = alias
+            seen.add(alias[0])
+    if "day" not in seen:
+        raise ValueError("export has no Date/Day column")
+    return mapping
+
+
+def _platform_hint(name):
+    stem = os.path.basename(name or "").lower()
+    for hint, platform in PLATFORM_HINTS.items():
+        if hint in stem:
+            return platform
+    return "Unknown"
+
+
+def _normalize(chunk, mapping, platform):
+    """Raw chunk -> typed canonical frame (day, platform, region + METRICS)."""
+    out = pd.DataFrame(index=chunk.index)
+    for raw, (name, multiplier) in mapping.items():
+        col = chunk[raw]
+        if name == "day":
+            out["day"] = pd.to_datetime(col, errors="coerce").dt.floor("D")
+        elif name in ("platform", "region"):
+            out[name] = col.astype("string").fillna("Unknown")
+        else:
+            values = pd.to_numeric(col, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            out[name] = np.nan_to_num(values) * multiplier
+    if "platform" not in out:
+        out["platform"] = platform
+    if "region" not in out:
+        out["region"] = "Unknown"
+    if "clicks" not in out:
+        out["clicks"] = out["impressions"] * out.pop("ctr_pct") / 100 if {"impressions", "ctr_pct"} <= set(out) else 0.0
+    out = out.drop(columns=["ctr_pct"], errors="ignore")
+    for name in METRICS:
+        if name not in out:
+            out[name] = 0
+    out["rows"] = 1
+    return out.dropna(subset=["day"])
+
+
+def _fold(chunk):
+    """Partial rollup of one normalized chunk."""
+    return chunk.groupby(KEYS, observed=True, sort=False)[METRICS].sum()
+
+
+def _finish(partials):
+    if not partials:
+        return empty_rollup()
+    rollup = pd.concat(partials).groupby(level=KEYS, observed=True).sum().reset_index()
+    return _typed(rollup)
+
+
+def _typed(rollup):
+    rollup["day"] = pd.to_datetime(rollup["day"])
+    rollup["platform"] = rollup["platform"].astype("category")
+    rollup["region"] = rollup["region"].astype("category")
+    return rollup.astype(METRIC_DTYPES)
+
+
+def empty_rollup():
+    return _typed(pd.DataFrame({**{k: [] for k in KEYS}, **{m: [] for m in METRICS}}))
+
+
+def _read_chunks(source, name):
+    """Yield raw DataFrame chunks (only known columns) plus the column map."""
+    if name.lower().endswith(".parquet"):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet exports need pyarrow (pip install pyarrow)")
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        mapping = _column_map(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=CHUNK_ROWS, columns=list(mapping)):
+            yield batch.to_pandas(), mapping
+        return
+    header = pd.read_csv(source, nrows=0).columns
+    mapping = _column_map(header)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    dtypes = {raw: "string" for raw, (canon, _) in mapping.items() if canon in ("platform", "region", "day")}
+    for chunk in pd.read_csv(source, usecols=list(mapping), dtype=dtypes, chunksize=CHUNK_ROWS, thousands=","):
+        yield chunk, mapping
+
+
+def build_rollup(source, name, platform=None):
+    """Stream an export (path or file-like) into a day/platform/region rollup."""
+    platform = platform or _platform_hint(name)
+    partials = [_fold(_normalize(chunk, mapping, platform)) for chunk, mapping in _read_chunks(source, name)]
+    return _finish(partials)
+
+
+def rollup_frame(frame, platform="Unknown"):
+    """Rollup of an in-memory export-shaped DataFrame."""
+    return _finish([_fold(_normalize(frame, _column_map(frame.columns), platform))])
+
+
+def fingerprint(source, name):
+    """Cache key: path + size + mtime for files on disk, content hash for uploads."""
+    digest = hashlib.sha256(name.encode())
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()[:32]
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.parquet" if PARQUET_AVAILABLE else f"{key}.pkl")
+
+
+def load_export(source, name=None, platform=None):
+    """Rollup for one export, built once and then served from the Parquet cache."""
+    name = name or (str(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "upload.csv"))
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    path = _cache_path(fingerprint(source, name))
+    if os.path.exists(path):
+        return _typed(pd.read_parquet(path) if PARQUET_AVAILABLE else pd.read_pickle(path))
+    rollup = build_rollup(source, name, platform)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    if PARQUET_AVAILABLE:
+        rollup.to_parquet(tmp, index=False)
+    else:
+        rollup.to_pickle(tmp)
+    os.replace(tmp, path)
+    return rollup
+
+
+def export_dir_files(folder=None):
+    folder = folder or EXPORT_DIR
+    if not folder or not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith((".csv", ".parquet")))
+
+
+def combine(rollups):
+    """Merge rollups from several exports (same day/platform/region rows are summed)."""
+    rollups = [r for r in rollups if len(r)]
+    if not rollups:
+        return empty_rollup()
+    merged = pd.concat([r.astype({"platform": "string", "region": "string"}) for r in rollups], ignore_index=True)
+    return _typed(merged.groupby(KEYS, sort=True)[METRICS].sum().reset_index())
+
+
+# --- Dashboard aggregates (all from the rollup, never the raw export) ---
+def kpis(rollup, period_days=28):
+    """Headline numbers with a delta against the previous period of the same length."""
+    if rollup.empty:
+        return None
+    end = rollup["day"].max()
+    current = rollup[rollup["day"] > end - pd.Timedelta(days=period_days)]
+    previous = rollup[(rollup["day"] <= end - pd.Timedelta(days=period_days)) &
+                      (rollup["day"] > end - pd.Timedelta(days=2 * period_days))]
+
+    def ctr(frame):
+        impressions = frame["impressions"].sum()
+        return frame["clicks"].sum() / impressions * 100 if impressions else 0.0
+
+    def change(now, before):
+        return (now - before) / before * 100 if before else None
+
+    by_platform = rollup.groupby("platform", observed=True)["views"].sum().sort_values(ascending=False)
+    by_region = rollup.groupby("region", observed=True)["views"].sum().sort_values(ascending=False)
+    total = int(rollup["views"].sum())
+    return {
+        "reach": total,
+        "reach_change": change(current["views"].sum(), previous["views"].sum()),
+        "ctr": ctr(rollup),
+        "ctr_change": ctr(current) - ctr(previous) if len(previous) else None,
+        "top_platform": str(by_platform.index[0]),
+        "top_platform_share": by_platform.iloc[0] / total * 100 if total else 0.0,
+        "top_region": str(by_region.index[0]),
+        "rows": int(rollup["rows"].sum()),
+        "days": int(rollup["day"].nunique()),
+    }
+
+
+def timeseries(rollup, max_points=180, metric="views"):
+    """Views per platform over time, resampled to coarser buckets until under ``max_points`` per line."""
+    daily = rollup.groupby(["day", "platform"], observed=True)[metric].sum().unstack("platform", fill_value=0)
+    if daily.empty:
+        return daily
+    daily = daily.asfreq("D", fill_value=0)
+    for rule in ("D", "W", "MS", "QS", "YS"):
+        series = daily if rule == "D" else daily.resample(rule).sum()
+        if len(series) <= max_points:
+            return series
+    step = -(-len(series) // max_points)
+    return series.groupby(np.arange(len(series)) // step).sum().set_index(series.index[::step])
+
+
+def top_n(rollup, column, n=8, metric="views"):
+    """Share by platform/region, with everything past the top ``n`` folded into "Other"."""
+    totals = rollup.groupby(column, observed=True)[metric].sum().sort_values(ascending=False)
+    head = totals.iloc[:n]
+    if len(totals) > n:
+        head = pd.concat([head, pd.Series({"Other": totals.iloc[n:].sum()})])
+    return head.rename_axis(column.title()).reset_index(name=metric.title())
+
+
+def synthetic_export(rows, days=730, seed=0):
+    """A YouTube-Studio-shaped export for demos and benchmarks."""
+    rng = np.random.default_rng(seed)
+    regions = np.array(["Maharashtra", "Uttar Pradesh", "Bihar", "Karnataka", "Tamil Nadu", "Gujarat",
+                        "West Bengal", "Rajasthan", "Madhya Pradesh", "Telangana", "Kerala", "Punjab"])
+    platforms = np.array(["YouTube", "Instagram", "WhatsApp"])
+    start = np.datetime64("2024-01-01")
+    impressions = rng.lognormal(6, 1.2, rows).astype("int64")
+    ctr = rng.beta(2, 20, rows) * 100
+    return pd.DataFrame({
+        "Date": (start + rng.integers(0, days, rows).astype("timedelta64[D]")).astype(str),
+        "Platform": platforms[rng.choice(3, rows, p=[0.6, 0.25, 0.15])],
+        "Geography": regions[rng.integers(0, len(regions), rows)],
+        "Impressions": impressions,
+        "Impressions click-through rate (%)": ctr.round(2),
+        "Views": (impressions * ctr / 100 * rng.uniform(1, 3, rows)).astype("int64"),
+        "Watch time (hours)": rng.gamma(2, 0.5, rows).round(3),
+        "Likes": rng.poisson(5, rows),
+        "Comments": rng.poisson(1, rows),
+    })
@@ -0,0 +1,177 @@
+"""Content-addressed on-disk store for generated images, with cached size variants.
+
+Full-size Titan PNGs used to live in every session's ``st.session_state`` and
+were shipped to the browser at 1024x1024. Images now go to disk once, keyed by
+their sha256, and sessions keep only the key. Each image is transcoded at most
+once per variant (small WebP preview, YouTube and Shorts/Reels crops), and the
+store evicts least-recently-used files once it grows past its size cap
+(variants before originals). Callers holding a key must expect ``KeyError``
+once its original is gone.
+
+With a shared ``SHARED_BACKEND`` (see ``studio.shared``), originals are
+also written to the shared store. A worker process that has never seen a
+key fetches it from there once and keeps a local copy, so a thumbnail made
+on one worker can be served by any other. Variants are always derived
+locally.
+
+Environment knobs: ``BLOB_STORE_DIR`` (default ``.cache/blobs``),
+``BLOB_STORE_MAX_MB`` (default 512) and ``BLOB_SHARED_TTL`` (seconds an
+original stays in the shared store, default 7 days).
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+
+from studio.shared import get_shared_backend
+
+SHARED_TTL = float(os.getenv("BLOB_SHARED_TTL", str(7 * 24 * 60 * 60)))
+
+# name -> (target size, PIL format, file extension, mime type); a None height keeps aspect ratio
+VARIANTS = {
+    "preview": ((512, None), "WEBP", "webp", "image/webp"),
+    "youtube": ((1280, 720), "JPEG", "jpg", "image/jpeg"),
+    "shorts": ((1080, 1920), "JPEG", "jpg", "image/jpeg"),
+}
+ORIGINAL_MIME = "image/png"
+
+
+class BlobStore:
+    """sha256-keyed image files under ``root`` with an LRU byte cap."""
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, backend=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(root) if entry.is_file())
+
+    def _path(self, key, variant=None):
+        if variant is None:
+            return os.path.join(self.root, f"{key}.png")
+        return os.path.join(self.root, f"{key}.{variant}.{VARIANTS[variant][2]}")
+
+    def put(self, data):
+        """Store PNG bytes (no-op if already present) and return their key."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self._write(path, data)
+                fresh = True
+            else:
+                os.utime(path)
+                fresh = False
+        if fresh and self.backend is not None:
+            self.backend.set(f"blob:{key}", base64.b64encode(data).decode("ascii"), ttl=SHARED_TTL)
+        return key
+
+    def exists(self, key):
+        return os.path.exists(self._path(key)) or self._fetch_shared(key) is not None
+
+    def get(self, key, variant=None):
+        """Bytes of the original (``variant=None``) or of a named variant, transcoding on first use."""
+        path = self._path(key, variant)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            if variant is None:
+                data = self._fetch_shared(key)
+                if data is None:
+                    raise KeyError(key)
+                return data
+        data = self._transcode(self.get(key), variant)
+        with self._lock:
+            if not os.path.exists(path):
+                self._write(path, data)
+        return data
+
+    def mime(self, variant=None):
+        return ORIGINAL_MIME if variant is None else VARIANTS[variant][3]
+
+    def filename(self, key, variant=None, prefix="thumb"):
+        ext = "png" if variant is None else VARIANTS[variant][2]
+        return f"{prefix}_{variant or 'original'}_{key[:10]}.{ext}"
+
+    def usage(self):
+        with self._lock:
+            return {"bytes": self._total_bytes, "max_bytes": self.max_bytes,
+                    "files": sum(1 for entry in os.scandir(self.root) if entry.is_file())}
+
+    def _fetch_shared(self, key):
+        """Copy an original another worker stored into this one's disk; None if no one has it."""
+        if self.backend is None:
+            return None
+        encoded = self.backend.get(f"blob:{key}")
+        if encoded is None:
+            return None
+        data = base64.b64decode(encoded)
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self._write(path, data)
+        return data
+
+    def _transcode(self, data, variant):
+        from PIL import Image, ImageOps
+        (width, height), fmt, _, _ = VARIANTS[variant]
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        if height is None:
+            image.thumbnail((width, width * image.height // image.width), Image.LANCZOS)
+        else:
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, fmt, quality=80 if variant == "preview" else 90)
+        return out.getvalue()
+
+    def _write(self, path, data):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._total_bytes += len(data)
+        if self._total_bytes > self.max_bytes:
+            self._evict(keep=path)
+
+    def _evict(self, keep):
+        """Delete files (never ``keep``) until back under 90% of the cap.
+
+        Variants go first, least recently used first, since they can be
+        rebuilt from their original. Originals go only after that.
+        """
+        entries = sorted((e for e in os.scandir(self.root) if e.is_file() and e.path != keep),
+                         key=lambda e: (e.name.count(".") == 1, e.stat().st_mtime))
+        target = int(self.max_bytes * 0.9)
+        for entry in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._total_bytes -= size
+            except FileNotFoundError:
+                continue
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Process-wide image store shared by every session."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = get_shared_backend()
+                _store = BlobStore(
+                    os.getenv("BLOB_STORE_DIR", os.path.join(".cache", "blobs")),
+                    max_bytes=int(float(os.getenv("BLOB_STORE_MAX_MB", "512")) * 1024 * 1024),
+                    backend=backend if backend.shared else None,
+                )
+    return _store
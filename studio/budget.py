@@ -0,0 +1,185 @@
+"""Token budgets: output caps per feature and trimming of chained context.
+
+``max_tokens`` used to be advisory only. It was part of the cache key, but
+it never reached Bedrock or Gemini, so a 100-token hook request still got a
+full-length (slow) completion. Every call now carries a real output cap: the
+caller's ``max_tokens``, or else the feature's budget below.
+
+Chained prompts (Content Pipeline: base -> localized -> WhatsApp; the
+comment sample behind the Analytics summary) paste upstream model output
+into the next prompt. When that context is over its feature's budget it is
+cut down before it is sent. Extractive mode (the default) keeps the opening
+and closing lines (hook and CTA) and then the most content-heavy lines in
+between, in their original order, at no extra cost. ``summarize`` asks the
+model for a summary that fits the budget instead. That costs one short call
+but keeps more of the meaning.
+
+Environment knobs: ``TOKEN_BUDGET_<FEATURE>`` (output cap, e.g.
+``TOKEN_BUDGET_CONTENT_PIPELINE=400``), ``CONTEXT_BUDGET_<FEATURE>`` (cap on
+pasted upstream context), ``CONTEXT_TRIM_MODE`` (``extract`` or
+``summarize``) and ``TOKEN_BUDGETS_DISABLED=1`` (no context trimming; output
+caps still apply).
+"""
+import os
+import re
+from collections import Counter
+
+from studio.metrics import metrics
+from studio.ratelimit import estimate_tokens
+
+DEFAULT_OUTPUT_BUDGET = 800
+
+# feature -> max output tokens when the caller does not pass max_tokens
+OUTPUT_BUDGETS = {
+    "content_pipeline": 400,
+    "script_genius": 500,
+    "saarthi": 300,
+    "analytics": 250,
+    "brand_kit": 250,
+    "trend_radar": 200,
+    "context_summary": 200,
+}
+# feature -> max tokens of upstream model output pasted into a chained prompt
+CONTEXT_BUDGETS = {
+    "content_pipeline": 350,
+    "analytics": 900,
+}
+TRIM_MODE = os.getenv("CONTEXT_TRIM_MODE", "extract")
+TRIMMING_ENABLED = os.getenv("TOKEN_BUDGETS_DISABLED") != "1"
+
+UNIT = re.compile(r"[^\n.!?।]+[.!?।]*", re.UNICODE)
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _env_budget(prefix, feature, default):
+    raw = os.getenv(f"{prefix}_{(feature or 'other').upper()}")
+    try:
+        return int(raw) if raw else default
+    except ValueError:
+        return default
+
+
+def output_budget(feature, max_tokens=None):
+    """The output cap for one call: explicit ``max_tokens`` wins, then the feature budget."""
+    if max_tokens:
+        return max_tokens
+    return _env_budget("TOKEN_BUDGET", feature, OUTPUT_BUDGETS.get(feature, DEFAULT_OUTPUT_BUDGET))
+
+
+def context_budget(feature):
+    return _env_budget("CONTEXT_BUDGET", feature, CONTEXT_BUDGETS.get(feature))
+
+
+def _units(text):
+    """Sentences grouped by line, so kept sentences re-join on their original lines."""
+    units = []
+    for line in text.splitlines():
+        pieces = [m.group(0).strip() for m in UNIT.finditer(line)]
+        units.append([p for p in pieces if p])
+    return units
+
+
+def extract(text, budget):
+    """Keep first/last sentences plus the densest ones in between until ``budget`` tokens; original order."""
+    lines = _units(text)
+    flat = [(i, j, piece) for i, pieces in enumerate(lines) for j, piece in enumerate(pieces)]
+    if len(flat) < 3:
+        return _cut(text, budget)
+    counts = Counter(w.lower() for _, _, piece in flat for w in WORD.findall(piece))
+
+    def density(piece):
+        words = WORD.findall(piece)
+        return sum(counts[w.lower()] for w in words) / (len(words) + 1) if words else 0
+
+    cost = {k: estimate_tokens(piece) + 1 for k, (_, _, piece) in enumerate(flat)}
+    keep = {0, len(flat) - 1}
+    spent = cost[0] + cost[len(flat) - 1]
+    if spent > budget:
+        return _cut(text, budget)
+    for k in sorted(range(1, len(flat) - 1), key=lambda k: -density(flat[k][2])):
+        if spent + cost[k] <= budget:
+            keep.add(k)
+            spent += cost[k]
+
+    out, previous = [], None
+    for k in sorted(keep):
+        i, _, piece = flat[k]
+        if previous is not None and k != previous + 1:
+            out.append(" …")
+        if out and (previous is None or flat[previous][0] != i):
+            out.append("\n")
+        elif out:
+            out.append(" ")
+        out.append(piece)
+        previous = k
+    return "".join(out).strip()
+
+
+def _cut(text, budget):
+    """Hard cut at roughly ``budget`` tokens, on a word boundary."""
+    ratio = len(text) / max(1, estimate_tokens(text))
+    head = text[:int(budget * ratio)]
+    return (head.rsplit(" ", 1)[0] if " " in head else head) + " …"
+
+
+def summarize(text, budget):
+    from studio.engine import get_llm_result
+
+    result = get_llm_result(f"Summarize the following text in at most {int(budget * 0.75)} words. Keep its language, "
+                            f"script, tone, hook and call to action. Output only the summary.\n\n{text}",
+                            max_tokens=budget, feature="context_summary")
+    return result.text if result.error is None else extract(text, budget)
+
+
+def fit_context(text, feature, budget=None):
+    """``text`` unchanged if it fits the feature's context budget, else trimmed (or summarized) to fit."""
+    budget = budget or context_budget(feature)
+    if not text or not budget or not TRIMMING_ENABLED:
+        return text
+    before = estimate_tokens(text)
+    if before <= budget:
+        return text
+    trimmed = summarize(text, budget) if TRIM_MODE == "summarize" else extract(text, budget)
+    page = feature or "other"
+    metrics.inc("context_trims_total", page=page, mode=TRIM_MODE)
+    metrics.inc("context_tokens_saved_total", max(0, before - estimate_tokens(trimmed)), page=page)
+    return trimmed
+
+
+def savings_report():
+    """Per-page rows for tuning budgets: output caps and how often they bite, context trimmed, estimation error."""
+    pages = {}
+
+    def row(page):
+        return pages.setdefault(page, {"Page": page, "Output Budget": output_budget(page), "Calls": 0, "Output Tokens": 0,
+                                       "Hit Cap": 0, "Input Tokens": 0, "Estimated Input": 0, "Trims": 0,
+                                       "Context Tokens Saved": 0, "Latency (s)": 0.0})
+
+    for _, labels, value in metrics.counters("upstream_calls_total"):
+        if labels.get("provider") in ("nova", "gemini"):
+            row(labels["page"])["Calls"] += int(value)
+    for _, labels, value in metrics.counters("llm_tokens_total"):
+        key = "Output Tokens" if labels["direction"] == "output" else "Input Tokens"
+        row(labels["page"])[key] += int(value)
+    for name, key in (("llm_truncated_total", "Hit Cap"), ("llm_estimated_input_tokens_total", "Estimated Input"),
+                      ("context_trims_total", "Trims"), ("context_tokens_saved_total", "Context Tokens Saved")):
+        for _, labels, value in metrics.counters(name):
+            row(labels["page"])[key] += int(value)
+    for _, labels, summary in metrics.histograms("upstream_call_seconds"):
+        if labels.get("provider") in ("nova", "gemini") and labels["page"] in pages:
+            pages[labels["page"]]["Latency (s)"] += summary["mean"] * summary["count"]
+
+    rows = []
+    for r in pages.values():
+        calls, tokens = r["Calls"], r["Input Tokens"] + r["Output Tokens"]
+        seconds_per_token = r["Latency (s)"] / tokens if tokens else 0.0
+        rows.append({
+            "Page": r["Page"], "Output Budget": r["Output Budget"], "Calls": calls,
+            "Avg Output": round(r["Output Tokens"] / calls) if calls else 0,
+            "Hit Cap": f"{r['Hit Cap'] / calls:.0%}" if calls else "—",
+            "Context Trims": r["Trims"], "Tokens Saved": r["Context Tokens Saved"],
+            # Proportional model: the page's observed seconds per (input + output) token
+            "Est. Time Saved (s)": round(r["Context Tokens Saved"] * seconds_per_token, 2),
+            "Estimate Error": f"{r['Estimated Input'] / r['Input Tokens'] - 1:+.0%}" if r["Input Tokens"] else "—",
+        })
+    return sorted(rows, key=lambda r: r["Page"])
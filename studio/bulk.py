@@ -0,0 +1,190 @@
+"""Headless bulk mode for the 3-stage Content Pipeline.
+
+Runs base script -> regional rewrite -> WhatsApp format for every
+(topic, region) pair in a CSV or JSONL file, without the Streamlit UI::
+
+    python -m studio.bulk topics.csv --out results.jsonl --concurrency 8
+
+Input rows need a ``topic`` column and may set ``language`` and ``region``
+(several regions separated by ``|``). Rows without a region are crossed with
+``--regions`` (default: every pipeline region).
+
+Each finished item is appended to the output JSONL immediately, and that file
+is also the checkpoint: re-running the same command skips items already in it,
+so a crash or provider outage only costs the unfinished items. A line left
+half-written by a crash is cut off before new records are appended. Failed
+items go to ``<out>.failed.jsonl`` and are retried on the next run. That file
+is rewritten on every run, so it lists only the latest failures.
+
+Items run through the memoized pipeline DAG (``studio.pipeline``), so the
+regions of one topic share a single base script call, even while they run
+concurrently.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from studio.pipeline import first_error, run_content_pipeline
+from studio.prompts import PIPELINE_REGIONS
+
+
+def item_id(topic, language, region):
+    """Stable id of one pipeline item, used as the checkpoint key."""
+    return hashlib.sha1(f"{topic}\x00{language}\x00{region}".encode("utf-8")).hexdigest()[:16]
+
+
+def load_items(path, regions=None, language="Hindi"):
+    """Expand a CSV/JSONL of topics into (topic, language, region) work items."""
+    regions = regions or PIPELINE_REGIONS
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    items, seen = [], set()
+    for row in rows:
+        topic = (row.get("topic") or "").strip()
+        if not topic:
+            continue
+        row_lang = (row.get("language") or language).strip()
+        row_regions = row.get("region") or row.get("regions")
+        if isinstance(row_regions, str):
+            row_regions = [r.strip() for r in row_regions.split("|") if r.strip()]
+        for region in row_regions or regions:
+            key = item_id(topic, row_lang, region)
+            if key not in seen:
+                seen.add(key)
+                items.append({"id": key, "topic": topic, "language": row_lang, "region": region})
+    return items
+
+
+def load_checkpoint(out_path):
+    """Ids already present in the output JSONL."""
+    done = set()
+    if os.path.exists(out_path):
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue  # a half-written last line from a crash
+    return done
+
+
+def truncate_partial_line(path):
+    """Cut ``path`` back to its last complete line so appended records start on a fresh line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Walk back in 64 KB steps to the last newline; only the tail record is ever partial
+        end = size
+        while end > 0:
+            step = min(65536, end)
+            f.seek(end - step)
+            chunk = f.read(step)
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                f.truncate(end - step + cut + 1)
+                return
+            end -= step
+        f.truncate(0)
+
+
+class BulkPipelineRunner:
+    """Runs pipeline items on a bounded pool; the stage memo shares one base script per (topic, language)."""
+
+    def __init__(self, concurrency=4, use_cache=True):
+        self.concurrency = concurrency
+        self.use_cache = use_cache
+
+    def run_item(self, item):
+        """All three stages for one item; raises RuntimeError naming the failed stage."""
+        started = time.perf_counter()
+        region = item["region"]
+        result = run_content_pipeline(item["topic"], item["language"], [region], use_cache=self.use_cache)
+        failure = first_error(result)
+        if failure:
+            raise RuntimeError(f"{failure[0].split(':')[0]}: {failure[1]}")
+        return dict(item, base_script=result.base_script, localized_script=result.localized[region],
+                    whatsapp_message=result.whatsapp[region], seconds=round(time.perf_counter() - started, 3))
+
+    def run(self, items, out_path, progress=None):
+        """Process items not yet in ``out_path``; returns a summary dict."""
+        done = load_checkpoint(out_path)
+        pending = [item for item in items if item["id"] not in done]
+        failed_path = out_path + ".failed.jsonl"
+        summary = {"total": len(items), "skipped": len(items) - len(pending), "completed": 0, "failed": 0}
+        truncate_partial_line(out_path)
+        if os.path.exists(failed_path):
+            os.remove(failed_path)  # every failure listed there is pending again
+
+        started = time.perf_counter()
+        with open(out_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk") as pool:
+            futures = {pool.submit(self.run_item, item): item for item in pending}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    with open(failed_path, "a", encoding="utf-8") as failed:
+                        failed.write(json.dumps(dict(futures[future], error=str(e)), ensure_ascii=False) + "\n")
+                else:
+                    summary["completed"] += 1
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                if progress:
+                    progress(summary, time.perf_counter() - started)
+
+        elapsed = time.perf_counter() - started
+        summary["seconds"] = round(elapsed, 2)
+        summary["items_per_min"] = round(summary["completed"] / elapsed * 60, 1) if elapsed else 0.0
+        return summary
+
+
+def run_bulk(input_path, out_path, concurrency=4, regions=None, language="Hindi", use_cache=True, progress=None):
+    """Library entry point: load ``input_path`` and run every pending item into ``out_path``."""
+    items = load_items(input_path, regions=regions, language=language)
+    return BulkPipelineRunner(concurrency=concurrency, use_cache=use_cache).run(items, out_path, progress=progress)
+
+
+def _print_progress(summary, elapsed):
+    finished = summary["completed"] + summary["failed"]
+    rate = summary["completed"] / elapsed * 60 if elapsed else 0.0
+    print(f"\r✅ {summary['completed']}  ❌ {summary['failed']}  ⏭️ {summary['skipped']}  "
+          f"/ {summary['total']}  |  {rate:.1f} items/min", end="", file=sys.stderr, flush=True)
+    if finished + summary["skipped"] == summary["total"]:
+        print(file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the DigitalBharat Content Pipeline headlessly over many topics.")
+    parser.add_argument("input", help="CSV or JSONL file with a 'topic' column")
+    parser.add_argument("--out", default="pipeline_results.jsonl", help="output JSONL (also the checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=4, help="items processed in parallel")
+    parser.add_argument("--regions", help="'|'-separated regions for rows without one")
+    parser.add_argument("--language", default="Hindi", help="base language for rows without one")
+    parser.add_argument("--no-cache", action="store_true", help="skip cached answers (regenerate)")
+    args = parser.parse_args(argv)
+
+    regions = [r.strip() for r in args.regions.split("|")] if args.regions else None
+    summary = run_bulk(args.input, args.out, concurrency=args.concurrency, regions=regions,
+                       language=args.language, use_cache=not args.no_cache, progress=_print_progress)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
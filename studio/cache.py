@@ -0,0 +1,192 @@
+"""Two-tier, content-addressed cache for LLM responses.
+
+Tier 1 is an in-process LRU bounded by a byte budget; tier 2 is a SQLite file
+on disk that survives restarts. Entries are keyed on a hash of
+(prompt, model, max_tokens) and expire per feature, so Trend Radar answers go
+stale in minutes while a Brand Kit stays valid for weeks.
+
+When ``SHARED_BACKEND`` points at a shared store (see ``studio.shared``),
+that store replaces the SQLite file as tier 2. Every worker process then
+reads the answers every other worker paid for.
+
+Environment knobs: ``LLM_CACHE_DIR`` (default ``.cache``),
+``LLM_CACHE_MEMORY_MB`` (default 64) and ``LLM_CACHE_DISABLED=1``.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from studio.shared import get_shared_backend
+
+# Seconds each feature's answers stay fresh
+FEATURE_TTLS = {
+    "trend_radar": 15 * 60,
+    "analytics": 6 * 60 * 60,
+    "planner": 24 * 60 * 60,
+    "saarthi": 24 * 60 * 60,
+    "content_pipeline": 7 * 24 * 60 * 60,
+    "script_genius": 7 * 24 * 60 * 60,
+    "brand_kit": 30 * 24 * 60 * 60,
+}
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def make_key(prompt, model, max_tokens):
+    """Content address of a request: sha256 over (prompt, model, max_tokens)."""
+    raw = f"{model}\x00{max_tokens}\x00{prompt}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class ResponseCache:
+    """Memory LRU (byte budget) in front of a persistent tier with TTLs: SQLite, or a shared backend."""
+
+    def __init__(self, path, memory_budget_bytes=64 * 1024 * 1024, ttls=None, backend=None):
+        self.path = path
+        self.backend = backend
+        self.memory_budget_bytes = memory_budget_bytes
+        self.ttls = dict(FEATURE_TTLS if ttls is None else ttls)
+        self._memory = OrderedDict()  # key -> (text, expires_at, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        if backend is not None:
+            self._db = None
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, feature TEXT, value TEXT, expires_at REAL)"
+        )
+
+    def ttl_for(self, feature):
+        return self.ttls.get(feature, DEFAULT_TTL)
+
+    def get(self, key):
+        """Return the cached text or None; disk hits are promoted to memory."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                self._evict(key)
+            if self.backend is None:
+                row = self._read(key)
+        if self.backend is not None:
+            row = self._read(key)  # network round trip: outside the lock
+
+        with self._lock:
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self.stats["disk_hits"] += 1
+                return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, text, feature=None):
+        """Store text in both tiers with the feature's TTL."""
+        expires_at = time.time() + self.ttl_for(feature)
+        if self.backend is not None:
+            self.backend.set(f"llm:{key}", f"{expires_at!r}\x00{text}", ttl=self.ttl_for(feature))
+        with self._lock:
+            self._remember(key, text, expires_at)
+            self.stats["writes"] += 1
+            if self.backend is not None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, feature, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, feature, text, expires_at),
+            )
+            if self.stats["writes"] % 200 == 0:
+                self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def peek(self, key):
+        """Cached text or None, without touching the hit/miss stats (used while waiting on another worker)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            if self.backend is None:
+                return self._valid(self._read(key))
+        return self._valid(self._read(key))
+
+    @staticmethod
+    def _valid(row):
+        return row[0] if row is not None and row[1] > time.time() else None
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self.backend is not None:
+                self.backend.delete_prefix("llm:")
+            else:
+                self._db.execute("DELETE FROM responses")
+
+    def _read(self, key):
+        """(value, expires_at) from the persistent tier, or None."""
+        if self.backend is None:
+            return self._db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        raw = self.backend.get(f"llm:{key}")
+        if raw is None:
+            return None
+        expires_at, _, text = raw.partition("\x00")
+        return text, float(expires_at)
+
+    def snapshot(self):
+        """Counters plus derived hit rate and memory usage, for the System Controls page."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, text, expires_at):
+        size = len(key) + len(text.encode("utf-8"))
+        if size > self.memory_budget_bytes:
+            return
+        self._evict(key)
+        self._memory[key] = (text, expires_at, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget_bytes:
+            self._evict(next(iter(self._memory)))
+
+    def _evict(self, key):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache shared by every session (None when disabled)."""
+    global _cache
+    if os.getenv("LLM_CACHE_DISABLED") == "1":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache_dir = os.getenv("LLM_CACHE_DIR", ".cache")
+                budget_mb = float(os.getenv("LLM_CACHE_MEMORY_MB", "64"))
+                backend = get_shared_backend()
+                _cache = ResponseCache(
+                    os.path.join(cache_dir, "llm_responses.sqlite3"),
+                    memory_budget_bytes=int(budget_mb * 1024 * 1024),
+                    backend=backend if backend.shared else None,
+                )
+    return _cache
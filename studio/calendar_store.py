@@ -0,0 +1,127 @@
+"""Persistent content calendar for the Smart Content Planner.
+
+Posts live in SQLite instead of a per-session DataFrame that was rebuilt with
+``pd.concat`` on every add (quadratic as the calendar grew) and lost when the
+session ended. Rows are indexed by date, platform and audience, and the
+planner page reads them one page at a time.
+
+Environment knob: ``CALENDAR_DB`` (default ``.cache/calendar.sqlite3``).
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+COLUMNS = ["id", "workspace", "title", "platform", "audience", "scheduled_at", "slot_score", "insight", "created_at"]
+
+
+class CalendarStore:
+    """SQLite-backed calendar shared by every session (one ``workspace`` per team/channel)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    workspace TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    audience TEXT NOT NULL,
+                    scheduled_at TEXT NOT NULL,
+                    slot_score REAL,
+                    insight TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_posts_date ON posts (workspace, scheduled_at);
+                CREATE INDEX IF NOT EXISTS idx_posts_platform ON posts (workspace, platform, scheduled_at);
+                CREATE INDEX IF NOT EXISTS idx_posts_audience ON posts (workspace, audience, scheduled_at);
+            """)
+
+    def add_posts(self, workspace, posts):
+        """Insert scheduled posts (dicts with title/platform/audience/scheduled_at[/slot_score/insight]); returns their ids."""
+        now = datetime.now().isoformat(timespec="seconds")
+        ids = []
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for post in posts:
+                    cursor = self._db.execute(
+                        "INSERT INTO posts (workspace, title, platform, audience, scheduled_at, slot_score, insight, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (workspace, post["title"], post["platform"], post["audience"],
+                         _iso(post["scheduled_at"]), post.get("slot_score"), post.get("insight"), now),
+                    )
+                    ids.append(cursor.lastrowid)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return ids
+
+    def _where(self, workspace, platform=None, audience=None, start=None, end=None):
+        clauses, params = ["workspace = ?"], [workspace]
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if audience:
+            clauses.append("audience = ?")
+            params.append(audience)
+        if start is not None:
+            clauses.append("scheduled_at >= ?")
+            params.append(_iso(start))
+        if end is not None:
+            clauses.append("scheduled_at < ?")
+            params.append(_iso(end))
+        return " AND ".join(clauses), params
+
+    def page(self, workspace, offset=0, limit=25, **filters):
+        """One page of posts ordered by time (uses the date/platform/audience indexes)."""
+        where, params = self._where(workspace, **filters)
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM posts WHERE {where} ORDER BY scheduled_at LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    def count(self, workspace, **filters):
+        where, params = self._where(workspace, **filters)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM posts WHERE {where}", params).fetchone()[0]
+
+    def taken_slots(self, workspace, start, end):
+        """(platform, datetime) of posts already scheduled in [start, end)."""
+        where, params = self._where(workspace, start=start, end=end)
+        with self._lock:
+            rows = self._db.execute(f"SELECT platform, scheduled_at FROM posts WHERE {where}", params).fetchall()
+        return [(platform, datetime.fromisoformat(at)) for platform, at in rows]
+
+    def distinct(self, workspace, column):
+        """Distinct platforms or audiences, for the page's filter dropdowns."""
+        if column not in ("platform", "audience"):
+            raise ValueError(column)
+        with self._lock:
+            rows = self._db.execute(f"SELECT DISTINCT {column} FROM posts WHERE workspace = ? ORDER BY 1", (workspace,))
+            return [row[0] for row in rows.fetchall()]
+
+
+def _iso(value):
+    return value.isoformat(timespec="minutes") if isinstance(value, datetime) else value
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_calendar_store():
+    """Process-wide calendar store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CalendarStore(os.getenv("CALENDAR_DB", os.path.join(".cache", "calendar.sqlite3")))
+    return _store
@@ -0,0 +1,434 @@
+"""Multi-cloud live AI engine: Amazon Nova Micro first, Google Gemini as fallback.
+
+Every call is capped at an output budget. That is the caller's
+``max_tokens`` or, when it is None, the feature's budget from
+``studio.budget``. The cap is sent to Nova as ``inferenceConfig.maxTokens``
+and to Gemini as ``max_output_tokens``.
+"""
+import os
+import time
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from studio import providers, ratelimit, resilience
+from studio.budget import output_budget
+from studio.cache import get_response_cache, make_key
+from studio.metrics import metrics
+from studio.shared import get_coalescer
+
+
+def _gemini_usage(response):
+    """(input, output) token counts from a Gemini response, 0 when absent."""
+    meta = getattr(response, "usage_metadata", None)
+    return (getattr(meta, "prompt_token_count", 0) or 0, getattr(meta, "candidates_token_count", 0) or 0)
+
+
+def _gemini_truncated(response):
+    """True when Gemini stopped because it hit max_output_tokens."""
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    return getattr(reason, "name", reason) in ("MAX_TOKENS", 2)
+
+
+def _nova_config(max_tokens):
+    return {"maxTokens": max(1, min(max_tokens, providers.NOVA_MAX_OUTPUT_TOKENS))}
+
+
+def _gemini_config(max_tokens):
+    return {"max_output_tokens": max(1, max_tokens)}
+
+
+def _record_call(provider, model, feature, started, ok, usage=(0, 0), estimated=0, truncated=False):
+    """Latency, outcome and token metrics for one upstream LLM call.
+
+    ``estimated`` is our pre-call guess at the input tokens. It is recorded
+    next to the provider's count so the estimator's error shows up in
+    System Controls.
+    """
+    page = feature or "other"
+    metrics.observe("upstream_call_seconds", time.perf_counter() - started, provider=provider, model=model, page=page)
+    metrics.inc("upstream_calls_total", provider=provider, model=model, page=page, outcome="ok" if ok else "error")
+    if truncated:
+        metrics.inc("llm_truncated_total", provider=provider, model=model, page=page)
+    if usage[0]:
+        metrics.inc("llm_tokens_total", usage[0], provider=provider, model=model, page=page, direction="input")
+        if estimated:
+            metrics.inc("llm_estimated_input_tokens_total", estimated, provider=provider, page=page)
+    if usage[1]:
+        metrics.inc("llm_tokens_total", usage[1], provider=provider, model=model, page=page, direction="output")
+
+
+def _call_nova(prompt, max_tokens, feature=None, on_granted=None):
+    """One Nova Micro call, rate limited and reported to its breaker, latency tracker and metrics.
+
+    ``on_granted()`` is called once the rate limiter lets the request through.
+    """
+    prompt_tokens = ratelimit.estimate_tokens(prompt)
+    with ratelimit.rate_limited(providers.NOVA_MODEL_ID, prompt_tokens + max_tokens) as slot:
+        if on_granted:
+            on_granted()
+        started = time.perf_counter()
+        try:
+            response = providers.get_bedrock_client().converse(
+                modelId=providers.NOVA_MODEL_ID,
+                messages=[{"role": "user", "content": [{"text": prompt}]}],
+                inferenceConfig=_nova_config(max_tokens),
+            )
+            text = response['output']['message']['content'][0]['text']
+        except Exception as e:
+            resilience.get_breaker("nova").record_failure(e)
+            _record_call("nova", providers.NOVA_MODEL_ID, feature, started, False)
+            raise
+        usage = response.get('usage', {})
+        usage = (usage.get('inputTokens', 0), usage.get('outputTokens', 0))
+        slot.settle(*usage)
+    resilience.get_breaker("nova").record_success()
+    resilience.get_latency_tracker("nova").observe(time.perf_counter() - started)
+    _record_call("nova", providers.NOVA_MODEL_ID, feature, started, True, usage, prompt_tokens,
+                 response.get('stopReason') == "max_tokens")
+    return text
+
+
+def _call_gemini(prompt, max_tokens, feature=None):
+    """One Gemini call, rate limited and reported to its breaker, latency tracker and metrics."""
+    prompt_tokens = ratelimit.estimate_tokens(prompt)
+    with ratelimit.rate_limited(providers.GEMINI_MODEL_NAME, prompt_tokens + max_tokens) as slot:
+        started = time.perf_counter()
+        try:
+            response = providers.get_gemini_model().generate_content(prompt, generation_config=_gemini_config(max_tokens))
+            text = response.text
+        except Exception as e:
+            resilience.get_breaker("gemini").record_failure(e)
+            _record_call("gemini", providers.GEMINI_MODEL_NAME, feature, started, False)
+            raise
+        usage = _gemini_usage(response)
+        slot.settle(*usage)
+    resilience.get_breaker("gemini").record_success()
+    resilience.get_latency_tracker("gemini").observe(time.perf_counter() - started)
+    _record_call("gemini", providers.GEMINI_MODEL_NAME, feature, started, True, usage, prompt_tokens,
+                 _gemini_truncated(response))
+    return text
+
+
+# Only hedges run here; primaries never queue in front of them
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+def _hedged(prompt, max_tokens, feature=None):
+    """Start Nova; if it outlives its p95, also start Gemini and take the first answer.
+
+    Nova runs on a thread of its own, so it never waits behind other
+    requests in a pool. The p95 clock starts when the rate limiter lets it
+    through, so time spent queued for quota never fires a hedge.
+    """
+    nova, granted = Future(), threading.Event()
+
+    def primary():
+        try:
+            nova.set_result(_call_nova(prompt, max_tokens, feature, on_granted=granted.set))
+        except Exception as e:
+            nova.set_exception(e)
+        finally:
+            granted.set()
+
+    threading.Thread(target=primary, name="llm-primary", daemon=True).start()
+    granted.wait()
+    done, _ = wait([nova], timeout=resilience.hedge_delay("nova"))
+    if done and nova.exception() is None:
+        return nova.result(), True
+
+    racers = [nova]
+    if resilience.get_breaker("gemini").allow():
+        resilience.record_hedge("fired")
+        racers.append(_hedge_pool.submit(_call_gemini, prompt, max_tokens, feature))
+    errors = []
+    for future in as_completed(racers):
+        if future.exception() is None:
+            if len(racers) > 1:
+                resilience.record_hedge("won_by_primary" if future is nova else "won_by_hedge")
+            if future is not nova:
+                metrics.inc("fallbacks_total", page=feature or "other", reason="hedge")
+            return future.result(), True
+        errors.append(future.exception())
+    print(f"Hedged call failed: {errors}")
+    return f"⚠️ AI Engine Offline. Errors: {'; '.join(str(e) for e in errors)}.", False
+
+
+def _generate(prompt, max_tokens, feature=None):
+    """Route one prompt through Nova then Gemini, skipping open breakers; returns (text, ok)."""
+    aws_error_msg = ""
+    nova_allowed = providers.AWS_CONFIGURED and resilience.get_breaker("nova").allow()
+    if providers.AWS_CONFIGURED and not nova_allowed:
+        aws_error_msg = "circuit open (Nova recently failing)"
+
+    if nova_allowed and providers.GEMINI_CONFIGURED and resilience.HEDGING_ENABLED:
+        return _hedged(prompt, max_tokens, feature)
+
+    if nova_allowed:
+        try:
+            return _call_nova(prompt, max_tokens, feature), True
+        except Exception as e:
+            aws_error_msg = str(e)
+            print(f"AWS Nova Failed: {aws_error_msg}")
+
+    if providers.GEMINI_CONFIGURED:
+        if not resilience.get_breaker("gemini").allow():
+            return f"⚠️ AI Engine Offline. Both providers are failing; retrying shortly. AWS Error: {aws_error_msg}.", False
+        if providers.AWS_CONFIGURED:
+            metrics.inc("fallbacks_total", page=feature or "other", reason="breaker_open" if not nova_allowed else "nova_error")
+        try:
+            return _call_gemini(prompt, max_tokens, feature), True
+        except Exception as e:
+            return f"⚠️ Gemini Error: {e}", False
+
+    return f"⚠️ AI Engine Offline. AWS Error: {aws_error_msg}.", False
+
+
+# Threads behind get_llm_responses, shared by every session
+BACKGROUND_WORKERS = int(os.getenv("LLM_BATCH_WORKERS", "8"))
+
+# ``error`` is None when ``text`` is a real answer
+LLMResult = namedtuple("LLMResult", ["text", "error"])
+
+
+def _respond(prompt, max_tokens, feature, use_cache):
+    """Cache lookup, then provider routing; returns (text, ok)."""
+    started = time.perf_counter()
+    page = feature or "other"
+    max_tokens = output_budget(feature, max_tokens)
+    cache = get_response_cache()
+    key = make_key(prompt, providers.NOVA_MODEL_ID, max_tokens)
+    if cache is not None and use_cache:
+        cached = cache.get(key)
+        metrics.inc("cache_lookups_total", cache="llm", page=page, result="miss" if cached is None else "hit")
+        if cached is not None:
+            metrics.observe("llm_response_seconds", time.perf_counter() - started, page=page, source="cache")
+            return cached, True
+
+    def generate():
+        text, ok = _generate(prompt, max_tokens, feature)
+        if ok and cache is not None:
+            cache.put(key, text, feature)
+        return text, ok
+
+    if cache is not None and use_cache:
+        # Identical requests in flight here or on another worker share one upstream call
+        text, ok = get_coalescer().run(key, lambda: cache.peek(key), generate, page)
+    else:
+        text, ok = generate()
+    metrics.observe("llm_response_seconds", time.perf_counter() - started, page=page, source="provider" if ok else "error")
+    return text, ok
+
+
+def get_llm_response(prompt, max_tokens=None, feature=None, use_cache=True):
+    """Central engine routing to Amazon Nova Micro, with fallback to Google Gemini.
+
+    ``max_tokens`` caps the answer; None means the feature's output budget.
+    Successful answers are cached per ``feature``; ``use_cache=False`` skips the
+    lookup (regenerate) but still refreshes the stored answer.
+    """
+    return _respond(prompt, max_tokens, feature, use_cache)[0]
+
+
+def get_llm_result(prompt, max_tokens=None, feature=None, use_cache=True):
+    """Like get_llm_response, but returns an LLMResult so callers can tell errors apart."""
+    text, ok = _respond(prompt, max_tokens, feature, use_cache)
+    return LLMResult(text, None if ok else text)
+
+
+_background_pool = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="llm-bg")
+
+
+def get_llm_responses(prompts, max_tokens=None, feature=None, use_cache=True, deadline=None, stream_first=None):
+    """Run many prompts concurrently and return one LLMResult per prompt, in input order.
+
+    Each item is either a prompt string or a ``(prompt, max_tokens)`` pair.
+    Prompts run on the shared background pool, and a failure is reported in
+    that prompt's own LLMResult. ``deadline`` is a budget in seconds for the
+    whole batch; prompts still running when it expires come back with a
+    timeout error. ``stream_first(prompt, max_tokens)`` runs the first
+    prompt on the caller's thread instead (e.g. streaming it into the page)
+    and must return an LLMResult.
+    """
+    jobs = [item if isinstance(item, tuple) else (item, max_tokens) for item in prompts]
+    started = time.monotonic()
+    pooled = jobs[1:] if stream_first and jobs else jobs
+    futures = [_background_pool.submit(get_llm_result, prompt, tokens, feature, use_cache) for prompt, tokens in pooled]
+
+    results = []
+    if len(pooled) < len(jobs):
+        try:
+            results.append(stream_first(*jobs[0]))
+        except Exception as e:
+            results.append(LLMResult("", f"⚠️ Engine Error: {e}"))
+    for future in futures:
+        left = None if deadline is None else max(0.0, deadline - (time.monotonic() - started))
+        try:
+            results.append(future.result(timeout=left))
+        except FutureTimeout:
+            future.cancel()
+            results.append(LLMResult("", f"⚠️ Timed out after {time.monotonic() - started:.1f}s batch deadline."))
+        except Exception as e:
+            results.append(LLMResult("", f"⚠️ Engine Error: {e}"))
+    return results
+
+
+# --- Token streaming ---
+# Recent (provider, seconds) time-to-first-token samples, shared by all sessions
+_ttft_samples = deque(maxlen=500)
+_ttft_lock = threading.Lock()
+
+
+def _continuation_prompt(prompt, partial):
+    return (f"{prompt}\n\nYour previous answer was cut off after this text:\n{partial}\n\n"
+            "Continue exactly where it stops. Do not repeat any of it.")
+
+
+class LLMStream:
+    """Iterable of text chunks from Nova (converse_stream) or Gemini (stream=True).
+
+    After iteration, ``text`` holds the full answer, ``provider`` who produced
+    it and ``ttft`` / ``total_time`` the measured latencies in seconds. If Nova
+    dies mid-stream, Gemini is asked to continue from the partial text so the
+    chunks already shown stay valid.
+    """
+
+    def __init__(self, prompt, max_tokens=None, feature=None, use_cache=True):
+        self.prompt = prompt
+        self.max_tokens = output_budget(feature, max_tokens)
+        self.feature = feature
+        self.use_cache = use_cache
+        self.text = ""
+        self.provider = None
+        self.ttft = None
+        self.total_time = None
+        self.ok = False
+        self._started = None
+
+    def __iter__(self):
+        self._started = time.perf_counter()
+        cache = get_response_cache()
+        key = make_key(self.prompt, providers.NOVA_MODEL_ID, self.max_tokens)
+        page = self.feature or "other"
+        if cache is not None and self.use_cache:
+            cached = cache.get(key)
+            metrics.inc("cache_lookups_total", cache="llm", page=page, result="miss" if cached is None else "hit")
+            if cached is not None:
+                self.provider, self.ok = "cache", True
+                yield from self._emit(cached)
+                self._finish()
+                return
+
+        aws_error_msg = ""
+        nova_breaker = resilience.get_breaker("nova")
+        if providers.AWS_CONFIGURED and not nova_breaker.allow():
+            aws_error_msg = "circuit open (Nova recently failing)"
+        elif providers.AWS_CONFIGURED:
+            usage, started, stop = (0, 0), time.perf_counter(), None
+            try:
+                prompt_tokens = ratelimit.estimate_tokens(self.prompt)
+                with ratelimit.rate_limited(providers.NOVA_MODEL_ID, prompt_tokens + self.max_tokens) as slot:
+                    started = time.perf_counter()
+                    response = providers.get_bedrock_client().converse_stream(
+                        modelId=providers.NOVA_MODEL_ID,
+                        messages=[{"role": "user", "content": [{"text": self.prompt}]}],
+                        inferenceConfig=_nova_config(self.max_tokens),
+                    )
+                    self.provider = "Amazon Nova"
+                    for event in response['stream']:
+                        chunk = event.get('contentBlockDelta', {}).get('delta', {}).get('text')
+                        if chunk:
+                            yield from self._emit(chunk)
+                        stop = event.get('messageStop', {}).get('stopReason', stop)
+                        metadata = event.get('metadata', {}).get('usage')
+                        if metadata:
+                            usage = (metadata.get('inputTokens', 0), metadata.get('outputTokens', 0))
+                            slot.settle(*usage)
+                self.ok = True
+                nova_breaker.record_success()
+                _record_call("nova", providers.NOVA_MODEL_ID, self.feature, started, True, usage, prompt_tokens,
+                             stop == "max_tokens")
+            except ratelimit.RateLimitTimeout as e:
+                aws_error_msg = str(e)
+            except Exception as e:
+                nova_breaker.record_failure(e)
+                _record_call("nova", providers.NOVA_MODEL_ID, self.feature, started, False)
+                aws_error_msg = str(e)
+                print(f"AWS Nova Stream Failed: {aws_error_msg}")
+
+        gemini_breaker = resilience.get_breaker("gemini")
+        gemini_tried = not self.ok and providers.GEMINI_CONFIGURED and gemini_breaker.allow()
+        if gemini_tried:
+            prompt = _continuation_prompt(self.prompt, self.text) if self.text else self.prompt
+            self.provider = "Google Gemini (continued)" if self.text else "Google Gemini"
+            if providers.AWS_CONFIGURED:
+                metrics.inc("fallbacks_total", page=page, reason="stream_continued" if self.text else "nova_error")
+            started = time.perf_counter()
+            # A continuation only gets what the interrupted stream left of the budget
+            remaining = max(64, self.max_tokens - ratelimit.estimate_tokens(self.text))
+            try:
+                prompt_tokens = ratelimit.estimate_tokens(prompt)
+                with ratelimit.rate_limited(providers.GEMINI_MODEL_NAME, prompt_tokens + remaining) as slot:
+                    started = time.perf_counter()
+                    last_chunk = None
+                    for chunk in providers.get_gemini_model().generate_content(
+                            prompt, stream=True, generation_config=_gemini_config(remaining)):
+                        last_chunk = chunk
+                        if chunk.text:
+                            yield from self._emit(chunk.text)
+                    usage = _gemini_usage(last_chunk)
+                    slot.settle(*usage)
+                self.ok = True
+                gemini_breaker.record_success()
+                _record_call("gemini", providers.GEMINI_MODEL_NAME, self.feature, started, True, usage, prompt_tokens,
+                             _gemini_truncated(last_chunk))
+            except Exception as e:
+                gemini_breaker.record_failure(e)
+                _record_call("gemini", providers.GEMINI_MODEL_NAME, self.feature, started, False)
+                yield from self._emit(f"\n\n⚠️ Gemini Error: {e}")
+
+        if not self.ok and not self.text:
+            yield from self._emit(f"⚠️ AI Engine Offline. AWS Error: {aws_error_msg}.")
+        elif not self.ok and not gemini_tried:
+            yield from self._emit(f"\n\n⚠️ Stream interrupted. AWS Error: {aws_error_msg}.")
+
+        if self.ok and cache is not None and self.provider != "cache":
+            cache.put(key, self.text, self.feature)
+        self._finish()
+
+    def _emit(self, chunk):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self._started
+            with _ttft_lock:
+                _ttft_samples.append((self.provider or "offline", self.ttft))
+            metrics.observe("llm_ttft_seconds", self.ttft, provider=self.provider or "offline", page=self.feature or "other")
+        self.text += chunk
+        yield chunk
+
+    def _finish(self):
+        self.total_time = time.perf_counter() - self._started
+
+
+def stream_llm_response(prompt, max_tokens=None, feature=None, use_cache=True):
+    """Streaming twin of get_llm_response: returns an LLMStream of text chunks."""
+    return LLMStream(prompt, max_tokens, feature=feature, use_cache=use_cache)
+
+
+def ttft_summary():
+    """Median and p95 time-to-first-token (seconds) per provider over recent streams."""
+    with _ttft_lock:
+        samples = list(_ttft_samples)
+    by_provider = {}
+    for provider, ttft in samples:
+        by_provider.setdefault(provider, []).append(ttft)
+    summary = {}
+    for provider, values in by_provider.items():
+        values.sort()
+        summary[provider] = {
+            "count": len(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
+    return summary
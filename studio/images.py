@@ -0,0 +1,134 @@
+"""Amazon Titan Image Generator v2 thumbnails, with multi-variant seed grids.
+
+One Titan call can return up to five images, and several (style, seed)
+combinations can be painted in parallel, so a creator gets a whole grid of
+options for the round trips one "Generate" click used to cost. Every variant
+records the seed, batch size and index it came from; Titan is deterministic
+for those, so a chosen image can be regenerated exactly.
+"""
+import base64
+import json
+import random
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from studio import providers, ratelimit
+from studio.blobstore import get_blob_store
+from studio.metrics import metrics
+
+IMAGE_STYLES = ["Cinematic 🎬", "Anime/Gaming 🎮", "Hyper-Realistic 📸", "Neon/Tech ⚡"]
+TITAN_SOURCE = "AWS Titan v2:0"
+FALLBACK_SOURCE = "Open Source Fallback"
+MAX_IMAGES_PER_CALL = 5
+MAX_SEED = 2147483647
+
+# ``image`` is a blob store key for Titan variants and a URL for fallback ones
+ImageVariant = namedtuple("ImageVariant", ["style", "seed", "index", "batch_size", "prompt", "image", "source"])
+
+
+def build_image_prompt(scene, style):
+    return f"{scene}, {style} style, 8k resolution, highly detailed, vibrant colors."
+
+
+def invoke_titan(prompt, seed, count=1, width=1024, height=1024, cfg_scale=8):
+    """One Titan TEXT_IMAGE call returning ``count`` decoded PNGs."""
+    body = json.dumps({
+        "taskType": "TEXT_IMAGE",
+        "textToImageParams": {"text": prompt},
+        "imageGenerationConfig": {
+            "cfgScale": cfg_scale,
+            "seed": seed,
+            "width": width,
+            "height": height,
+            "numberOfImages": count
+        }
+    })
+    labels = {"provider": "titan", "model": providers.TITAN_IMAGE_MODEL_ID, "page": "visual_studio"}
+    with ratelimit.rate_limited(providers.TITAN_IMAGE_MODEL_ID):
+        started = time.perf_counter()
+        try:
+            response = providers.get_bedrock_client().invoke_model(
+                modelId=providers.TITAN_IMAGE_MODEL_ID,
+                body=body
+            )
+        except Exception:
+            metrics.inc("upstream_calls_total", outcome="error", **labels)
+            raise
+        finally:
+            metrics.observe("upstream_call_seconds", time.perf_counter() - started, **labels)
+    metrics.inc("upstream_calls_total", outcome="ok", **labels)
+    response_body = json.loads(response.get("body").read())
+    return [base64.b64decode(image) for image in response_body.get("images")]
+
+
+def fallback_image_url(prompt, seed, width=1024, height=1024):
+    """Pollinations URL for the same prompt and seed (fail-safe when Titan is blocked)."""
+    encoded_prompt = urllib.parse.quote(prompt)
+    return f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={width}&height={height}&seed={seed}&nologo=true"
+
+
+def _paint(scene, style, seed, batch_size):
+    prompt = build_image_prompt(scene, style)
+    try:
+        store = get_blob_store()
+        images = invoke_titan(prompt, seed, batch_size)
+        return [ImageVariant(style, seed, i, batch_size, prompt, store.put(image), TITAN_SOURCE) for i, image in enumerate(images)], None
+    except Exception as e:
+        print(f"AWS Titan Failed: {e}")
+        metrics.inc("fallbacks_total", batch_size, page="visual_studio", reason="titan_error")
+        return [ImageVariant(style, seed, i, batch_size, prompt, fallback_image_url(prompt, seed + i), FALLBACK_SOURCE)
+                for i in range(batch_size)], str(e)
+
+
+def generate_variants(scene, styles, seeds_per_style=1, images_per_call=1, max_workers=4, progress=None):
+    """Paint every (style, seed) combination in parallel, ``images_per_call`` images each.
+
+    Returns ``(variants, errors)``; combinations Titan could not serve fall
+    back to Pollinations and their error is listed in ``errors``.
+    ``progress(done, total)`` is called as combinations finish; if it raises
+    (e.g. a cancelled job), combinations that have not started are dropped.
+    """
+    images_per_call = max(1, min(images_per_call, MAX_IMAGES_PER_CALL))
+    combos = [(style, random.randint(0, MAX_SEED)) for style in styles for _ in range(seeds_per_style)]
+    if not combos:
+        return [], []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(combos)), thread_name_prefix="titan") as pool:
+        futures = [pool.submit(_paint, scene, style, seed, images_per_call) for style, seed in combos]
+        try:
+            for done, _ in enumerate(as_completed(futures), 1):
+                if progress:
+                    progress(done, len(futures))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        results = [future.result() for future in futures]
+    variants = [variant for batch, _ in results for variant in batch]
+    errors = [error for _, error in results if error]
+    return variants, errors
+
+
+def regenerate_variant(variant):
+    """Repaint ``variant`` from its recorded seed, batch size and index."""
+    if variant.source != TITAN_SOURCE:
+        return variant._replace(image=fallback_image_url(variant.prompt, variant.seed + variant.index))
+    images = invoke_titan(variant.prompt, variant.seed, variant.batch_size)
+    return variant._replace(image=get_blob_store().put(images[variant.index]))
+
+
+def variants_job(job, scene, styles, seeds_per_style=1, images_per_call=1):
+    """Background-job wrapper for generate_variants; returns (variants, errors, seconds)."""
+    started = time.perf_counter()
+    job.report(0.0, "🎨 AWS Bedrock (Titan v2:0) is painting...")
+    variants, errors = generate_variants(
+        scene, styles, seeds_per_style, images_per_call,
+        progress=lambda done, total: job.report(done / total, f"🎨 Titan painted {done} of {total} request(s)..."))
+    return variants, errors, time.perf_counter() - started
+
+
+def regenerate_job(job, variant, position):
+    """Background-job wrapper for regenerate_variant; returns (position, variant)."""
+    job.report(0.1, "🔁 Repainting from the recorded seed...")
+    return position, regenerate_variant(variant)
@@ -0,0 +1,264 @@
+"""Background jobs for slow generations (Titan grids, Saarthi answers + voice).
+
+A Streamlit session used to run Titan or the Saarthi LLM + TTS chain right
+inside its button handler. That blocked its script thread for seconds, and
+nothing capped how many of those ran at once across users. Pages now submit a
+job and get an id back. They poll the job's status, progress and partial
+output from a short ``run_every`` fragment and pick up the result when it
+lands. The creator can cancel it.
+
+One process-wide queue serves every session. A bounded pool of workers pulls
+the highest-priority job first. ``interactive`` jobs (someone is waiting on
+the page) always go before ``bulk`` ones (big grids, batch work). Bulk jobs
+may never take every worker, so an interactive request never waits behind a
+wall of batch work. The queue itself is bounded, so overload is reported
+instead of growing without limit.
+
+Environment knobs: ``JOB_WORKERS`` (default 4), ``JOB_BULK_WORKERS`` (most
+workers bulk jobs may hold at once, default ``JOB_WORKERS - 1``),
+``JOB_MAX_QUEUED`` (default 200) and ``JOB_RETENTION`` (seconds a finished
+job stays pollable, default 900).
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+
+from studio.metrics import metrics
+
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "4")))
+JOB_BULK_WORKERS = max(1, min(JOB_WORKERS, int(os.getenv("JOB_BULK_WORKERS", str(max(1, JOB_WORKERS - 1))))))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "200"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "900"))
+
+LANES = {"interactive": 0, "bulk": 1}  # lower runs first
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job was cancelled."""
+
+
+class QueueFull(RuntimeError):
+    """The job queue is at JOB_MAX_QUEUED; try again shortly."""
+
+
+class Job:
+    """One unit of background work. ``fn(job, *args, **kwargs)`` runs on a worker thread."""
+
+    def __init__(self, kind, fn, args, kwargs, lane, owner):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.lane = lane
+        self.owner = owner
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished_at = None
+        self.order = None
+        self._fn, self._args, self._kwargs = fn, args, kwargs
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    # --- Called from the job function ---
+    def report(self, progress=None, message=None, partial=None):
+        """Publish progress (0-1), a status line and/or partial output; raises JobCancelled once cancelled."""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+        self.check()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    # --- Called by pages ---
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def cancel(self):
+        """Ask the job to stop (no-op once finished); a running job stops at its next report()/check()."""
+        if not self.finished:
+            self._cancel.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def elapsed(self):
+        end = self.finished_at or time.time()
+        return end - (self.started or self.created)
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, bulk_workers=JOB_BULK_WORKERS, max_queued=JOB_MAX_QUEUED,
+                 retention=JOB_RETENTION):
+        self.workers = workers
+        self.bulk_workers = min(bulk_workers, workers)
+        self.max_queued = max_queued
+        self.retention = retention
+        self._cond = threading.Condition()
+        self._heap = []  # ((lane priority, seq), job)
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._running = {lane: 0 for lane in LANES}
+        self._threads = []
+        self._busy_seconds = 0.0
+        self._started = time.time()
+        self.totals = {DONE: 0, FAILED: 0, CANCELLED: 0}
+
+    def submit(self, kind, fn, *args, lane="interactive", owner=None, **kwargs):
+        """Queue ``fn(job, *args, **kwargs)``; returns the Job (poll it with ``get(job.id)``)."""
+        if lane not in LANES:
+            raise ValueError(f"unknown lane {lane!r}; expected one of {', '.join(LANES)}")
+        job = Job(kind, fn, args, kwargs, lane, owner)
+        with self._cond:
+            if len(self._heap) >= self.max_queued:
+                raise QueueFull(f"{len(self._heap)} jobs already queued")
+            self._prune()
+            self._jobs[job.id] = job
+            job.order = (LANES[lane], next(self._seq))
+            heapq.heappush(self._heap, (job.order, job))
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        if job_id is None:
+            return None
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job: a queued one is dropped at once, a running one stops at its next report()."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel()
+        with self._cond:
+            if job.status == QUEUED:
+                self._heap = [entry for entry in self._heap if entry[1] is not job]
+                heapq.heapify(self._heap)
+                self._finish(job, CANCELLED)
+        return job
+
+    def position(self, job):
+        """1-based place in line for a queued job (0 once it is running or finished)."""
+        if job.status != QUEUED:
+            return 0
+        with self._cond:
+            return 1 + sum(1 for order, _ in self._heap if order < job.order)
+
+    def jobs(self, owner=None):
+        """Known jobs, newest first."""
+        with self._cond:
+            found = [j for j in self._jobs.values() if owner in (None, j.owner)]
+        return sorted(found, key=lambda j: -j.created)
+
+    def stats(self):
+        with self._cond:
+            queued = {lane: 0 for lane in LANES}
+            for _, job in self._heap:
+                queued[job.lane] += 1
+            running = dict(self._running)
+            busy = self._busy_seconds + sum(time.time() - j.started for j in self._jobs.values() if j.status == RUNNING)
+            uptime = time.time() - self._started
+        return {"workers": self.workers, "bulk_workers": self.bulk_workers, "queued": queued, "running": running,
+                "busy": sum(running.values()), "utilization": busy / (self.workers * uptime) if uptime else 0.0,
+                **self.totals}
+
+    # --- Workers ---
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next(self):
+        """Pop the best runnable job (caller holds the lock); bulk waits while it already holds its share."""
+        skipped, job = [], None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            candidate = entry[1]
+            if candidate.cancelled:
+                self._finish(candidate, CANCELLED)
+                continue
+            if candidate.lane == "bulk" and self._running["bulk"] >= self.bulk_workers:
+                skipped.append(entry)
+                continue
+            job = candidate
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next()
+                job.status, job.started = RUNNING, time.time()
+                self._running[job.lane] += 1
+            metrics.observe("job_wait_seconds", job.started - job.created, kind=job.kind, lane=job.lane)
+            try:
+                job.check()
+                job.result = job._fn(job, *job._args, **job._kwargs)
+                outcome = CANCELLED if job.cancelled else DONE
+            except JobCancelled:
+                outcome = CANCELLED
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                outcome = FAILED
+            with self._cond:
+                self._running[job.lane] -= 1
+                self._busy_seconds += time.time() - job.started
+                self._finish(job, outcome)
+                self._cond.notify_all()
+
+    def _finish(self, job, outcome):
+        job.status, job.finished_at = outcome, time.time()
+        if outcome == DONE:
+            job.progress = 1.0
+        job._fn = job._args = job._kwargs = None
+        self.totals[outcome] += 1
+        metrics.inc("jobs_total", kind=job.kind, lane=job.lane, outcome=outcome)
+        if job.started:
+            metrics.observe("job_run_seconds", job.finished_at - job.started, kind=job.kind, lane=job.lane)
+        job._done.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [i for i, j in self._jobs.items() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide JobQueue shared by every session."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
@@ -0,0 +1,234 @@
+"""Process-wide metrics for the hot paths: latency histograms, counters, exports.
+
+Recording is a dict lookup plus a ``bisect`` under one lock (about a
+microsecond), so it stays on in production. Histograms use fixed
+log-spaced buckets, so memory does not grow with traffic, and p50/p95/p99
+are interpolated inside the bucket. Every series is labelled (provider,
+model, page, ...). "page" is the request's ``feature`` (content_pipeline,
+saarthi, visual_studio, ...).
+
+Read them in System Controls, as JSON (``snapshot()``) or as Prometheus text
+(``prometheus_text()``). Set ``METRICS_PORT`` to also serve ``/metrics`` and
+``/metrics.json`` over HTTP for a scraper. ``METRICS_DISABLED=1`` turns
+recording into no-ops.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("METRICS_DISABLED") != "1"
+
+# 1 ms .. ~190 s, x1.5 per bucket
+BUCKETS = tuple(round(0.001 * 1.5 ** i, 6) for i in range(31))
+
+# name -> (type, help)
+DEFINITIONS = {
+    "upstream_call_seconds": ("histogram", "Latency of one upstream call (LLM, image or TTS) by provider, model and page."),
+    "upstream_calls_total": ("counter", "Upstream calls by provider, model, page and outcome (ok/error)."),
+    "llm_response_seconds": ("histogram", "End-to-end get_llm_response latency by page and source (cache/provider)."),
+    "llm_ttft_seconds": ("histogram", "Streaming time to first token by provider and page."),
+    "fallbacks_total": ("counter", "Requests served by a fallback provider (Gemini, Pollinations), by page and reason."),
+    "llm_tokens_total": ("counter", "Tokens consumed by provider, model, page and direction (input/output)."),
+    "llm_estimated_input_tokens_total": ("counter", "Pre-call input token estimates, for comparing with llm_tokens_total."),
+    "llm_truncated_total": ("counter", "LLM answers that stopped at their output budget (max_tokens)."),
+    "context_trims_total": ("counter", "Chained-prompt contexts trimmed to their budget, by page and mode."),
+    "context_tokens_saved_total": ("counter", "Input tokens removed from chained prompts by context trimming."),
+    "cache_lookups_total": ("counter", "Cache lookups by cache (llm/tts), page and result (hit/miss)."),
+    "page_render_seconds": ("histogram", "Wall time of one page render (full or fragment rerun)."),
+    "job_wait_seconds": ("histogram", "Time a background job spent queued, by kind and lane."),
+    "job_run_seconds": ("histogram", "Time a background job spent running, by kind and lane."),
+    "jobs_total": ("counter", "Finished background jobs by kind, lane and outcome (done/failed/cancelled)."),
+    "pipeline_stages_total": ("counter", "Content Pipeline stages by kind and status (ran/reused/edited/skipped/failed)."),
+    "coalesced_requests_total": ("counter", "LLM requests that waited for an identical in-flight one, by scope (process/fleet) and page."),
+}
+
+
+class Histogram:
+    """Per-bucket counts plus sum, count and max."""
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Bucket-interpolated quantile (0 < q < 1); None when empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> float
+        self._histograms = {}  # (name, labels) -> Histogram
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name, value=1, **labels):
+        if not ENABLED:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not ENABLED:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    # --- Reading ---
+    def counters(self, name=None):
+        """[(name, labels dict, value)]"""
+        with self._lock:
+            items = list(self._counters.items())
+        return [(n, dict(labels), v) for (n, labels), v in sorted(items) if name in (None, n)]
+
+    def histograms(self, name=None):
+        """[(name, labels dict, summary dict)] with count, mean, p50/p95/p99 and max in seconds."""
+        with self._lock:
+            items = [(key, h.count, h.sum, h.max, list(h.counts)) for key, h in self._histograms.items()]
+        rows = []
+        for (n, labels), count, total, peak, counts in sorted(items):
+            if name not in (None, n):
+                continue
+            histogram = Histogram()
+            histogram.counts, histogram.count, histogram.sum, histogram.max = counts, count, total, peak
+            rows.append((n, dict(labels), {
+                "count": count, "mean": total / count if count else None,
+                "p50": histogram.percentile(0.50), "p95": histogram.percentile(0.95),
+                "p99": histogram.percentile(0.99), "max": peak,
+            }))
+        return rows
+
+    def snapshot(self):
+        """JSON-serializable view of every series."""
+        return {
+            "started": self.started,
+            "uptime_seconds": time.time() - self.started,
+            "counters": [{"name": n, "labels": labels, "value": v} for n, labels, v in self.counters()],
+            "histograms": [{"name": n, "labels": labels, **summary} for n, labels, summary in self.histograms()],
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(h.counts), h.sum, h.count) for key, h in self._histograms.items())
+        lines, described = [], set()
+
+        def describe(name):
+            if name not in described:
+                kind, help_text = DEFINITIONS.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_labels(labels)} {value:.15g}")
+        for (name, labels), counts, total, count in histograms:
+            describe(name)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+# --- Optional HTTP exporter ---
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_exporter(port=None):
+    """Serve /metrics (Prometheus) and /metrics.json on ``port`` (or METRICS_PORT) from a daemon thread."""
+    global _server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, kind = metrics.to_json().encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, kind = metrics.prometheus_text().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
@@ -0,0 +1,169 @@
+"""Local palette extraction and WCAG contrast checks for the Brand Identity Kit.
+
+The brand kit used to ask the LLM for hex codes and scrape them with a regex,
+silently falling back to fixed colors when none came back. Colors now come
+from the creator's own logo or reference image. The image is decoded at a
+reduced size, quantized to unique colors with pixel counts, and clustered
+with a seeded, weighted, vectorized k-means. The clusters are then given
+roles. The whole palette takes a few
+milliseconds, needs no network call and is deterministic for a given image.
+"""
+import io
+from collections import namedtuple
+
+import numpy as np
+
+MAX_SIDE = 96
+MAX_PIXELS = 8192
+AA_NORMAL = 4.5
+AA_LARGE = 3.0
+
+PaletteColor = namedtuple("PaletteColor", "hex rgb share")
+Palette = namedtuple("Palette", "colors primary accent background text")
+
+
+def to_hex(rgb):
+    return "#{:02X}{:02X}{:02X}".format(*(int(round(c)) for c in rgb))
+
+
+def from_hex(value):
+    value = value.lstrip("#")
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def load_pixels(source, max_side=MAX_SIDE):
+    """(N, 3) float32 RGB pixels of a downsampled image; transparent pixels are dropped."""
+    from PIL import Image
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with Image.open(source) as image:
+        image.draft("RGB", (max_side * 2, max_side * 2))  # JPEG: decode at reduced scale
+        image.thumbnail((max_side, max_side), Image.Resampling.BOX, reducing_gap=2.0)
+        rgba = np.asarray(image.convert("RGBA"), dtype=np.float32).reshape(-1, 4)
+    pixels = rgba[rgba[:, 3] > 128, :3]
+    if len(pixels) > MAX_PIXELS:
+        pixels = pixels[np.linspace(0, len(pixels) - 1, MAX_PIXELS).astype(np.int64)]
+    return pixels
+
+
+def _quantize(pixels, bits=5):
+    """Unique colors at ``bits`` per channel with their pixel counts (k-means then runs on far fewer points)."""
+    shift = 8 - bits
+    codes = (pixels.astype(np.int64) >> shift)
+    packed = (codes[:, 0] << (2 * bits)) | (codes[:, 1] << bits) | codes[:, 2]
+    unique, inverse, weights = np.unique(packed, return_inverse=True, return_counts=True)
+    # Mean of the original pixels in each bin keeps colors exact
+    sums = np.stack([np.bincount(inverse, weights=pixels[:, c]) for c in range(3)], axis=1)
+    return sums / weights[:, None], weights.astype(np.float64)
+
+
+def _sq_distances(points, centers):
+    return (points ** 2).sum(1)[:, None] - 2 * points @ centers.T + (centers ** 2).sum(1)[None]
+
+
+def kmeans(pixels, k=5, iterations=30, seed=0):
+    """Seeded, weighted k-means++ over quantized (N, 3) pixels; returns (centers, counts) sorted by count."""
+    points, weights = _quantize(np.asarray(pixels, dtype=np.float64))
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    centers = points[[rng.choice(len(points), p=weights / weights.sum())]]
+    for _ in range(1, k):
+        distance = np.maximum(_sq_distances(points, centers).min(1), 0) * weights
+        centers = np.vstack([centers, points[rng.choice(len(points), p=distance / distance.sum())]])
+    for _ in range(iterations):
+        labels = _sq_distances(points, centers).argmin(1)
+        counts = np.bincount(labels, weights=weights, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=points[:, c] * weights, minlength=k) for c in range(3)], axis=1)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        converged = np.allclose(updated, centers, atol=0.5)
+        centers = updated
+        if converged:
+            break
+    labels = _sq_distances(points, centers).argmin(1)
+    counts = np.bincount(labels, weights=weights, minlength=k).astype(np.int64)
+    order = np.argsort(-counts, kind="stable")
+    return centers[order], counts[order]
+
+
+def relative_luminance(rgb):
+    """WCAG 2.x relative luminance of an sRGB color (0-255 channels)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    c = np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return float(c @ [0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(a, b):
+    la, lb = sorted((relative_luminance(a), relative_luminance(b)), reverse=True)
+    return (la + 0.05) / (lb + 0.05)
+
+
+def wcag_grade(ratio):
+    return "AAA" if ratio >= 7 else "AA" if ratio >= AA_NORMAL else "AA Large" if ratio >= AA_LARGE else "Fail"
+
+
+def saturation(rgb):
+    rgb = np.asarray(rgb, dtype=np.float64)
+    high, low = rgb.max(), rgb.min()
+    return 0.0 if high == 0 else (high - low) / high
+
+
+def ensure_contrast(fg, bg, target=AA_NORMAL):
+    """Shade ``fg`` towards black or white (whichever moves away from ``bg``) until it meets ``target``."""
+    fg = np.asarray(fg, dtype=np.float64)
+    goal = np.zeros(3) if relative_luminance(bg) > 0.18 else np.full(3, 255.0)
+    for step in np.linspace(0, 1, 21):
+        candidate = fg + (goal - fg) * step
+        if contrast_ratio(candidate, bg) >= target:
+            return tuple(int(round(c)) for c in candidate)
+    return tuple(int(c) for c in goal)
+
+
+def extract_palette(source, k=5, seed=0):
+    """Dominant colors of an image with brand roles assigned."""
+    pixels = load_pixels(source)
+    if not len(pixels):
+        raise ValueError("image has no opaque pixels")
+    centers, counts = kmeans(pixels, k=k, seed=seed)
+    colors = [PaletteColor(to_hex(c), tuple(int(round(v)) for v in c), float(n / counts.sum())) for c, n in zip(centers, counts)]
+
+    chroma = [saturation(c.rgb) * max(c.rgb) / 255 for c in colors]
+    vivid = [c for c, s in zip(colors, chroma) if s > 0.25] or colors
+    primary = vivid[0]
+    accent = max((c for c in vivid if c is not primary), key=lambda c: saturation(c.rgb) + 0.5 * _distance(c, primary) + c.share,
+                 default=primary)
+    # Background: the lightest or darkest color that is not too saturated, else plain white/black
+    neutrals = [c for c, s in zip(colors, chroma) if s <= 0.25]
+    lum = relative_luminance
+    background = max(neutrals, key=lambda c: abs(lum(c.rgb) - 0.5), default=None)
+    if background is None:
+        rgb = (255, 255, 255) if lum(primary.rgb) < 0.4 else (15, 23, 42)
+        background = PaletteColor(to_hex(rgb), rgb, 0.0)
+    text_rgb = (255, 255, 255) if contrast_ratio((255, 255, 255), background.rgb) >= contrast_ratio((0, 0, 0), background.rgb) else (0, 0, 0)
+    text = PaletteColor(to_hex(text_rgb), text_rgb, 0.0)
+    return Palette(colors, primary, accent, background, text)
+
+
+def _distance(a, b):
+    return float(np.linalg.norm(np.subtract(a.rgb, b.rgb)) / 441.7)
+
+
+def contrast_report(palette):
+    """Rows of (pairing, ratio, grade, suggested fix) for the combinations a brand actually uses."""
+    pairs = [("Text on Background", palette.text, palette.background),
+             ("Primary on Background", palette.primary, palette.background),
+             ("Accent on Background", palette.accent, palette.background),
+             ("White text on Primary", PaletteColor("#FFFFFF", (255, 255, 255), 0), palette.primary),
+             ("White text on Accent", PaletteColor("#FFFFFF", (255, 255, 255), 0), palette.accent)]
+    rows = []
+    for name, fg, bg in pairs:
+        ratio = contrast_ratio(fg.rgb, bg.rgb)
+        fix = ""
+        if ratio < AA_NORMAL:
+            if fg.hex == "#FFFFFF":
+                fix = f"use {to_hex(ensure_contrast(bg.rgb, fg.rgb))} behind white text"
+            else:
+                fix = f"use {to_hex(ensure_contrast(fg.rgb, bg.rgb))} for small text"
+        rows.append({"Pairing": name, "Colors": f"{fg.hex} / {bg.hex}", "Contrast": round(ratio, 2),
+                     "WCAG": wcag_grade(ratio), "Accessible Fix": fix})
+    return rows
@@ -0,0 +1,265 @@
+"""The Content Pipeline as a DAG of memoized stages.
+
+The pipeline used to be three session-state slots. Regenerating anything
+upstream wiped everything below it, and covering four regions meant walking
+the whole chain four times. It is now a graph::
+
+    base_script ──┬─> localized_script:<region A> ──> whatsapp_message:<region A>
+                  └─> localized_script:<region B> ──> whatsapp_message:<region B>
+
+Each stage's output is memoized under a hash of its inputs: the stage kind,
+its own parameters (topic, language, region) and the exact text of its
+upstream outputs. The hash is taken before the prompt is built, so a hit
+skips the prompt (and its context trimming) as well as the model call.
+Re-running the graph therefore only runs stages whose inputs changed. An
+edited base script re-runs the regions below it. Adding a region runs just
+that region. Stages whose inputs are ready run concurrently, so one base
+script fans out to every selected region and its WhatsApp format at once.
+If two sessions ask for the same stage at the same time, it runs once.
+
+API::
+
+    from studio.pipeline import run_content_pipeline
+    result = run_content_pipeline("PM-Kisan Scheme", "Hindi", ["Pune (Puneri pure)", "Delhi (Gamer/Swag)"])
+    result.whatsapp["Delhi (Gamer/Swag)"]
+
+Environment knobs: ``PIPELINE_MEMO_SIZE`` (stage outputs kept, default 512)
+and ``PIPELINE_WORKERS`` (stages run at once per process, default 8).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from studio.engine import LLMResult, get_llm_result
+from studio.metrics import metrics
+from studio.prompts import base_script_prompt, localize_prompt, whatsapp_prompt
+
+FEATURE = "content_pipeline"
+MEMO_SIZE = int(os.getenv("PIPELINE_MEMO_SIZE", "512"))
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+
+BASE, LOCALIZED, WHATSAPP = "base_script", "localized_script", "whatsapp_message"
+
+# status: ran, reused (memo hit), edited (caller-supplied), skipped (upstream failed) or failed
+StageResult = namedtuple("StageResult", ["text", "error", "status", "seconds"])
+PipelineResult = namedtuple("PipelineResult", ["base_script", "localized", "whatsapp", "stages"])
+
+
+class Stage:
+    """One node: sends ``prompt(*upstream outputs, *params)`` to the LLM."""
+
+    def __init__(self, name, kind, prompt, params=(), deps=()):
+        self.name = name
+        self.kind = kind
+        self.prompt = prompt
+        self.params = tuple(params)
+        self.deps = tuple(deps)
+
+    def key(self, inputs):
+        parts = [self.kind, *self.params, *inputs]
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class StageMemo:
+    """Bounded LRU of stage outputs by input hash; concurrent computes of one key share the first."""
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            text = self._items.get(key)
+            if text is not None:
+                self._items.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def compute(self, key, fn, force=False):
+        """(LLMResult, shared): ``fn()`` unless memoized or already running elsewhere."""
+        while True:
+            with self._lock:
+                text = None if force else self._items.get(key)
+                if text is not None:
+                    return LLMResult(text, None), True
+                running = self._inflight.get(key)
+                if running is None:
+                    running = self._inflight[key] = threading.Event()
+                    break
+            running.wait()
+            force = False  # whoever was running it just produced a fresh answer
+        try:
+            result = fn()
+            if result.error is None:
+                self.put(key, result.text)
+            return result, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            running.set()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_stage_memo():
+    """Process-wide StageMemo shared by every session and bulk run."""
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = StageMemo()
+    return _memo
+
+
+_pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+
+def _default_llm(prompt, use_cache):
+    return get_llm_result(prompt, feature=FEATURE, use_cache=use_cache)
+
+
+class PipelineDAG:
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"stage {stage.name!r} depends on unknown {missing}")
+
+    def closure(self, targets):
+        """``targets`` plus everything upstream of them."""
+        needed, todo = set(), list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in needed:
+                needed.add(name)
+                todo.extend(self.stages[name].deps)
+        return needed
+
+    def run(self, targets=None, force=(), overrides=None, on_stage=None, llm=None, use_cache=True):
+        """Run the stages ``targets`` need; returns {name: StageResult}.
+
+        ``force`` (stage names, or True for all) re-runs stages even when
+        memoized, bypassing the response cache too. ``overrides`` supplies a
+        stage's output directly (e.g. a script the creator edited).
+        ``on_stage(name, result)`` is called on this thread as each stage
+        settles. ``llm(prompt, use_cache)`` must return an LLMResult. When a
+        single stage is runnable it runs on this thread, so a streaming
+        ``llm`` can draw into the page.
+        """
+        waiting = self.closure(targets or self.stages)
+        force = set(waiting) if force is True else set(force)
+        overrides = overrides or {}
+        llm = llm or _default_llm
+        memo = get_stage_memo()
+        results, running = {}, {}
+
+        def settle(name, result):
+            results[name] = result
+            metrics.inc("pipeline_stages_total", stage=self.stages[name].kind, status=result.status)
+            if on_stage:
+                on_stage(name, result)
+
+        def execute(stage, inputs, key):
+            started = time.perf_counter()
+            forced = stage.name in force
+            result, shared = memo.compute(key, lambda: llm(stage.prompt(*inputs, *stage.params), use_cache and not forced),
+                                          force=forced)
+            status = "failed" if result.error else "reused" if shared else "ran"
+            return StageResult(result.text, result.error, status, time.perf_counter() - started)
+
+        while waiting or running:
+            runnable, settled = [], len(results)
+            for name in sorted(waiting):
+                stage = self.stages[name]
+                if not all(d in results for d in stage.deps):
+                    continue
+                waiting.discard(name)
+                failed = [d for d in stage.deps if results[d].error]
+                if name in overrides:
+                    settle(name, StageResult(overrides[name], None, "edited", 0.0))
+                elif failed:
+                    settle(name, StageResult("", f"skipped: {failed[0]} failed", "skipped", 0.0))
+                else:
+                    inputs = [results[d].text for d in stage.deps]
+                    key = stage.key(inputs)
+                    text = None if name in force else memo.get(key)
+                    if text is not None:
+                        settle(name, StageResult(text, None, "reused", 0.0))
+                    else:
+                        runnable.append((stage, inputs, key))
+            if len(runnable) == 1 and not running:
+                stage, inputs, key = runnable[0]
+                settle(stage.name, execute(stage, inputs, key))
+                continue
+            for stage, inputs, key in runnable:
+                running[_pool.submit(execute, stage, inputs, key)] = stage.name
+            if not running:
+                if len(results) == settled:
+                    raise ValueError(f"dependency cycle among {sorted(waiting)}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                settle(running.pop(future), future.result())
+        return results
+
+
+def stage_name(kind, region=None):
+    return kind if region is None else f"{kind}:{region}"
+
+
+def content_pipeline(topic, language, regions):
+    """The Content Pipeline DAG: one base script fanned out to every region's rewrite and WhatsApp format."""
+    stages = [Stage(BASE, BASE, base_script_prompt, params=(topic, language))]
+    for region in regions:
+        stages.append(Stage(stage_name(LOCALIZED, region), LOCALIZED, localize_prompt, params=(region,), deps=(BASE,)))
+        stages.append(Stage(stage_name(WHATSAPP, region), WHATSAPP, whatsapp_prompt,
+                            deps=(stage_name(LOCALIZED, region),)))
+    return PipelineDAG(stages)
+
+
+def run_content_pipeline(topic, language, regions, base_script=None, targets=None, force=(), use_cache=True,
+                         on_stage=None, llm=None):
+    """Run the pipeline for ``regions``; returns a PipelineResult (per-region dicts, missing on error).
+
+    ``base_script`` replaces the generated base script (an edited one), and
+    ``targets`` limits the run to some stages (e.g. ``[BASE]`` for step 1 only).
+    """
+    dag = content_pipeline(topic, language, regions)
+    stages = dag.run(targets=targets, force=force, overrides={BASE: base_script} if base_script else None,
+                     on_stage=on_stage, llm=llm, use_cache=use_cache)
+    text = lambda name: stages[name].text if name in stages and stages[name].error is None else None
+    return PipelineResult(
+        text(BASE),
+        {r: text(stage_name(LOCALIZED, r)) for r in regions if text(stage_name(LOCALIZED, r)) is not None},
+        {r: text(stage_name(WHATSAPP, r)) for r in regions if text(stage_name(WHATSAPP, r)) is not None},
+        stages,
+    )
+
+
+def first_error(result):
+    """(stage name, error) of the earliest failed stage in ``result``, or None."""
+    for name, stage in result.stages.items():
+        if stage.status == "failed":
+            return name, stage.error
+    return None
@@ -0,0 +1,82 @@
+"""Rerun profiler: wall time per script section for every Streamlit rerun.
+
+Call ``profiler.start_run("full")`` at the top of the script and
+``profiler.finish_run()`` in a ``finally`` at the bottom, and wrap its pieces
+in ``profiler.section(name)``. A fragment-only rerun never executes the
+script top, so its sections open a ``"fragment"`` run of their own.
+Finished runs are kept in a process-wide ring buffer, which is what the
+System Controls page charts.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class RerunProfiler:
+    """Per-thread current run, process-wide history of finished runs."""
+
+    def __init__(self, history=500):
+        self._local = threading.local()
+        self._runs = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def start_run(self, kind):
+        """Begin timing a rerun on this thread (replaces any run left unfinished)."""
+        self._local.current = {"kind": kind, "started": time.time(), "sections": [],
+                               "_t0": time.perf_counter()}
+
+    def finish_run(self):
+        """Record the current run into the shared history."""
+        current = getattr(self._local, "current", None)
+        if current is None:
+            return
+        self._local.current = None
+        current["total_ms"] = (time.perf_counter() - current.pop("_t0")) * 1000
+        with self._lock:
+            self._runs.append(current)
+
+    @contextmanager
+    def run(self, kind):
+        """Time one rerun; recorded even if the body raises (e.g. st.rerun)."""
+        self.start_run(kind)
+        try:
+            yield
+        finally:
+            self.finish_run()
+
+    @contextmanager
+    def section(self, name):
+        """Time one section of the current run (or of a fragment-only run)."""
+        if getattr(self._local, "current", None) is None:
+            with self.run("fragment"), self.section(name):
+                yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.current["sections"].append((name, (time.perf_counter() - started) * 1000))
+
+    def recent_runs(self, limit=50):
+        with self._lock:
+            runs = list(self._runs)
+        return runs if limit is None else runs[-limit:]
+
+    def summary(self):
+        """Per-section count, mean, p95 and max wall time (ms) over the history."""
+        timings = {}
+        for run in self.recent_runs(limit=None):
+            for name, ms in run["sections"]:
+                timings.setdefault((run["kind"], name), []).append(ms)
+        rows = []
+        for (kind, name), values in timings.items():
+            values.sort()
+            rows.append({"run": kind, "section": name, "count": len(values),
+                         "mean_ms": sum(values) / len(values),
+                         "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                         "max_ms": values[-1]})
+        return sorted(rows, key=lambda row: -row["mean_ms"] * row["count"])
+
+
+profiler = RerunProfiler()
@@ -0,0 +1,32 @@
+"""Prompt templates shared by the Streamlit pages and the headless runners.
+
+Chained steps paste the previous step's answer into the next prompt. That
+answer goes through ``fit_context`` first, so a long script is trimmed to the
+pipeline's context budget and not sent in full.
+"""
+from studio.budget import fit_context
+
+PIPELINE_LANGUAGES = ["Hindi", "Marathi", "Hinglish", "English"]
+PIPELINE_REGIONS = ["Pune (Puneri pure)", "Mumbai (Tapori/Bindaas)", "Delhi (Gamer/Swag)", "UP/Bihar (Desi)"]
+
+
+def base_script_prompt(topic, language):
+    """Content Pipeline step 1: simplify a topic into a short base script."""
+    return f"Act as an expert scriptwriter. Summarize the topic '{topic}' into a 4-line engaging video script in {language}."
+
+
+def localize_prompt(base_script, region):
+    """Content Pipeline step 2: rewrite the base script in a region's slang."""
+    base_script = fit_context(base_script, "content_pipeline")
+    return f"Rewrite the following script in {region} local slang and vibe to make it extremely relatable to that region. Keep the core meaning intact:\n\n'{base_script}'"
+
+
+def whatsapp_prompt(localized_script):
+    """Content Pipeline step 3: format the localized script as a WhatsApp broadcast."""
+    localized_script = fit_context(localized_script, "content_pipeline")
+    return f"Format this script into a highly engaging, viral WhatsApp broadcast message. Add relevant emojis, short bullet points, and a strong Call to Action at the end:\n\n'{localized_script}'"
+
+
+def trend_prompt(state, niche, language):
+    """Trend Radar: two trending video ideas for a location/niche."""
+    return f"Act as a trending topics analyst. Suggest 2 highly engaging, plausible trending video ideas right now for a creator in '{state}' focusing on the '{niche}' niche. Write them in {language}. Keep it under 3 sentences total."
@@ -0,0 +1,152 @@
+"""Process-wide pooled clients for AWS Bedrock and Google Gemini.
+
+Every button press used to build a fresh ``boto3`` client (and TLS session)
+and a fresh Gemini model. Clients are now created once per process, behind a
+lock, and shared by every Streamlit session and thread.
+
+Tuning knobs (all optional, read from the environment / ``.env``):
+
+* ``BEDROCK_POOL_SIZE``        - max pooled HTTP connections (default 32)
+* ``BEDROCK_CONNECT_TIMEOUT``  - seconds to open a connection (default 3)
+* ``BEDROCK_READ_TIMEOUT``     - seconds to wait for a response (default 60)
+* ``BEDROCK_MAX_ATTEMPTS``     - total attempts incl. retries (default 3)
+* ``BEDROCK_RETRY_MODE``       - ``standard`` or ``adaptive`` (default standard)
+* ``BEDROCK_KEEPALIVE``        - TCP keep-alive on pooled sockets (default 1)
+* ``BEDROCK_ENDPOINT_URL``     - point Bedrock at a local stub endpoint
+* ``GEMINI_API_ENDPOINT``      - point Gemini (REST transport) at a local stub
+
+``boto3`` and ``google.generativeai`` are imported on first use, not at import
+time: together they cost over a second of cold start.
+"""
+import importlib.util
+import os
+import threading
+
+from dotenv import load_dotenv
+
+
+def _installed(module):
+    """True if ``module`` can be imported, without paying for the import."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+GEMINI_AVAILABLE = _installed("google.generativeai")
+
+# --- 🛡️ SECURE KEY LOADING FROM .env FILE 🛡️ ---
+load_dotenv()
+
+AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
+AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+GEMINI_KEY = os.getenv("GEMINI_API_KEY")
+
+AWS_CONFIGURED = bool(AWS_ACCESS_KEY and AWS_SECRET_KEY)
+GEMINI_CONFIGURED = bool(GEMINI_KEY and GEMINI_AVAILABLE)
+
+NOVA_MODEL_ID = "amazon.nova-micro-v1:0"
+TITAN_IMAGE_MODEL_ID = "amazon.titan-image-generator-v2:0"
+GEMINI_MODEL_NAME = "gemini-pro"
+NOVA_MAX_OUTPUT_TOKENS = 5000  # Nova Micro's hard cap on maxTokens
+
+_lock = threading.Lock()
+_bedrock_client = None
+_gemini_configured = False
+_gemini_models = {}
+
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def bedrock_config():
+    """Connection pool, keep-alive, timeout and retry settings for Bedrock."""
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=_env_int("BEDROCK_POOL_SIZE", 32),
+        connect_timeout=_env_float("BEDROCK_CONNECT_TIMEOUT", 3),
+        read_timeout=_env_float("BEDROCK_READ_TIMEOUT", 60),
+        tcp_keepalive=bool(_env_int("BEDROCK_KEEPALIVE", 1)),
+        retries={
+            "max_attempts": _env_int("BEDROCK_MAX_ATTEMPTS", 3),
+            "mode": os.getenv("BEDROCK_RETRY_MODE", "standard"),
+        },
+    )
+
+
+def get_bedrock_client():
+    """Shared ``bedrock-runtime`` client, built on first use (thread-safe)."""
+    global _bedrock_client
+    if _bedrock_client is None:
+        with _lock:
+            if _bedrock_client is None:
+                import boto3
+                _bedrock_client = boto3.session.Session().client(
+                    service_name='bedrock-runtime',
+                    region_name=AWS_REGION,
+                    aws_access_key_id=AWS_ACCESS_KEY,
+                    aws_secret_access_key=AWS_SECRET_KEY,
+                    endpoint_url=os.getenv("BEDROCK_ENDPOINT_URL") or None,
+                    config=bedrock_config(),
+                )
+    return _bedrock_client
+
+
+def get_gemini_model(model_name=GEMINI_MODEL_NAME):
+    """Shared Gemini model handle, configured once per process."""
+    global _gemini_configured
+    model = _gemini_models.get(model_name)
+    if model is None:
+        import google.generativeai as genai
+        with _lock:
+            if not _gemini_configured:
+                endpoint = os.getenv("GEMINI_API_ENDPOINT")
+                if endpoint:
+                    genai.configure(api_key=GEMINI_KEY, transport="rest",
+                                    client_options={"api_endpoint": endpoint})
+                else:
+                    genai.configure(api_key=GEMINI_KEY)
+                _gemini_configured = True
+            model = _gemini_models.get(model_name)
+            if model is None:
+                model = _gemini_models[model_name] = genai.GenerativeModel(model_name)
+    return model
+
+
+def reset_clients():
+    """Drop the pooled clients so the next call rebuilds them (e.g. after env changes)."""
+    global _bedrock_client, _gemini_configured
+    with _lock:
+        _bedrock_client = None
+        _gemini_configured = False
+        _gemini_models.clear()
+
+
+def install_clients(bedrock=None, gemini=None):
+    """Use ready-made clients (e.g. the local fakes in ``benchmarks/``) instead of building real ones.
+
+    ``bedrock`` needs ``converse``, ``converse_stream`` and ``invoke_model``;
+    ``gemini`` needs ``generate_content(prompt, stream=False, generation_config=None)``.
+    Either one marks its provider as configured.
+    """
+    global _bedrock_client, _gemini_configured, AWS_CONFIGURED, GEMINI_CONFIGURED
+    with _lock:
+        if bedrock is not None:
+            _bedrock_client = bedrock
+            AWS_CONFIGURED = True
+        if gemini is not None:
+            _gemini_models[GEMINI_MODEL_NAME] = gemini
+            _gemini_configured = True
+            GEMINI_CONFIGURED = True
@@ -0,0 +1,290 @@
+"""Process-wide token-bucket rate limiting and token quota accounting.
+
+Every model gets two buckets, requests/min and tokens/min. Callers queue in
+FIFO order for both instead of failing, so a burst of users is smoothed into
+the provider's limits rather than tripping Bedrock throttling (and silently
+spilling onto Gemini). Token use is estimated before a call and settled
+against the real ``usage`` block afterwards.
+
+Limits come from ``RATE_LIMITS`` below and can be overridden per model with
+``<PREFIX>_RPM`` / ``<PREFIX>_TPM`` env vars (``NOVA``, ``TITAN``, ``GEMINI``).
+``DAILY_TOKEN_QUOTA`` sets the budget behind the System Controls quota bar.
+
+With a shared ``SHARED_BACKEND`` (see ``studio.shared``), the buckets and the
+daily token count live in the shared store. Every worker process then draws
+from one fleet-wide budget instead of each allowing the full rate.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date
+
+from studio import providers
+from studio.shared import get_shared_backend
+
+# model id -> (env prefix, requests/min, tokens/min); None means unlimited
+RATE_LIMITS = {
+    providers.NOVA_MODEL_ID: ("NOVA", 100, 200_000),
+    providers.TITAN_IMAGE_MODEL_ID: ("TITAN", 6, None),
+    providers.GEMINI_MODEL_NAME: ("GEMINI", 60, 120_000),
+}
+DAILY_TOKEN_QUOTA = int(os.getenv("DAILY_TOKEN_QUOTA", "1000000"))
+MAX_QUEUE_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a caller waited longer than ``MAX_QUEUE_WAIT`` for its turn."""
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting before a call.
+
+    Latin text runs about 4 characters per token; Devanagari and other
+    non-ASCII scripts split far finer (about 2), so Hindi/Marathi prompts are
+    not under-reserved.
+    """
+    wide = sum(1 for ch in text if ord(ch) > 127)
+    return max(1, (len(text) - wide) // 4 + wide // 2)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute / 60`` tokens per second.
+
+    Waiters are served strictly in arrival order, so a large request at the
+    head of the queue is not starved by a stream of small ones behind it.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, timeout=None):
+        """Block until ``amount`` tokens are available; False on timeout."""
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    at_head = self._queue[0] is ticket
+                    if at_head and self.tokens >= amount:
+                        self.tokens -= amount
+                        return True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    wait = (amount - self.tokens) / self.rate if at_head else remaining
+                    if remaining is not None and wait is not None:
+                        wait = min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def adjust(self, amount):
+        """Refund (positive) or debit (negative) tokens after the real usage is known."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            self._refill()
+            return {"available": self.tokens, "capacity": self.capacity, "waiting": len(self._queue)}
+
+
+class SharedTokenBucket:
+    """TokenBucket whose level lives in a shared backend, so every worker process draws from one budget.
+
+    Waiters in this process still take turns in order; across processes the
+    next one to poll after a refill wins.
+    """
+
+    def __init__(self, backend, name, per_minute):
+        self.backend = backend
+        self.name = name
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._turn = threading.Lock()
+        self._waiting_lock = threading.Lock()
+        self._waiting = 0
+
+    def acquire(self, amount=1, timeout=None):
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            if not self._turn.acquire(timeout=-1 if timeout is None else timeout):
+                return False
+            try:
+                while True:
+                    wait = self.backend.take(self.name, amount, self.capacity, self.rate)
+                    if wait <= 0:
+                        return True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    time.sleep(wait if remaining is None else min(wait, remaining))
+            finally:
+                self._turn.release()
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+
+    def adjust(self, amount):
+        self.backend.take(self.name, -amount, self.capacity, self.rate, force=True)
+
+    def snapshot(self):
+        return {"available": self.backend.level(self.name, self.capacity, self.rate), "capacity": self.capacity,
+                "waiting": self._waiting}
+
+
+class ModelLimiter:
+    """Requests/min and tokens/min buckets for one model (shared across workers when ``backend`` is given)."""
+
+    def __init__(self, model_id, rpm, tpm, backend=None):
+        self.model_id = model_id
+        if backend is None:
+            bucket = lambda kind, per_minute: TokenBucket(per_minute)
+        else:
+            bucket = lambda kind, per_minute: SharedTokenBucket(backend, f"{model_id}:{kind}", per_minute)
+        self.requests = bucket("rpm", rpm) if rpm else None
+        self.tokens = bucket("tpm", tpm) if tpm else None
+
+    def acquire(self, estimated_tokens, timeout=MAX_QUEUE_WAIT):
+        """Wait for one request and ``estimated_tokens``; returns (seconds waited, tokens taken).
+
+        A request larger than the whole token bucket takes the full bucket
+        rather than waiting forever, so fewer tokens than estimated are taken.
+        """
+        started = time.monotonic()
+        if self.requests and not self.requests.acquire(1, timeout):
+            raise RateLimitTimeout(f"{self.model_id}: request quota queue wait exceeded {timeout:.0f}s")
+        if self.tokens:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+            if not self.tokens.acquire(estimated_tokens, left):
+                if self.requests:
+                    self.requests.adjust(1)
+                raise RateLimitTimeout(f"{self.model_id}: token quota queue wait exceeded {timeout:.0f}s")
+        taken = min(estimated_tokens, self.tokens.capacity) if self.tokens else 0
+        return time.monotonic() - started, taken
+
+
+class Reservation:
+    """Handed out by ``rate_limited``; call ``settle`` with the real usage."""
+
+    def __init__(self, limiter, model_id, reserved_tokens, waited):
+        self.limiter = limiter
+        self.model_id = model_id
+        self.reserved_tokens = reserved_tokens  # what the token bucket actually gave us
+        self.waited = waited
+        self.settled = False
+
+    def settle(self, input_tokens, output_tokens):
+        """Record real usage and give back (or take) the difference from what was reserved."""
+        self.settled = True
+        usage.record(self.model_id, input_tokens, output_tokens, self.waited)
+        if self.limiter is not None and self.limiter.tokens is not None:
+            self.limiter.tokens.adjust(self.reserved_tokens - (input_tokens + output_tokens))
+
+
+class UsageTracker:
+    """Per-model request and token counters for the current day (tokens also fleet-wide when shared)."""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._day = date.today()
+        self._models = {}
+
+    def record(self, model_id, input_tokens, output_tokens, waited=0.0):
+        with self._lock:
+            if date.today() != self._day:
+                self._day, self._models = date.today(), {}
+            row = self._models.setdefault(model_id, {"requests": 0, "input_tokens": 0, "output_tokens": 0, "queued_seconds": 0.0})
+            row["requests"] += 1
+            row["input_tokens"] += input_tokens
+            row["output_tokens"] += output_tokens
+            row["queued_seconds"] += waited
+        backend = self.backend
+        if backend.shared and input_tokens + output_tokens:
+            backend.incr(f"usage:{date.today().isoformat()}:tokens", input_tokens + output_tokens, ttl=2 * 24 * 60 * 60)
+
+    @property
+    def backend(self):
+        return self._backend or get_shared_backend()
+
+    def snapshot(self):
+        with self._lock:
+            return {model: dict(row) for model, row in self._models.items()}
+
+    def total_tokens(self):
+        """Tokens used today: by every worker when the backend is shared, else by this process."""
+        if self.backend.shared:
+            return int(float(self.backend.get(f"usage:{date.today().isoformat()}:tokens") or 0))
+        with self._lock:
+            return sum(r["input_tokens"] + r["output_tokens"] for r in self._models.values())
+
+
+usage = UsageTracker()
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model_id):
+    """Process-wide limiter for ``model_id``, or None if the model has no limits."""
+    with _limiters_lock:
+        if model_id not in _limiters:
+            config = RATE_LIMITS.get(model_id)
+            if config is None:
+                _limiters[model_id] = None
+            else:
+                prefix, rpm, tpm = config
+                rpm = int(os.getenv(f"{prefix}_RPM", rpm or 0)) or None
+                tpm = int(os.getenv(f"{prefix}_TPM", tpm or 0)) or None
+                backend = get_shared_backend()
+                _limiters[model_id] = ModelLimiter(model_id, rpm, tpm, backend if backend.shared else None)
+        return _limiters[model_id]
+
+
+@contextmanager
+def rate_limited(model_id, estimated_tokens=0):
+    """Wait for a fair turn under ``model_id``'s limits, then run the block.
+
+    If the block never calls ``settle`` (e.g. it raised), the reserved tokens
+    are refunded and the request is still counted.
+    """
+    limiter = get_limiter(model_id)
+    waited, reserved = limiter.acquire(estimated_tokens) if limiter else (0.0, 0)
+    reservation = Reservation(limiter, model_id, reserved, waited)
+    try:
+        yield reservation
+    finally:
+        if not reservation.settled:
+            reservation.settle(0, 0)
+
+
+def limiter_snapshots():
+    with _limiters_lock:
+        limiters = [l for l in _limiters.values() if l is not None]
+    rows = []
+    for limiter in limiters:
+        for kind, bucket in (("requests/min", limiter.requests), ("tokens/min", limiter.tokens)):
+            if bucket is not None:
+                rows.append(dict(bucket.snapshot(), model=limiter.model_id, bucket=kind))
+    return rows
@@ -0,0 +1,141 @@
+"""Circuit breakers and latency tracking for the Nova -> Gemini fallback router.
+
+A breaker per provider trips OPEN after ``BREAKER_FAILURES`` consecutive
+failures, so calls skip a provider known to be down instead of waiting for its
+timeout. After ``BREAKER_COOLDOWN`` seconds it goes HALF-OPEN and lets a single
+probe through; the probe's outcome closes or re-opens it. State lives at module
+level, so every Streamlit session shares it.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+# Hedging: fire Gemini once Nova runs past its observed p95 latency
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "0") == "1"
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "4"))
+HEDGE_MIN_SAMPLES = 20
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with a cooldown."""
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self.trips = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go to this provider now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            # A probe that never reported back (e.g. an abandoned stream) expires after a cooldown
+            probe_stale = time.monotonic() - self._probe_started >= self.cooldown
+            if self.state == HALF_OPEN and (not self._probe_in_flight or probe_stale):
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error=""):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+            return {"provider": self.name, "state": self.state, "failures": self.failures,
+                    "trips": self.trips, "retry_in": retry_in, "last_error": self.last_error}
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+_breakers = {}
+_latencies = {}
+_registry_lock = threading.Lock()
+hedge_stats = {"fired": 0, "won_by_hedge": 0, "won_by_primary": 0}
+_hedge_lock = threading.Lock()
+
+
+def get_breaker(provider):
+    """Process-wide breaker for ``provider`` (created on first use)."""
+    with _registry_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(provider)
+        return breaker
+
+
+def get_latency_tracker(provider):
+    with _registry_lock:
+        tracker = _latencies.get(provider)
+        if tracker is None:
+            tracker = _latencies[provider] = LatencyTracker()
+        return tracker
+
+
+def hedge_delay(provider):
+    """Seconds to wait on ``provider`` before hedging: its p95, or a default until warmed up."""
+    p95 = get_latency_tracker(provider).percentile(0.95, min_samples=HEDGE_MIN_SAMPLES)
+    return HEDGE_DEFAULT_DELAY if p95 is None else p95
+
+
+def record_hedge(outcome):
+    """Count a hedging event: ``fired``, ``won_by_hedge`` or ``won_by_primary``."""
+    with _hedge_lock:
+        hedge_stats[outcome] += 1
+
+
+def breaker_snapshots():
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
@@ -0,0 +1,136 @@
+"""Batch posting-slot scheduler for the Smart Content Planner.
+
+Instead of one LLM call per post ("AI Decided"), every planned post in a
+batch is scored against every candidate slot in the horizon at once: a
+per-platform hour-of-day engagement curve, times an audience modifier, times
+a weekday weight, as a (posts x slots) NumPy matrix. Posts are then assigned
+greedily, best score first, without two posts on the same platform landing
+within ``MIN_GAP_MINUTES`` of each other (or of posts already in the calendar).
+"""
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SLOT_MINUTES = 30
+MIN_GAP_MINUTES = 120
+HORIZON_DAYS = 7
+
+
+def _curve(peaks, base=0.15):
+    """24-hour engagement curve from {hour: weight} peaks, smoothed over neighbours."""
+    curve = np.full(24, base)
+    for hour, weight in peaks.items():
+        for offset, falloff in ((-1, 0.5), (0, 1.0), (1, 0.5)):
+            h = (hour + offset) % 24
+            curve[h] = max(curve[h], weight * falloff)
+    return curve
+
+
+PLATFORM_CURVES = {
+    "YouTube Shorts": _curve({13: 0.7, 18: 0.8, 19: 0.9, 20: 1.0, 21: 0.95}),
+    "Instagram Reels": _curve({8: 0.7, 12: 0.75, 19: 0.9, 20: 1.0, 21: 0.9}),
+    "WhatsApp": _curve({7: 0.8, 8: 0.9, 13: 0.7, 20: 1.0}),
+    "Twitter": _curve({9: 0.9, 12: 0.8, 17: 0.85, 18: 1.0}),
+}
+DEFAULT_CURVE = _curve({12: 0.8, 19: 1.0, 20: 1.0})
+
+# Weekday weights (Mon..Sun) per platform
+WEEKDAY_WEIGHTS = {
+    "YouTube Shorts": np.array([0.9, 0.9, 0.9, 0.95, 1.0, 1.1, 1.1]),
+    "Instagram Reels": np.array([0.95, 0.95, 0.95, 1.0, 1.0, 1.1, 1.05]),
+    "WhatsApp": np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.95, 1.0]),
+    "Twitter": np.array([1.05, 1.05, 1.05, 1.0, 0.95, 0.85, 0.85]),
+}
+
+# Audience keyword -> hour-of-day multipliers
+AUDIENCE_MODIFIERS = [
+    (re.compile(r"gam(er|ing)|esport|free ?fire|bgmi", re.I), _curve({21: 1.4, 22: 1.5, 23: 1.3}, base=0.9)),
+    (re.compile(r"farm|kisan|agri|rural", re.I), _curve({6: 1.5, 7: 1.4, 19: 1.3, 20: 1.2}, base=0.8)),
+    (re.compile(r"student|exam|college|teen", re.I), _curve({16: 1.3, 17: 1.3, 21: 1.4, 22: 1.3}, base=0.9)),
+    (re.compile(r"program|developer|coder|tech|professional|office", re.I), _curve({8: 1.3, 13: 1.3, 21: 1.3, 22: 1.2}, base=0.9)),
+    (re.compile(r"trad|stock|invest|finance|market", re.I), _curve({8: 1.4, 9: 1.3, 15: 1.3, 16: 1.2}, base=0.9)),
+    (re.compile(r"mom|parent|home|women", re.I), _curve({11: 1.3, 14: 1.3, 15: 1.2}, base=0.9)),
+]
+
+
+def audience_modifier(audience):
+    modifier = np.ones(24)
+    for pattern, curve in AUDIENCE_MODIFIERS:
+        if pattern.search(audience or ""):
+            modifier = modifier * curve
+    return modifier
+
+
+def candidate_slots(start=None, days=HORIZON_DAYS, slot_minutes=SLOT_MINUTES):
+    """Slot start times from the next slot boundary after ``start`` across ``days`` days."""
+    start = start or datetime.now()
+    minute = (start.minute // slot_minutes + 1) * slot_minutes
+    first = start.replace(minute=0, second=0, microsecond=0) + timedelta(minutes=minute)
+    count = days * 24 * 60 // slot_minutes
+    return [first + timedelta(minutes=slot_minutes * i) for i in range(count)]
+
+
+def score_matrix(posts, slots):
+    """(posts x slots) engagement scores, fully vectorized over slots."""
+    hours = np.array([slot.hour for slot in slots])
+    weekdays = np.array([slot.weekday() for slot in slots])
+    curves = np.stack([PLATFORM_CURVES.get(p["platform"], DEFAULT_CURVE) * audience_modifier(p["audience"]) for p in posts])
+    weekday = np.stack([WEEKDAY_WEIGHTS.get(p["platform"], np.ones(7)) for p in posts])
+    return curves[:, hours] * weekday[:, weekdays]
+
+
+def schedule_batch(posts, taken=(), start=None, days=HORIZON_DAYS, min_gap_minutes=MIN_GAP_MINUTES):
+    """Assign each post a non-colliding slot; returns posts with ``scheduled_at`` and ``slot_score``.
+
+    ``taken`` is a list of (platform, datetime) already in the calendar.
+    Posts that cannot be placed inside the horizon come back without a slot.
+    """
+    if not posts:
+        return []
+    slots = candidate_slots(start, days)
+    minutes = np.array([(slot - slots[0]).total_seconds() / 60 for slot in slots])
+    scores = score_matrix(posts, slots)
+    platforms = np.array([p["platform"] for p in posts])
+
+    def block(platform, at_minutes):
+        rows = platforms == platform
+        cols = np.abs(minutes - at_minutes) < min_gap_minutes
+        scores[np.ix_(rows, cols)] = -np.inf
+
+    for platform, at in taken:
+        block(platform, (at - slots[0]).total_seconds() / 60)
+
+    scheduled = [dict(post) for post in posts]
+    for _ in range(len(posts)):
+        flat = int(np.argmax(scores))
+        row, col = divmod(flat, scores.shape[1])
+        best = scores[row, col]
+        if not np.isfinite(best):
+            break
+        scheduled[row]["scheduled_at"] = slots[col]
+        scheduled[row]["slot_score"] = round(float(best), 3)
+        scores[row, :] = -np.inf
+        block(platforms[row], minutes[col])
+    return scheduled
+
+
+def explanation_prompt(scheduled):
+    """One prompt asking the LLM to explain every slot in the batch at once."""
+    lines = "\n".join(
+        f"{i}. {p['platform']} post '{p['title']}' for {p['audience']} at {p['scheduled_at']:%A %I:%M %p}"
+        for i, p in enumerate(scheduled, 1)
+    )
+    return ("Act as a social media algorithm expert for Indian creators. For each numbered post below, "
+            "write a 1-sentence insight explaining why its scheduled time works for that audience. "
+            "Reply with exactly one line per post in the form 'N. insight'.\n\n" + lines)
+
+
+def parse_explanations(text, count):
+    """{1-based index: insight} from an 'N. insight' list."""
+    insights = {}
+    for match in re.finditer(r"^\s*(\d+)[.)]\s*(.+)$", text, re.M):
+        index = int(match.group(1))
+        if 1 <= index <= count:
+            insights.setdefault(index, match.group(2).strip())
+    return insights
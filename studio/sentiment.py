@@ -0,0 +1,198 @@
+"""Offline comment sentiment for the Bharat Analytics Hub.
+
+Comment exports run to hundreds of thousands of Hindi, Marathi, Hinglish and
+English comments. That is far too many to send to the LLM one by one, so they
+are scored locally:
+
+* Tokenization is script-aware. Devanagari words, Latin words (lower-cased,
+  with elongations like "sooo" squeezed) and emoji each become tokens.
+* Every token in the batch is looked up in one ``pd.Index.get_indexer`` call
+  against a small polarity lexicon. That lexicon covers English, romanized
+  Hinglish/Marathi, Devanagari Hindi/Marathi and emoji.
+* Negators flip one neighbouring word: English ones ("not", "never") the
+  word after them, Hindi/Marathi ones ("nahi", "नहीं", "नाही") the word
+  before them, so "good, not bad" and "accha nahi" both come out right.
+  Intensifiers ("very", "bahut", "खूप"...) scale the next one. Both are
+  applied with shifted NumPy masks, and per-comment scores come from one
+  ``np.bincount``.
+* Nukta letters have two encodings (ढ़ as one code point, or ढ plus
+  nukta). Comments and lexicon keys are both NFC-normalized, which settles
+  on the second, so either spelling matches.
+
+The LLM only sees a small sample stratified by label and script, and writes
+the summary.
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from studio.budget import fit_context
+
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+LABELS = ["Positive", "Neutral", "Negative"]
+
+LEXICON = {
+    # English
+    "good": 1, "great": 2, "awesome": 2, "amazing": 2, "excellent": 2, "best": 2, "love": 2, "loved": 2,
+    "nice": 1, "helpful": 1.5, "useful": 1.5, "informative": 1.5, "thanks": 1, "thank": 1, "superb": 2,
+    "brilliant": 2, "perfect": 2, "beautiful": 1.5, "fantastic": 2, "wow": 1.5, "like": 0.5, "liked": 1,
+    "clear": 1, "fun": 1, "funny": 1, "legend": 1.5, "inspiring": 1.5, "respect": 1,
+    "bad": -1, "worst": -2, "boring": -1.5, "waste": -2, "fake": -2, "scam": -2, "hate": -2, "poor": -1,
+    "useless": -2, "clickbait": -2, "terrible": -2, "awful": -2, "wrong": -1, "misleading": -2,
+    "disappointed": -1.5, "disappointing": -1.5, "annoying": -1.5, "stupid": -1.5, "cringe": -1.5,
+    "spam": -1.5, "slow": -0.5, "lag": -1, "loud": -0.5, "confusing": -1, "unsubscribe": -2, "dislike": -1.5,
+    # Romanized Hindi / Marathi
+    "accha": 1, "acha": 1, "achha": 1, "badhiya": 1.5, "badiya": 1.5, "mast": 1.5, "zabardast": 2,
+    "jabardast": 2, "shandar": 2, "shaandar": 2, "kamaal": 2, "kamal": 1.5, "dhansu": 2, "bhari": 1.5,
+    "chhan": 1.5, "chan": 1, "sundar": 1.5, "dhanyavad": 1, "dhanyawad": 1, "shukriya": 1, "sahi": 1,
+    "ekdum": 0.5, "jhakas": 2, "lajawab": 2, "behtareen": 2,
+    "bakwas": -2, "bekar": -1.5, "bekaar": -1.5, "ghatiya": -2, "faltu": -1.5, "bura": -1, "kharab": -1.5,
+    "bokwas": -2, "pakau": -1.5, "bakwaas": -2, "dhokha": -2, "jhooth": -1.5, "jhoot": -1.5, "vait": -1.5,
+    # Devanagari Hindi / Marathi
+    "अच्छा": 1, "अच्छी": 1, "बढ़िया": 1.5, "शानदार": 2, "जबरदस्त": 2, "ज़बरदस्त": 2,
+    "मस्त": 1.5, "धन्यवाद": 1, "शुक्रिया": 1, "सुंदर": 1.5, "कमाल": 2, "उपयोगी": 1.5, "सही": 1,
+    "छान": 1.5, "भारी": 1.5, "खूपच": 1, "आवडला": 1.5, "आवडले": 1.5, "उत्तम": 2, "अप्रतिम": 2,
+    "बकवास": -2, "बेकार": -1.5, "घटिया": -2, "बुरा": -1, "खराब": -1.5, "झूठ": -1.5, "धोखा": -2,
+    "फालतू": -1.5, "वाईट": -1.5, "बोगस": -2,
+    # Emoji
+    "❤️": 1.5, "❤": 1.5, "😍": 2, "🔥": 1.5, "👍": 1, "👏": 1.5, "🙏": 1, "😊": 1, "😂": 0.5, "🥰": 2, "💯": 1.5,
+    "👎": -1.5, "😡": -2, "😠": -1.5, "🤮": -2, "😒": -1, "😞": -1, "💩": -2, "🤬": -2,
+}
+# English negators come before the word they flip; Hindi/Marathi ones ("accha nahi") after it
+FORWARD_NEGATORS = {"not", "no", "never", "dont", "don't", "isnt", "isn't"}
+BACKWARD_NEGATORS = {"nahi", "nahin", "nai", "mat", "na", "nako", "nahit", "नहीं", "नही", "मत", "ना", "नाही", "नको"}
+INTENSIFIERS = {"very": 1.5, "so": 1.3, "really": 1.3, "too": 1.3, "extremely": 1.8, "bahut": 1.5, "bohot": 1.5,
+                "bhot": 1.5, "khup": 1.5, "ekdam": 1.3, "बहुत": 1.5, "खूप": 1.5, "एकदम": 1.3}
+
+TOKEN = re.compile(
+    r"[ऀ-ॿ]+"                          # Devanagari word (Hindi, Marathi)
+    r"|[a-z]+(?:'[a-z]+)?"                       # Latin word (English, Hinglish)
+    r"|[☀-➿\U0001F300-\U0001FAFF]️?"  # emoji
+)
+ELONGATION = re.compile(r"([a-z])\1{2,}")
+DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+LATIN = re.compile(r"[A-Za-z]")
+
+
+def normalize(text):
+    """NFC form, so nukta letters match whether typed as one code point or two."""
+    return unicodedata.normalize("NFC", str(text))
+
+
+_lexicon_index = pd.Index([normalize(word) for word in LEXICON])
+_lexicon_values = np.array(list(LEXICON.values()), dtype=np.float32)
+_modifier_index = pd.Index([normalize(word) for word in INTENSIFIERS])
+_modifier_values = np.array(list(INTENSIFIERS.values()), dtype=np.float32)
+_forward_negator_index = pd.Index([normalize(word) for word in FORWARD_NEGATORS])
+_backward_negator_index = pd.Index([normalize(word) for word in BACKWARD_NEGATORS])
+
+SentimentReport = namedtuple("SentimentReport", "scores labels split by_script sample")
+
+
+def tokenize(text):
+    return TOKEN.findall(ELONGATION.sub(r"\1\1", normalize(text).lower()))
+
+
+def script_of(text):
+    """'Devanagari', 'Latin' (English/Hinglish), 'Mixed' or 'Other'."""
+    deva, latin = bool(DEVANAGARI.search(text)), bool(LATIN.search(text))
+    return "Mixed" if deva and latin else "Devanagari" if deva else "Latin" if latin else "Other"
+
+
+def score_comments(comments):
+    """Polarity score per comment (positive > 0), vectorized over the whole batch."""
+    tokens_per_comment = [tokenize(c) for c in comments]
+    counts = np.fromiter((len(t) for t in tokens_per_comment), dtype=np.int64, count=len(tokens_per_comment))
+    if not counts.sum():
+        return np.zeros(len(comments), dtype=np.float32)
+    tokens = [tok for toks in tokens_per_comment for tok in toks]
+    owner = np.repeat(np.arange(len(comments)), counts)
+
+    hit = _lexicon_index.get_indexer(tokens)
+    polarity = np.where(hit >= 0, _lexicon_values[hit], 0).astype(np.float32)
+    modifier_hit = _modifier_index.get_indexer(tokens)
+    modifier = np.where(modifier_hit >= 0, _modifier_values[modifier_hit], 1).astype(np.float32)
+    forward = _forward_negator_index.get_indexer(tokens) >= 0
+    backward = _backward_negator_index.get_indexer(tokens) >= 0
+
+    same_prev = np.r_[False, owner[1:] == owner[:-1]]
+    same_next = np.r_[owner[:-1] == owner[1:], False]
+    # Intensifier scales the following word; English negators flip the word after, Hindi/Marathi the word before
+    polarity *= np.where(same_prev, np.r_[1, modifier[:-1]], 1)
+    negated = (same_prev & np.r_[False, forward[:-1]]) | (same_next & np.r_[backward[1:], False])
+    polarity = np.where(negated, -polarity, polarity)
+
+    total = np.bincount(owner, weights=polarity, minlength=len(comments))
+    return (total / np.sqrt(np.maximum(counts, 1))).astype(np.float32)
+
+
+def label_scores(scores):
+    return np.where(scores > POSITIVE_THRESHOLD, 0, np.where(scores < NEGATIVE_THRESHOLD, 2, 1))
+
+
+def stratified_sample(comments, labels, scripts, size=40, seed=0):
+    """Up to ``size`` comments drawn proportionally from every (label, script) stratum, at least one each."""
+    frame = pd.DataFrame({"comment": comments, "label": labels, "script": scripts}).drop_duplicates("comment")
+    groups = frame.groupby(["label", "script"], observed=True)
+    rng = np.random.default_rng(seed)
+    picks = []
+    for _, group in groups:
+        take = max(1, round(size * len(group) / len(frame)))
+        picks.append(group.iloc[rng.choice(len(group), min(take, len(group)), replace=False)])
+    return pd.concat(picks).head(size) if picks else frame.head(0)
+
+
+def analyze(comments, sample_size=40):
+    """Score a batch of comments and build the dashboard summary."""
+    comments = pd.Series(comments, dtype="string").dropna()
+    comments = comments[comments.str.strip() != ""].tolist()
+    scores = score_comments(comments)
+    labels = np.array(LABELS, dtype=object)[label_scores(scores)]
+    scripts = np.array([script_of(c) for c in comments], dtype=object)
+    frame = pd.DataFrame({"label": labels, "script": scripts})
+    split = frame["label"].value_counts().reindex(LABELS, fill_value=0)
+    by_script = pd.crosstab(frame["script"], frame["label"]).reindex(columns=LABELS, fill_value=0)
+    sample = stratified_sample(comments, labels, scripts, size=sample_size)
+    return SentimentReport(scores, labels, split, by_script, sample)
+
+
+def summary_prompt(report, topic=""):
+    """One LLM prompt over the stratified sample, with the locally computed split as ground truth."""
+    total = int(report.split.sum()) or 1
+    shares = ", ".join(f"{label} {count / total * 100:.0f}%" for label, count in report.split.items())
+    lines = "\n".join(f"- [{row.label}] {row.comment[:200]}" for row in report.sample.itertuples())
+    lines = fit_context(lines, "analytics")
+    about = f" about '{topic}'" if topic else ""
+    return (f"An Indian creator's video{about} received {total} comments. Measured sentiment: {shares}. "
+            f"Here is a representative sample of comments:\n{lines}\n\n"
+            "Summarize the main themes in the positive and negative comments in 2-3 sentences, "
+            "then give a 1 sentence tip to improve the next video.")
+
+
+COMMENT_COLUMNS = ["comment", "comments", "text", "textdisplay", "textoriginal", "comment text", "message", "body"]
+
+
+def load_comments(source, name):
+    """Comment texts from a CSV/JSONL export (comment column only) or a plain text file (one per line)."""
+    lower = name.lower()
+    if lower.endswith(".txt"):
+        data = source.read() if hasattr(source, "read") else open(source, "rb").read()
+        text = data.decode("utf-8", errors="replace") if isinstance(data, bytes) else data
+        return [line for line in text.splitlines() if line.strip()]
+    if lower.endswith((".jsonl", ".json")):
+        frame = pd.read_json(source, lines=lower.endswith(".jsonl"))
+        header = frame.columns
+    else:
+        header = pd.read_csv(source, nrows=0).columns
+        if hasattr(source, "seek"):
+            source.seek(0)
+    column = next((c for c in header if str(c).strip().lower() in COMMENT_COLUMNS), None)
+    if column is None:
+        raise ValueError(f"no comment column (expected one of: {', '.join(COMMENT_COLUMNS)})")
+    if lower.endswith((".jsonl", ".json")):
+        return frame[column].dropna().astype(str).tolist()
+    return pd.read_csv(source, usecols=[column], dtype={column: "string"})[column].dropna().tolist()
@@ -0,0 +1,457 @@
+"""Shared state backend so several Streamlit worker processes act as one studio.
+
+A Streamlit session is pinned to one process by its websocket, so
+``st.session_state`` can stay local. The process-wide state behind it could
+not: the response cache, the rate-limit buckets, the daily token quota,
+in-flight request coalescing and generated images. With four workers
+behind a load balancer, the same prompt was paid for up to four times, and
+each worker allowed the full provider rate on its own.
+
+Each of those now goes through one small backend interface: ``get``,
+``set``, ``delete``, ``delete_prefix`` and ``update`` (an atomic
+read-modify-write). Leases, counters and token buckets are built on
+``update``. Three implementations exist:
+
+* ``LocalBackend`` is plain process memory. It is the default, and it keeps
+  the single-process setup as it was (the SQLite response cache, local buckets).
+* ``SQLiteBackend`` is one WAL-mode SQLite file. Writes are serialized
+  with ``BEGIN IMMEDIATE``, which is safe for any number of processes on
+  one host.
+* ``KVBackend`` is a networked key-value store. It needs a client with
+  ``get``, ``set``, ``delete``, ``delete_prefix`` and ``cas``
+  (compare-and-set). ``KVClient`` speaks to the stand-in server in this
+  module; a Redis adapter only has to provide the same five calls.
+
+Run the stand-in with ``python -m studio.shared serve --port 7379``.
+
+Environment knob: ``SHARED_BACKEND``. It is ``local`` (the default),
+``sqlite:///path/to/state.db`` or ``kv://host:port``. ``SHARED_LEASE_SECONDS``
+(default 30) bounds how long other workers wait on an in-flight request
+before they make the call themselves.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+
+from studio.metrics import metrics
+
+LEASE_SECONDS = float(os.getenv("SHARED_LEASE_SECONDS", "30"))
+POLL_SECONDS = 0.05
+
+
+class SharedBackend:
+    """Interface: string values with optional TTL (seconds), plus atomic ``update``."""
+
+    shared = True  # False only for LocalBackend: nothing outside this process sees it
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def update(self, key, fn, ttl=None):
+        """Atomically ``new, result = fn(current or None)``; stores ``new`` (None deletes) and returns ``result``."""
+        raise NotImplementedError
+
+    def describe(self):
+        return type(self).__name__
+
+    # --- Built on update ---
+    def add(self, key, value, ttl=None):
+        """Set ``key`` only if absent; True if this call set it (a lease)."""
+        return self.update(key, lambda old: (old, False) if old is not None else (value, True), ttl)
+
+    def release(self, key, value):
+        """Delete ``key`` only if it still holds ``value`` (our own lease)."""
+        return self.update(key, lambda old: (None, True) if old == value else (old, False))
+
+    def incr(self, key, amount=1, ttl=None):
+        def bump(old):
+            total = float(old or 0) + amount
+            return repr(total), total
+        return self.update(key, bump, ttl)
+
+    def take(self, bucket, amount, capacity, rate, force=False):
+        """Token bucket: take ``amount`` if available; returns seconds to wait (0 = granted).
+
+        ``force`` always applies it, so a negative amount refunds and a late debit can overdraw.
+        """
+        def refill(old):
+            now = time.time()
+            tokens, updated = json.loads(old) if old else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            if force or amount <= tokens:
+                return json.dumps([min(capacity, tokens - amount), now]), 0.0
+            return json.dumps([tokens, now]), (amount - tokens) / rate
+        return self.update(f"bucket:{bucket}", refill, ttl=max(60.0, capacity / rate * 2))
+
+    def level(self, bucket, capacity, rate):
+        """Tokens currently in ``bucket`` (refilled to now)."""
+        raw = self.get(f"bucket:{bucket}")
+        if not raw:
+            return capacity
+        tokens, updated = json.loads(raw)
+        return min(capacity, tokens + max(0.0, time.time() - updated) * rate)
+
+
+class LocalBackend(SharedBackend):
+    """Process memory (the single-worker default)."""
+
+    shared = False
+
+    def __init__(self):
+        self._items = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._items.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._items[key]
+            return None
+        return None if entry is None else entry[0]
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._items[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                del self._items[key]
+
+    def update(self, key, fn, ttl=None):
+        with self._lock:
+            new, result = fn(self._live(key))
+            if new is None:
+                self._items.pop(key, None)
+            else:
+                self._items[key] = (new, time.time() + ttl if ttl else None)
+            return result
+
+    def describe(self):
+        return "local (this process only)"
+
+
+class SQLiteBackend(SharedBackend):
+    """One SQLite file shared by every process on the host; ``update`` runs under BEGIN IMMEDIATE."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+
+    def _db(self):
+        # One connection per thread: sqlite3 connections must not be shared across threads mid-transaction
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key):
+        row = self._db().execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        db = self._db()
+        db.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                   (key, value, time.time() + ttl if ttl else None))
+        self._writes += 1
+        if self._writes % 500 == 0 and not db.in_transaction:
+            db.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        self._db().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix):
+        self._db().execute("DELETE FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def update(self, key, fn, ttl=None):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            new, result = fn(self.get(key))
+            if new is None:
+                self.delete(key)
+            else:
+                self.set(key, new, ttl)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return result
+
+    def describe(self):
+        return f"sqlite:///{self.path}"
+
+
+class KVBackend(SharedBackend):
+    """Networked key-value store; ``update`` is a compare-and-set retry loop."""
+
+    def __init__(self, client, name="kv"):
+        self.client = client
+        self.name = name
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def delete_prefix(self, prefix):
+        self.client.delete_prefix(prefix)
+
+    def update(self, key, fn, ttl=None):
+        while True:
+            old = self.client.get(key)
+            new, result = fn(old)
+            if new == old or self.client.cas(key, old, new, ttl):
+                return result
+
+    def describe(self):
+        return self.name
+
+
+# --- Local stand-in for a networked KV (newline-delimited JSON over TCP) ---
+class KVClient:
+    """Client for ``KVServer``; one socket per thread, reconnected on failure."""
+
+    def __init__(self, host="127.0.0.1", port=7379, timeout=10):
+        self.address = (host, int(port))
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _call(self, **request):
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            try:
+                if conn is None:
+                    sock = socket.create_connection(self.address, timeout=self.timeout)
+                    conn = self._local.conn = (sock, sock.makefile("rb"))
+                conn[0].sendall(json.dumps(request).encode("utf-8") + b"\n")
+                line = conn[1].readline()
+                if not line:
+                    raise ConnectionError("kv server closed the connection")
+                reply = json.loads(line)
+                if "error" in reply:
+                    raise RuntimeError(reply["error"])
+                return reply.get("value")
+            except (OSError, ConnectionError):
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+    def get(self, key):
+        return self._call(op="get", key=key)
+
+    def set(self, key, value, ttl=None):
+        self._call(op="set", key=key, value=value, ttl=ttl)
+
+    def delete(self, key):
+        self._call(op="delete", key=key)
+
+    def delete_prefix(self, prefix):
+        self._call(op="delete_prefix", key=prefix)
+
+    def cas(self, key, expected, value, ttl=None):
+        """Write ``value`` (None deletes) only if ``key`` still holds ``expected``; True on success."""
+        return self._call(op="cas", key=key, expected=expected, value=value, ttl=ttl)
+
+
+class KVServer(socketserver.ThreadingTCPServer):
+    """In-memory KV for development and load tests; a Redis-shaped stand-in."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 7379)):
+        self.store = LocalBackend()
+        super().__init__(address, _KVHandler)
+
+    def apply(self, request):
+        op, key, store = request["op"], request["key"], self.store
+        if op == "get":
+            return store.get(key)
+        if op == "set":
+            return store.set(key, request["value"], request.get("ttl"))
+        if op == "delete":
+            return store.delete(key)
+        if op == "delete_prefix":
+            return store.delete_prefix(key)
+        if op == "cas":
+            expected, value = request.get("expected"), request.get("value")
+            return store.update(key, lambda old: (value, True) if old == expected else (old, False), request.get("ttl"))
+        raise ValueError(f"unknown op {op!r}")
+
+
+class _KVHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = {"value": self.server.apply(json.loads(line))}
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+def start_kv_server(host="127.0.0.1", port=0):
+    """Serve a KVServer from a daemon thread; returns it (``server.server_address`` has the bound port)."""
+    server = KVServer((host, port))
+    threading.Thread(target=server.serve_forever, name="kv-server", daemon=True).start()
+    return server
+
+
+def backend_from_url(url):
+    """``local``, ``sqlite:///path`` or ``kv://host:port`` -> a SharedBackend."""
+    if not url or url == "local":
+        return LocalBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith("kv://"):
+        host, _, port = url[len("kv://"):].rstrip("/").partition(":")
+        return KVBackend(KVClient(host or "127.0.0.1", port or 7379), name=url)
+    raise ValueError(f"unsupported SHARED_BACKEND {url!r}; expected local, sqlite:///path or kv://host:port")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_shared_backend():
+    """Process-wide backend chosen by ``SHARED_BACKEND``."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_url(os.getenv("SHARED_BACKEND", "local"))
+    return _backend
+
+
+# --- Request coalescing ---
+class Coalescer:
+    """Identical concurrent requests run once: per process via Events, across workers via a backend lease.
+
+    ``run(key, lookup, compute)``: ``lookup()`` returns a finished answer or
+    None (normally a cache read); ``compute()`` returns ``(value, ok)`` and is
+    expected to store successful answers where ``lookup`` finds them.
+    """
+
+    def __init__(self, backend=None, lease_seconds=LEASE_SECONDS):
+        self._backend = backend
+        self.lease_seconds = lease_seconds
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(3).hex()}"
+
+    @property
+    def backend(self):
+        return self._backend or get_shared_backend()
+
+    def run(self, key, lookup, compute, page=None):
+        with self._lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                leader = self._inflight[key] = _Flight()
+                mine = True
+            else:
+                mine = False
+        if not mine:
+            leader.done.wait()
+            metrics.inc("coalesced_requests_total", scope="process", page=page or "other")
+            if leader.result is not None and leader.result[1]:
+                return leader.result
+            return compute()
+        try:
+            leader.result = self._lead(key, lookup, compute, page)
+            return leader.result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            leader.done.set()
+
+    def _lead(self, key, lookup, compute, page):
+        backend = self.backend
+        if not backend.shared:
+            return compute()
+        lease = f"lease:{key}"
+        deadline = time.monotonic() + self.lease_seconds
+        while not backend.add(lease, self.owner, ttl=self.lease_seconds):
+            # Another worker is making this call; wait for its answer instead of paying twice
+            found = lookup()
+            if found is not None:
+                metrics.inc("coalesced_requests_total", scope="fleet", page=page or "other")
+                return found, True
+            if time.monotonic() > deadline:
+                return compute()
+            time.sleep(POLL_SECONDS)
+        try:
+            found = lookup()  # it may have landed between our miss and taking the lease
+            return (found, True) if found is not None else compute()
+        finally:
+            backend.release(lease, self.owner)
+
+
+class _Flight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_coalescer = None
+
+
+def get_coalescer():
+    """Process-wide Coalescer on the shared backend."""
+    global _coalescer
+    if _coalescer is None:
+        with _backend_lock:
+            if _coalescer is None:
+                _coalescer = Coalescer()
+    return _coalescer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DigitalBharat shared-state tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the stand-in networked KV server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=7379)
+    args = parser.parse_args(argv)
+    server = KVServer((args.host, args.port))
+    print(f"KV stand-in listening on kv://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Trend Radar results shared by every session (stale-while-revalidate).
+
+Scans are keyed by (location, niche, language) and kept in one process-wide
+store. A scan that is still fresh is returned immediately. A stale one is
+also returned immediately, and a refresh is started in the background. Only
+a key that has never been scanned makes the caller wait. Concurrent requests
+for the same key share one in-flight upstream call. A scheduler thread
+re-scans every key that was viewed recently, plus a configured watchlist, so
+popular niches are usually fresh before anyone clicks.
+
+With a shared ``SHARED_BACKEND`` (see ``studio.shared``), every finished scan
+is also written to the shared store, and a refresh first looks there. Worker
+processes adopt each other's fresh scans, and a lease lets only one of them
+make the upstream call. N workers cost one scan per key per ``TREND_MAX_AGE``,
+not N.
+
+Environment knobs: ``TREND_MAX_AGE`` (seconds before a scan is stale; defaults
+to the trend_radar cache TTL), ``TREND_REFRESH_INTERVAL`` (scheduler tick,
+default 60 s), ``TREND_KEEP_WARM`` (how long a viewed key keeps being
+refreshed, default 6 h) and ``TREND_WATCHLIST`` (``State|Niche|Language``
+entries separated by ``;``).
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from studio.cache import FEATURE_TTLS
+from studio.engine import get_llm_result
+from studio.prompts import trend_prompt
+from studio.shared import get_coalescer, get_shared_backend
+
+MAX_AGE = float(os.getenv("TREND_MAX_AGE", str(FEATURE_TTLS["trend_radar"])))
+REFRESH_INTERVAL = float(os.getenv("TREND_REFRESH_INTERVAL", "60"))
+KEEP_WARM = float(os.getenv("TREND_KEEP_WARM", str(6 * 60 * 60)))
+
+TrendScan = namedtuple("TrendScan", "text fetched_at error")
+TrendView = namedtuple("TrendView", "scan stale refreshing")
+
+
+def trend_key(state, niche, language):
+    return (" ".join((state or "All India").split()).title(),
+            " ".join((niche or "General").split()).title(),
+            language)
+
+
+def parse_watchlist(raw):
+    keys = []
+    for entry in (raw or "").split(";"):
+        parts = [p.strip() for p in entry.split("|")]
+        if len(parts) == 3 and all(parts):
+            keys.append(trend_key(*parts))
+    return keys
+
+
+class TrendRadar:
+    """Process-wide trend store with coalesced background refreshes."""
+
+    def __init__(self, fetch=None, max_age=MAX_AGE, keep_warm=KEEP_WARM, workers=4):
+        self._fetch = fetch or self._fetch_llm
+        self.max_age = max_age
+        self.keep_warm = keep_warm
+        self._scans = {}
+        self._inflight = {}
+        self._last_viewed = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trend-refresh")
+        self._scheduler = None
+        self._stop = threading.Event()
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _fetch_llm(key):
+        result = get_llm_result(trend_prompt(*key), feature="trend_radar", use_cache=False)
+        return result.text, result.error
+
+    def _scan(self, key):
+        """One upstream scan as a TrendScan."""
+        with self._lock:
+            self.upstream_calls += 1
+        try:
+            text, error = self._fetch(key)
+        except Exception as e:
+            text, error = f"⚠️ Trend scan failed: {e}", str(e)
+        return TrendScan(text, time.time(), error)
+
+    def _fleet_scan(self, key, force):
+        """A fresh scan from another worker if there is one, else ours, made once across the fleet."""
+        backend = get_shared_backend()
+        if not backend.shared:
+            return self._scan(key)
+        name = "trend:" + "|".join(key)
+
+        def lookup():
+            raw = backend.get(name)
+            if raw is None:
+                return None
+            fetched_at, _, text = raw.partition("\x00")
+            fetched_at = float(fetched_at)
+            return TrendScan(text, fetched_at, None) if time.time() - fetched_at <= self.max_age else None
+
+        def compute():
+            scan = self._scan(key)
+            if scan.error is None:
+                backend.set(name, f"{scan.fetched_at!r}\x00{scan.text}", ttl=self.max_age)
+            return scan, scan.error is None
+
+        if force:
+            return compute()[0]
+        found = lookup()
+        if found is not None:
+            with self._lock:
+                self.coalesced += 1
+            return found
+        return get_coalescer().run(name, lookup, compute, page="trend_radar")[0]
+
+    def _run(self, key, force=False):
+        try:
+            scan = self._fleet_scan(key, force)
+        except Exception as e:  # shared backend or lease trouble: keep serving, retry next tick
+            print(f"Trend refresh failed for {key}: {e}")
+            scan = TrendScan(f"⚠️ Trend scan failed: {e}", time.time(), str(e))
+        with self._lock:
+            try:
+                previous = self._scans.get(key)
+                # A failed refresh keeps serving the last good scan
+                if scan.error is None or previous is None or previous.error is not None:
+                    self._scans[key] = scan
+                return self._scans[key]
+            finally:
+                del self._inflight[key]
+
+    def refresh(self, key, force=False):
+        """Start (or join) the scan for ``key``; returns its Future.
+
+        ``force`` skips scans other workers shared and always calls upstream.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._pool.submit(self._run, key, force)
+            self._inflight[key] = future
+            return future
+
+    def get(self, key, force=False, timeout=None):
+        """Stale-while-revalidate lookup; waits only when there is nothing to serve (or ``force``)."""
+        with self._lock:
+            self._last_viewed[key] = time.time()
+            scan = self._scans.get(key)
+        stale = scan is None or time.time() - scan.fetched_at > self.max_age or scan.error is not None
+        if scan is None or force:
+            scan = self.refresh(key, force).result(timeout)
+            return TrendView(scan, False, False)
+        if stale:
+            self.refresh(key)
+        with self._lock:
+            refreshing = key in self._inflight
+        return TrendView(scan, stale, refreshing)
+
+    def peek(self, key):
+        with self._lock:
+            scan = self._scans.get(key)
+            refreshing = key in self._inflight
+        if scan is None:
+            return None
+        return TrendView(scan, time.time() - scan.fetched_at > self.max_age, refreshing)
+
+    def watch(self, keys):
+        """Keep ``keys`` refreshed by the scheduler regardless of traffic."""
+        with self._lock:
+            self._pinned.update(keys)
+
+    def refresh_due(self):
+        """Scheduler tick: refresh every stale key that is pinned or was viewed recently."""
+        now = time.time()
+        with self._lock:
+            for key, seen in list(self._last_viewed.items()):
+                if now - seen > self.keep_warm:
+                    del self._last_viewed[key]
+            keys = self._pinned | set(self._last_viewed)
+            due = [k for k in keys if k not in self._inflight and
+                   (k not in self._scans or self._scans[k].error is not None
+                    or now - self._scans[k].fetched_at > self.max_age)]
+        for key in due:
+            self.refresh(key)
+        return due
+
+    def start(self, interval=REFRESH_INTERVAL):
+        """Run refresh_due() every ``interval`` seconds on a daemon thread (idempotent)."""
+        with self._lock:
+            if self._scheduler is not None:
+                return
+
+            def loop():
+                while not self._stop.wait(interval):
+                    self.refresh_due()
+
+            self._scheduler = threading.Thread(target=loop, name="trend-scheduler", daemon=True)
+            self._scheduler.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        with self._lock:
+            return {"keys": len(self._scans), "inflight": len(self._inflight), "watched": len(self._pinned | set(self._last_viewed)),
+                    "upstream_calls": self.upstream_calls, "coalesced": self.coalesced}
+
+
+_radar = None
+_radar_lock = threading.Lock()
+
+
+def get_trend_radar():
+    """Process-wide TrendRadar with its scheduler running."""
+    global _radar
+    if _radar is None:
+        with _radar_lock:
+            if _radar is None:
+                radar = TrendRadar()
+                radar.watch(parse_watchlist(os.getenv("TREND_WATCHLIST", "")))
+                radar.start()
+                _radar = radar
+    return _radar
@@ -0,0 +1,218 @@
+"""Sentence-chunked, cached, parallel text-to-speech for AI Saarthi.
+
+An answer is split into sentences (Devanagari-aware: ``।`` and ``॥`` end a
+sentence just like ``.``, ``!`` and ``?``), each sentence is synthesized on a
+shared thread pool, and the audio is joined back in order. Every chunk is
+cached on disk by (backend, text, lang, tld), so common phrases are only ever
+synthesized once. ``IncrementalSpeech`` starts synthesizing sentences while
+the LLM answer is still streaming in.
+
+Backends are pluggable: anything with ``name``, ``mime`` and
+``synthesize(text, lang, tld) -> bytes``. ``GTTSBackend`` is the default;
+``ToneBackend`` is an offline stand-in for tests and air-gapped demos.
+Environment knobs: ``TTS_BACKEND`` (``gtts`` / ``tone``), ``TTS_WORKERS``,
+``TTS_CACHE_DIR``.
+"""
+import hashlib
+import importlib.util
+import io
+import math
+import os
+import re
+import struct
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from studio.metrics import metrics
+
+# gTTS is imported on first synthesis; only check that it is installed here
+GTTS_AVAILABLE = importlib.util.find_spec("gtts") is not None
+
+SENTENCE_END = re.compile(r"(?<=[।॥.!?])\s+|\n+")
+MIN_CHUNK_CHARS = 40
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+
+
+def split_sentences(text, min_chars=MIN_CHUNK_CHARS):
+    """Split text into sentence chunks, merging fragments shorter than ``min_chars``."""
+    chunks, pending = [], ""
+    for piece in SENTENCE_END.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        chunks.append(pending)
+    return chunks
+
+
+class GTTSBackend:
+    """Google Translate TTS via gTTS (needs network)."""
+    name = "gtts"
+    mime = "audio/mp3"
+
+    def synthesize(self, text, lang, tld=None):
+        from gtts import gTTS
+        tts = gTTS(text=text, lang=lang, tld=tld) if tld else gTTS(text=text, lang=lang)
+        fp = io.BytesIO()
+        tts.write_to_fp(fp)
+        return fp.getvalue()
+
+
+class ToneBackend:
+    """Offline stand-in: a short WAV tone per chunk, length proportional to the text."""
+    name = "tone"
+    mime = "audio/wav"
+    sample_rate = 16000
+
+    def synthesize(self, text, lang, tld=None):
+        frames = int(self.sample_rate * min(0.04 * len(text), 10.0))
+        pitch = 330 + (sum(map(ord, lang)) % 5) * 55
+        samples = (int(8000 * math.sin(2 * math.pi * pitch * i / self.sample_rate)) for i in range(frames))
+        out = io.BytesIO()
+        with wave.open(out, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(b"".join(struct.pack("<h", s) for s in samples))
+        return out.getvalue()
+
+
+def join_audio(parts, mime):
+    """Concatenate chunk audio: MP3 frames join byte-wise, WAV needs one header."""
+    if mime != "audio/wav":
+        return b"".join(parts)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as joined:
+        for i, part in enumerate(parts):
+            with wave.open(io.BytesIO(part), "rb") as w:
+                if i == 0:
+                    joined.setparams(w.getparams())
+                joined.writeframes(w.readframes(w.getnframes()))
+    return out.getvalue()
+
+
+class ChunkCache:
+    """Disk cache of synthesized chunks keyed by (backend, text, lang, tld)."""
+
+    def __init__(self, root):
+        self.root = root
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, backend, text, lang, tld):
+        key = hashlib.sha256(f"{backend.name}\x00{lang}\x00{tld}\x00{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key)
+
+    def get(self, backend, text, lang, tld):
+        try:
+            with open(self._path(backend, text, lang, tld), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return data
+
+    def put(self, backend, text, lang, tld, data):
+        path = self._path(backend, text, lang, tld)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chunk_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ChunkCache(os.getenv("TTS_CACHE_DIR", os.path.join(".cache", "tts")))
+    return _cache
+
+
+def default_backend():
+    """Backend named by ``TTS_BACKEND``; gTTS when installed, else None."""
+    choice = os.getenv("TTS_BACKEND", "gtts")
+    if choice == "tone":
+        return ToneBackend()
+    return GTTSBackend() if GTTS_AVAILABLE else None
+
+
+def _synthesize_chunk(backend, text, lang, tld):
+    cache = get_chunk_cache()
+    data = cache.get(backend, text, lang, tld)
+    metrics.inc("cache_lookups_total", cache="tts", page="saarthi", result="miss" if data is None else "hit")
+    if data is None:
+        labels = {"provider": backend.name, "model": f"tts-{lang}", "page": "saarthi"}
+        with metrics.timer("upstream_call_seconds", **labels):
+            try:
+                data = backend.synthesize(text, lang, tld)
+            except Exception:
+                metrics.inc("upstream_calls_total", outcome="error", **labels)
+                raise
+        metrics.inc("upstream_calls_total", outcome="ok", **labels)
+        cache.put(backend, text, lang, tld, data)
+    return data
+
+
+class IncrementalSpeech:
+    """Feed streamed text in; complete sentences are synthesized in the background.
+
+    ``finish()`` flushes the tail, waits for every chunk and returns the joined
+    audio bytes (raising the first chunk error, if any).
+    """
+
+    def __init__(self, lang, tld=None, backend=None):
+        self.lang = lang
+        self.tld = tld
+        self.backend = backend or default_backend()
+        self._buffer = ""
+        self._pending = ""
+        self._futures = []
+
+    @property
+    def mime(self):
+        return self.backend.mime
+
+    def feed(self, text):
+        self._buffer += text
+        pieces = SENTENCE_END.split(self._buffer)
+        self._buffer = pieces.pop()
+        for piece in pieces:
+            piece = piece.strip()
+            if piece:
+                self._pending = f"{self._pending} {piece}" if self._pending else piece
+                if len(self._pending) >= MIN_CHUNK_CHARS:
+                    self._submit(self._pending)
+                    self._pending = ""
+
+    def finish(self):
+        tail = " ".join(p for p in (self._pending, self._buffer.strip()) if p)
+        if tail:
+            self._submit(tail)
+        self._pending = self._buffer = ""
+        return join_audio([future.result() for future in self._futures], self.backend.mime)
+
+    def _submit(self, chunk):
+        self._futures.append(_pool.submit(_synthesize_chunk, self.backend, chunk, self.lang, self.tld))
+
+
+def synthesize(text, lang, tld=None, backend=None):
+    """Whole-text convenience wrapper: returns (audio bytes, mime)."""
+    speech = IncrementalSpeech(lang, tld, backend)
+    for chunk in split_sentences(text):
+        speech._submit(chunk)
+    return speech.finish(), speech.mime
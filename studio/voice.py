@@ -0,0 +1,323 @@
+"""Streaming voice queries for AI Saarthi.
+
+Recorded or uploaded audio goes through a streaming energy VAD, which splits
+it at pauses into speech chunks. Each chunk is handed to a recognizer on a
+thread pool as soon as the pause that ends it is seen. The transcript
+therefore builds up chunk by chunk while later audio is still being
+processed, and only the last chunk is still outstanding when speech ends.
+Saarthi starts the LLM call the moment that chunk lands.
+
+Recognizers are pluggable: anything with ``name``, ``offline`` and
+``transcribe(pcm16, rate, lang) -> str``. The offline backends are
+``faster-whisper`` (multilingual, recommended for Hindi/Marathi), ``vosk`` and
+``sphinx`` (English only). ``google`` (speech_recognition's free web API) is
+the online last resort. Environment knobs: ``ASR_BACKEND`` (a backend name, or
+``auto`` for the first installed offline one), ``ASR_WHISPER_MODEL``,
+``VOSK_MODEL_PATH``, ``ASR_WORKERS``, ``VAD_MIN_SILENCE_MS`` and
+``VAD_MAX_CHUNK_S``.
+"""
+import importlib.util
+import io
+import json
+import os
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "350"))
+MAX_CHUNK_S = float(os.getenv("VAD_MAX_CHUNK_S", "8"))
+PAD_MS = 150
+ABS_FLOOR_DB = -45.0
+NOISE_MARGIN_DB = 12.0
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "2"))
+
+Segment = namedtuple("Segment", "start end samples")
+Transcript = namedtuple("Transcript", "text chunks audio_seconds processing_seconds speech_end_to_final")
+
+
+def read_wav(data):
+    """(mono float32 samples in [-1, 1] at SAMPLE_RATE, original rate) from WAV bytes or a file-like."""
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+    with wave.open(source, "rb") as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported WAV sample width: {width * 8} bit")
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples, rate
+
+
+def to_pcm16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def write_wav(samples, rate=SAMPLE_RATE):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(to_pcm16(samples))
+    return out.getvalue()
+
+
+class EnergyVAD:
+    """Streaming energy-based voice activity detector.
+
+    ``feed()`` audio as it arrives and get back the speech segments that have
+    ended (a pause of ``min_silence_ms``, or ``max_chunk_s`` of continuous
+    speech). Frame energies are computed as one vector per feed. The speech
+    threshold is the noise floor plus ``NOISE_MARGIN_DB``. The noise floor is
+    the median of recent silent frames, seeded from the first block's quietest
+    frames.
+    """
+
+    def __init__(self, rate=SAMPLE_RATE, frame_ms=FRAME_MS, min_silence_ms=MIN_SILENCE_MS, max_chunk_s=MAX_CHUNK_S):
+        self.rate = rate
+        self.frame = rate * frame_ms // 1000
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.max_chunk_frames = int(max_chunk_s * 1000 // frame_ms)
+        self.pad = rate * PAD_MS // 1000
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._frames_done = 0
+        self._noise_db = deque(maxlen=300)
+        self._start = None      # frame index where the current segment began
+        self._last_voiced = None
+        self._emitted_until = 0  # sample index
+        self.last_voiced_frame = None
+
+    def feed(self, samples):
+        self._audio = np.concatenate([self._audio, np.asarray(samples, dtype=np.float32)])
+        total_frames = len(self._audio) // self.frame
+        if total_frames <= self._frames_done:
+            return []
+        frames = self._audio[self._frames_done * self.frame:total_frames * self.frame].reshape(-1, self.frame)
+        db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        # Noise floor from frames already judged silent, so long stretches of speech don't raise it
+        floor = np.median(self._noise_db) if self._noise_db else np.percentile(db, 10)
+        threshold = max(ABS_FLOOR_DB, float(floor) + NOISE_MARGIN_DB)
+        voiced = db > threshold
+        self._noise_db.extend(db[~voiced].tolist())
+
+        segments = []
+        for offset, is_voiced in enumerate(voiced):
+            index = self._frames_done + offset
+            if is_voiced:
+                if self._start is None:
+                    self._start = index
+                self._last_voiced = self.last_voiced_frame = index
+                if index - self._start + 1 >= self.max_chunk_frames:
+                    segments.append(self._cut(index + 1))
+            elif self._start is not None and index - self._last_voiced >= self.min_silence_frames:
+                segments.append(self._cut(self._last_voiced + 1))
+        self._frames_done = total_frames
+        return segments
+
+    def flush(self):
+        """End of input: emit the segment still open, if any."""
+        if self._start is None:
+            return []
+        return [self._cut(self._last_voiced + 1)]
+
+    def _cut(self, end_frame):
+        start = max(self._emitted_until, self._start * self.frame - self.pad)
+        end = min(len(self._audio), end_frame * self.frame + self.pad)
+        self._emitted_until = end
+        self._start = self._last_voiced = None
+        return Segment(start / self.rate, end / self.rate, self._audio[start:end].copy())
+
+
+# --- Recognizer backends ---
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+class FasterWhisperBackend:
+    """faster-whisper (CTranslate2), offline and multilingual; the model is loaded once per process."""
+    name = "faster-whisper"
+    offline = True
+    _model = None
+    _model_lock = threading.Lock()
+
+    @classmethod
+    def available(cls):
+        return _installed("faster_whisper")
+
+    def _get_model(self):
+        if FasterWhisperBackend._model is None:
+            with FasterWhisperBackend._model_lock:
+                if FasterWhisperBackend._model is None:
+                    from faster_whisper import WhisperModel
+                    FasterWhisperBackend._model = WhisperModel(os.getenv("ASR_WHISPER_MODEL", "small"), compute_type="int8")
+        return FasterWhisperBackend._model
+
+    def transcribe(self, pcm16, rate, lang):
+        audio = np.frombuffer(pcm16, dtype="<i2").astype(np.float32) / 32768
+        segments, _ = self._get_model().transcribe(audio, language=lang, beam_size=1, condition_on_previous_text=False)
+        return " ".join(segment.text.strip() for segment in segments)
+
+
+class VoskBackend:
+    """Vosk/Kaldi, offline; one model per process from ``VOSK_MODEL_PATH``."""
+    name = "vosk"
+    offline = True
+    _model = None
+    _model_lock = threading.Lock()
+
+    @classmethod
+    def available(cls):
+        return _installed("vosk") and os.path.isdir(os.getenv("VOSK_MODEL_PATH", "model"))
+
+    def transcribe(self, pcm16, rate, lang):
+        from vosk import KaldiRecognizer, Model
+        if VoskBackend._model is None:
+            with VoskBackend._model_lock:
+                if VoskBackend._model is None:
+                    VoskBackend._model = Model(os.getenv("VOSK_MODEL_PATH", "model"))
+        recognizer = KaldiRecognizer(VoskBackend._model, rate)
+        recognizer.AcceptWaveform(pcm16)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class SphinxBackend:
+    """CMU PocketSphinx through speech_recognition, offline (English models only)."""
+    name = "sphinx"
+    offline = True
+
+    @classmethod
+    def available(cls):
+        return _installed("speech_recognition") and _installed("pocketsphinx")
+
+    def transcribe(self, pcm16, rate, lang):
+        import speech_recognition as sr
+        try:
+            return sr.Recognizer().recognize_sphinx(sr.AudioData(pcm16, rate, 2))
+        except sr.UnknownValueError:
+            return ""
+
+
+class GoogleWebBackend:
+    """speech_recognition's free Google Web Speech API (needs network)."""
+    name = "google"
+    offline = False
+
+    @classmethod
+    def available(cls):
+        return _installed("speech_recognition")
+
+    def transcribe(self, pcm16, rate, lang):
+        import speech_recognition as sr
+        try:
+            return sr.Recognizer().recognize_google(sr.AudioData(pcm16, rate, 2), language=f"{lang}-IN")
+        except sr.UnknownValueError:
+            return ""
+
+
+BACKENDS = {cls.name: cls for cls in (FasterWhisperBackend, VoskBackend, SphinxBackend, GoogleWebBackend)}
+
+
+def register_backend(cls):
+    """Add a recognizer class (``name``, ``offline``, ``available()``, ``transcribe()``)."""
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def default_recognizer():
+    """Backend named by ``ASR_BACKEND``; ``auto`` prefers installed offline backends. None if nothing is usable."""
+    choice = os.getenv("ASR_BACKEND", "auto")
+    if choice != "auto":
+        cls = BACKENDS.get(choice)
+        return cls() if cls and cls.available() else None
+    ranked = sorted(BACKENDS.values(), key=lambda cls: not cls.offline)
+    return next((cls() for cls in ranked if cls.available()), None)
+
+
+# --- Incremental transcription ---
+_pool = ThreadPoolExecutor(max_workers=ASR_WORKERS, thread_name_prefix="asr")
+
+
+class VoiceTranscriber:
+    """Feed audio in; each VAD segment is transcribed in the background as soon as it ends.
+
+    ``partial()`` is the in-order transcript of the chunks finished so far.
+    ``finish()`` flushes the last segment and waits for it. Its
+    ``speech_end_to_final`` is measured from when the last voiced audio arrived.
+    """
+
+    def __init__(self, recognizer, lang, rate=SAMPLE_RATE):
+        self.recognizer = recognizer
+        self.lang = lang
+        self.rate = rate
+        self.vad = EnergyVAD(rate)
+        self._futures = []
+        self._audio_samples = 0
+        self._started = time.perf_counter()
+        self._speech_end = self._started
+
+    def feed(self, samples):
+        self._audio_samples += len(samples)
+        voiced_before = self.vad.last_voiced_frame
+        for segment in self.vad.feed(samples):
+            self._submit(segment)
+        if self.vad.last_voiced_frame != voiced_before:
+            self._speech_end = time.perf_counter()
+
+    def _submit(self, segment):
+        self._futures.append((segment, _pool.submit(self.recognizer.transcribe, to_pcm16(segment.samples), self.rate, self.lang)))
+
+    def partial(self):
+        texts = []
+        for _, future in self._futures:
+            if not future.done():
+                break
+            texts.append(future.result().strip())
+        return " ".join(t for t in texts if t)
+
+    def pending(self):
+        return sum(not future.done() for _, future in self._futures)
+
+    def finish(self):
+        for segment in self.vad.flush():
+            self._submit(segment)
+        texts = [future.result().strip() for _, future in self._futures]
+        done = time.perf_counter()
+        return Transcript(" ".join(t for t in texts if t), [s for s, _ in self._futures],
+                          self._audio_samples / self.rate, done - self._started, done - self._speech_end)
+
+
+def stream_transcript(samples, recognizer, lang, block_ms=200, realtime=False, on_partial=None):
+    """Push a clip through VoiceTranscriber in ``block_ms`` blocks (paced at 1x if ``realtime``).
+
+    ``on_partial(text)`` is called whenever the partial transcript grows.
+    """
+    transcriber = VoiceTranscriber(recognizer, lang)
+    block = SAMPLE_RATE * block_ms // 1000
+    shown = ""
+    started = time.perf_counter()
+    for i in range(0, len(samples), block):
+        transcriber.feed(samples[i:i + block])
+        if realtime:
+            time.sleep(max(0.0, started + (i + block) / SAMPLE_RATE - time.perf_counter()))
+        text = transcriber.partial()
+        if on_partial and text != shown:
+            shown = text
+            on_partial(text)
+    transcript = transcriber.finish()
+    if on_partial and transcript.text != shown:
+        on_partial(transcript.text)
+    return transcript
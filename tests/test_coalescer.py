@@ -0,0 +1,62 @@
+import threading
+import time
+
+from studio.shared import Coalescer, LocalBackend, SQLiteBackend
+
+
+def run_together(fns):
+    results, start = [], threading.Barrier(len(fns))
+
+    def call(fn):
+        start.wait()
+        results.append(fn())
+
+    threads = [threading.Thread(target=call, args=(fn,)) for fn in fns]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_in_one_process_share_one_call():
+    coalescer, calls = Coalescer(LocalBackend()), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "answer", True
+
+    results = run_together([lambda: coalescer.run("k", lambda: None, compute)] * 8)
+    assert results == [("answer", True)] * 8
+    assert len(calls) == 1
+
+
+def test_followers_retry_when_the_leader_fails():
+    coalescer, calls = Coalescer(LocalBackend()), []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return ("⚠️ down", False) if len(calls) == 1 else ("answer", True)
+
+    results = run_together([lambda: coalescer.run("k", lambda: None, compute)] * 3)
+    assert ("⚠️ down", False) in results
+    assert len(calls) == 3
+
+
+def test_workers_on_a_shared_backend_share_one_call(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "shared.sqlite3"))
+    workers = [Coalescer(backend, lease_seconds=5) for _ in range(4)]  # one per process
+    store, calls = {}, []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        store["k"] = "answer"
+        return "answer", True
+
+    requests = [lambda worker=worker: worker.run("k", lambda: store.get("k"), compute) for worker in workers]
+    assert run_together(requests) == [("answer", True)] * 4
+    assert len(calls) == 1
+    assert backend.get("lease:k") is None
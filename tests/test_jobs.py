@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from studio.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue, QueueFull
+
+
+def blocker(queue, lane="interactive"):
+    """Submit a job that holds its worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def hold(job):
+        started.set()
+        release.wait(5)
+
+    job = queue.submit("hold", hold, lane=lane)
+    assert started.wait(5)
+    return job, release
+
+
+def test_interactive_jobs_run_before_queued_bulk_jobs():
+    queue, order = JobQueue(workers=1, bulk_workers=1), []
+    _, release = blocker(queue)
+    record = lambda job, name: order.append(name)
+    jobs = [queue.submit("bulk", record, "bulk-1", lane="bulk"), queue.submit("bulk", record, "bulk-2", lane="bulk"),
+            queue.submit("saarthi", record, "interactive")]
+    assert [queue.position(job) for job in jobs] == [2, 3, 1]
+    release.set()
+    assert all(job.wait(5) for job in jobs)
+    assert order == ["interactive", "bulk-1", "bulk-2"]
+
+
+def test_bulk_never_takes_every_worker():
+    queue = JobQueue(workers=2, bulk_workers=1)
+    first, release = blocker(queue, lane="bulk")
+    second = queue.submit("bulk", lambda job: None, lane="bulk")
+    interactive = queue.submit("saarthi", lambda job: "answer")
+    assert interactive.wait(5) and interactive.result == "answer"
+    assert first.status == RUNNING and second.status == QUEUED
+    release.set()
+    assert second.wait(5) and second.status == DONE
+
+
+def test_cancelling_a_queued_job_drops_it():
+    queue, ran = JobQueue(workers=1), []
+    _, release = blocker(queue)
+    job = queue.submit("bulk", lambda job: ran.append(1), lane="bulk")
+    queue.cancel(job.id)
+    release.set()
+    assert job.wait(5) and job.status == CANCELLED
+    assert ran == [] and queue.stats()["queued"]["bulk"] == 0
+
+
+def test_full_queue_and_unknown_lane_are_rejected():
+    queue = JobQueue(workers=1, max_queued=1)
+    _, release = blocker(queue)
+    queue.submit("bulk", lambda job: None, lane="bulk")
+    with pytest.raises(QueueFull):
+        queue.submit("bulk", lambda job: None, lane="bulk")
+    with pytest.raises(ValueError):
+        queue.submit("bulk", lambda job: None, lane="batch")
+    release.set()
+
+
+def test_failures_are_reported_on_the_job():
+    queue = JobQueue(workers=1)
+    job = queue.submit("titan_grid", lambda job: 1 / 0)
+    assert job.wait(5)
+    assert job.status == FAILED and job.error.startswith("ZeroDivisionError")
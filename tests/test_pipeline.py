@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+from studio import pipeline
+from studio.engine import LLMResult
+from studio.pipeline import BASE, LOCALIZED, WHATSAPP, PipelineDAG, Stage, StageMemo, run_content_pipeline, stage_name
+
+PUNE, DELHI = "Pune (Puneri pure)", "Delhi (Gamer/Swag)"
+
+
+class FakeLLM:
+    """Deterministic answer per prompt; records every prompt it was sent."""
+
+    def __init__(self, fail=()):
+        self.prompts = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, use_cache):
+        with self._lock:
+            self.prompts.append(prompt)
+        if any(word in prompt for word in self.fail):
+            return LLMResult("", "⚠️ AI Engine Offline.")
+        return LLMResult("answer " + hashlib.sha256(prompt.encode()).hexdigest()[:8], None)
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    pipeline.get_stage_memo().clear()
+
+
+def statuses(result):
+    return {name: stage.status for name, stage in result.stages.items()}
+
+
+def test_rerun_with_the_same_inputs_reuses_every_stage():
+    llm = FakeLLM()
+    first = run_content_pipeline("PM Kisan", "Hindi", [PUNE, DELHI], llm=llm)
+    assert len(llm.prompts) == 5
+    second = run_content_pipeline("PM Kisan", "Hindi", [PUNE, DELHI], llm=llm)
+    assert len(llm.prompts) == 5
+    assert set(statuses(second).values()) == {"reused"}
+    assert second.whatsapp == first.whatsapp
+
+
+def test_adding_a_region_runs_only_that_region():
+    llm = FakeLLM()
+    run_content_pipeline("PM Kisan", "Hindi", [PUNE], llm=llm)
+    result = run_content_pipeline("PM Kisan", "Hindi", [PUNE, DELHI], llm=llm)
+    assert len(llm.prompts) == 5
+    assert statuses(result)[stage_name(LOCALIZED, DELHI)] == "ran"
+    assert statuses(result)[stage_name(LOCALIZED, PUNE)] == "reused"
+
+
+def test_edited_base_script_reruns_everything_below_it():
+    llm = FakeLLM()
+    run_content_pipeline("PM Kisan", "Hindi", [PUNE], llm=llm)
+    result = run_content_pipeline("PM Kisan", "Hindi", [PUNE], base_script="An edited script.", llm=llm)
+    assert statuses(result) == {BASE: "edited", stage_name(LOCALIZED, PUNE): "ran", stage_name(WHATSAPP, PUNE): "ran"}
+    assert "An edited script." in llm.prompts[-2]
+
+
+def test_force_reruns_a_memoized_stage():
+    llm = FakeLLM()
+    run_content_pipeline("PM Kisan", "Hindi", [PUNE], llm=llm)
+    result = run_content_pipeline("PM Kisan", "Hindi", [PUNE], force=[stage_name(WHATSAPP, PUNE)], llm=llm)
+    assert len(llm.prompts) == 4
+    assert statuses(result)[stage_name(WHATSAPP, PUNE)] == "ran"
+
+
+def test_failed_stage_skips_its_dependents_and_is_not_memoized():
+    llm = FakeLLM(fail=[PUNE])
+    result = run_content_pipeline("PM Kisan", "Hindi", [PUNE, DELHI], llm=llm)
+    assert statuses(result)[stage_name(LOCALIZED, PUNE)] == "failed"
+    assert statuses(result)[stage_name(WHATSAPP, PUNE)] == "skipped"
+    assert set(result.whatsapp) == {DELHI}
+    llm.fail = ()
+    result = run_content_pipeline("PM Kisan", "Hindi", [PUNE, DELHI], llm=llm)
+    assert statuses(result)[stage_name(LOCALIZED, PUNE)] == "ran"
+    assert set(result.whatsapp) == {PUNE, DELHI}
+
+
+def test_unknown_dependency_and_cycle_are_rejected():
+    prompt = lambda *parts: " ".join(parts)
+    with pytest.raises(ValueError):
+        PipelineDAG([Stage("a", "a", prompt, deps=("missing",))])
+    dag = PipelineDAG([Stage("a", "a", prompt, deps=("b",)), Stage("b", "b", prompt, deps=("a",))])
+    with pytest.raises(ValueError):
+        dag.run(llm=FakeLLM())
+
+
+def test_memo_is_a_bounded_lru():
+    memo = StageMemo(size=2)
+    memo.put("a", "1")
+    memo.put("b", "2")
+    memo.get("a")
+    memo.put("c", "3")
+    assert (memo.get("a"), memo.get("b"), memo.get("c")) == ("1", None, "3")
+
+
+def test_concurrent_computes_of_one_key_share_the_first():
+    memo, calls, start = StageMemo(), [], threading.Barrier(4)
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return LLMResult("text", None)
+
+    def compute():
+        start.wait()
+        results.append(memo.compute("k", slow))
+
+    threads = [threading.Thread(target=compute) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from studio import ratelimit
+from studio.shared import LocalBackend
+
+
+def available(bucket):
+    return bucket.snapshot()["available"]
+
+
+def test_settle_refunds_the_unused_reservation():
+    limiter = ratelimit.ModelLimiter("test-model", None, 60)  # 1 token/s refill
+    waited, taken = limiter.acquire(40)
+    assert taken == 40
+    ratelimit.Reservation(limiter, "test-model", taken, waited).settle(10, 5)
+    assert available(limiter.tokens) == pytest.approx(45, abs=0.5)
+
+
+def test_oversized_request_refunds_only_what_it_took():
+    limiter = ratelimit.ModelLimiter("test-model", None, 60)
+    waited, taken = limiter.acquire(100)
+    assert taken == 60
+    ratelimit.Reservation(limiter, "test-model", taken, waited).settle(50, 0)
+    assert available(limiter.tokens) == pytest.approx(10, abs=0.5)
+
+
+def test_rate_limited_refunds_when_the_block_raises(monkeypatch):
+    limiter = ratelimit.ModelLimiter("test-model", None, 60)
+    monkeypatch.setitem(ratelimit._limiters, "test-model", limiter)
+    with pytest.raises(RuntimeError):
+        with ratelimit.rate_limited("test-model", 30):
+            assert available(limiter.tokens) == pytest.approx(30, abs=0.5)
+            raise RuntimeError("provider down")
+    assert available(limiter.tokens) == pytest.approx(60, abs=0.5)
+
+
+def test_request_queue_timeout():
+    limiter = ratelimit.ModelLimiter("test-model", 1, None)
+    limiter.acquire(0)
+    with pytest.raises(ratelimit.RateLimitTimeout):
+        limiter.acquire(0, timeout=0.05)
+
+
+def test_token_timeout_gives_back_the_request_slot():
+    limiter = ratelimit.ModelLimiter("test-model", 60, 60)
+    limiter.acquire(60)
+    with pytest.raises(ratelimit.RateLimitTimeout):
+        limiter.acquire(60, timeout=0.05)
+    assert available(limiter.requests) == pytest.approx(59, abs=0.5)
+
+
+@pytest.mark.parametrize("make", [
+    lambda: ratelimit.TokenBucket(60),
+    lambda: ratelimit.SharedTokenBucket(LocalBackend(), "test-bucket", 60),
+], ids=["local", "shared"])
+def test_waiters_are_counted_and_released(make):
+    bucket = make()
+    assert bucket.acquire(60)
+    outcomes = []
+    threads = [threading.Thread(target=lambda: outcomes.append(bucket.acquire(1, timeout=0.5))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 0.4
+    while bucket.snapshot()["waiting"] < 8 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert bucket.snapshot()["waiting"] == 8
+    for thread in threads:
+        thread.join()
+    assert bucket.snapshot()["waiting"] == 0
+    assert outcomes.count(True) <= 1  # about half a token refills before the waiters give up
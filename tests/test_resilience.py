@@ -0,0 +1,67 @@
+import threading
+import time
+
+from studio import resilience
+
+
+def tripped(cooldown=0.05):
+    breaker = resilience.CircuitBreaker("test", failure_threshold=2, cooldown=cooldown)
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    return breaker
+
+
+def test_trips_open_after_consecutive_failures():
+    breaker = tripped()
+    assert breaker.state == resilience.OPEN
+    assert breaker.trips == 1
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = resilience.CircuitBreaker("test", failure_threshold=2, cooldown=1)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == resilience.CLOSED
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    breaker = tripped()
+    time.sleep(0.06)
+    allowed = []
+    threads = [threading.Thread(target=lambda: allowed.append(breaker.allow())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert breaker.state == resilience.HALF_OPEN
+    assert allowed.count(True) == 1
+
+
+def test_probe_success_closes():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == resilience.CLOSED
+    assert breaker.allow()
+
+
+def test_probe_failure_reopens_for_another_cooldown():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure("still down")
+    assert breaker.state == resilience.OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_abandoned_probe_expires_after_a_cooldown():
+    breaker = tripped()
+    time.sleep(0.06)
+    assert breaker.allow()  # probe never reports back
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
@@ -0,0 +1,27 @@
+import unicodedata
+
+from studio import sentiment
+
+PRECOMPOSED = "\u092c\u095d\u093f\u092f\u093e"  # बढ़िया, ढ़ as one code point (U+095D)
+DECOMPOSED = "\u092c\u0922\u093c\u093f\u092f\u093e"  # ढ + nukta, as stored in the lexicon
+
+
+def label(comment):
+    return sentiment.LABELS[sentiment.label_scores(sentiment.score_comments([comment]))[0]]
+
+
+def test_lexicon_keys_are_unique_after_nfc():
+    keys = [unicodedata.normalize("NFC", word) for word in sentiment.LEXICON]
+    assert len(keys) == len(set(keys))
+
+
+def test_both_nukta_spellings_score_the_same():
+    assert sentiment.tokenize(PRECOMPOSED) == sentiment.tokenize(DECOMPOSED)
+    scores = sentiment.score_comments([PRECOMPOSED, DECOMPOSED])
+    assert scores[0] == scores[1] > 0
+
+
+def test_negators_flip_the_right_neighbour():
+    assert label("not good") == "Negative"
+    assert label("accha nahi tha") == "Negative"
+    assert label(f"बकवास नहीं, {PRECOMPOSED} है") == "Positive"